@@ -5,15 +5,54 @@
 Schema Markdown is a human-friendly schema definition language and schema validator
 """
 
+from .binary import \
+    BinaryCodec
+
+from .classes import \
+    SchemaStruct, \
+    get_enum_classes, \
+    get_struct_classes, \
+    get_struct_tuples
+
+from .csv_writer import \
+    CSVWriter
+
 from .encode import \
     JSONEncoder, \
+    QueryStringDecoder, \
+    StructTupleJSONEncoder, \
     decode_query_string, \
-    encode_query_string
+    decode_query_string_columns, \
+    decode_query_string_typed, \
+    encode_query_string, \
+    get_json_serializer, \
+    get_query_string_encoder
+
+from .json_decode import \
+    validate_json, \
+    validate_json_array, \
+    validate_json_array_async
+
+from .json_lines import \
+    JSONLinesIndex, \
+    JSONLinesWriter, \
+    validate_jsonl, \
+    validate_jsonl_async
+
+from .msgpack import \
+    decode_msgpack, \
+    encode_msgpack, \
+    validate_msgpack
 
 from .parser import \
     parse_schema_markdown, \
+    parse_schema_markdown_files, \
     SchemaMarkdownParserError
 
+from .pipeline import \
+    Pipeline, \
+    PipelineStage
+
 from .schema import \
     ValidationError, \
     get_enum_values, \
@@ -0,0 +1,500 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+Schema-driven compact binary encoding and decoding
+"""
+
+from datetime import date, datetime, timedelta, timezone
+import json
+import struct
+from uuid import UUID
+
+from .encode import JSONEncoder
+from .schema import ValidationError, get_enum_values, get_struct_members
+
+
+class BinaryCodec:
+    """
+    A compact binary encoder and decoder of a type's validated values (see :func:`~schema_markdown.validate_type`).
+    Since the type model fixes struct member order and types, the binary format is positional and contains no member
+    names or type tags:
+
+    - ints are zig-zag varints, floats are 8-byte little-endian doubles, and bools are one byte
+    - strings are a varint byte length followed by UTF-8 bytes
+    - dates are varint proleptic ordinals and datetimes are zig-zag varint microseconds since the UTC epoch
+    - UUIDs are 16 bytes
+    - enums are the varint index of the enum value
+    - arrays and dicts are a varint length followed by the items (or key/value pairs)
+    - structs are a varint bitmap of the present optional members followed by the present member values
+    - unions are the varint member index followed by the member value
+    - nullable values are preceded by a null flag byte
+    - object and any values are JSON strings
+
+    Datetimes are decoded as UTC. Struct and enum values must be dicts and strings - values validated with the
+    ``struct_classes`` and ``enum_classes`` options are not supported.
+
+    Decoded array and dict lengths are checked against the remaining data. Items that encode as zero bytes (structs
+    with no optional members whose members all encode as zero bytes, such as empty structs) can't be checked that way,
+    so arrays of them decode at most 65536 items.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name of encoded values
+    :raises ValidationError: The type name is unknown
+    """
+
+    __slots__ = ('_encode', '_decode')
+
+    def __init__(self, types, type_name):
+        if type_name not in types:
+            raise ValidationError(f"Unknown type {type_name!r}")
+        self._encode = _get_encoder(types, {'user': type_name}, None, {})
+        self._decode = _get_decoder(types, {'user': type_name}, None, {})
+
+    def encode(self, value):
+        """
+        Encode a value
+
+        :param object value: The validated value
+        :returns: The encoded :class:`bytes`
+        """
+
+        out = bytearray()
+        self._encode(value, out)
+        return bytes(out)
+
+    def decode(self, data):
+        """
+        Decode a value
+
+        :param data: The encoded data
+        :type data: bytes or bytearray or memoryview
+        :returns: The decoded value
+        :raises ValueError: The data is invalid
+        """
+
+        data = _get_buffer(data)
+        value, end = self.decode_from(data)
+        if end != len(data):
+            raise ValueError(f'Invalid binary data: extra data at offset {end}')
+        return value
+
+    def decode_from(self, data, offset=0):
+        """
+        Decode a value from a buffer offset. The buffer is not copied, so many values can be decoded from one
+        buffer (e.g. a :class:`~mmap.mmap`) in sequence.
+
+        :param data: The encoded data
+        :type data: bytes or bytearray or memoryview
+        :param int offset: The value's offset
+        :returns: The tuple of the decoded value and the value's end offset
+        :raises ValueError: The data is invalid
+        """
+
+        data = _get_buffer(data)
+        try:
+            return self._decode(data, offset)
+        except (IndexError, KeyError, OverflowError, RecursionError, struct.error, UnicodeDecodeError, ValueError):
+            raise ValueError(f'Invalid binary data at offset {offset}') from None
+
+
+# Helper to get a byte memoryview of a buffer
+def _get_buffer(data):
+    data = data if isinstance(data, memoryview) else memoryview(data)
+    return data if data.format == 'B' else data.cast('B')
+
+
+# The datetime epoch
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Float packing
+_PACK_DOUBLE = struct.Struct('<d').pack
+_UNPACK_DOUBLE_FROM = struct.Struct('<d').unpack_from
+
+# The object and any value encoder
+_ENCODE_JSON = JSONEncoder(separators=(',', ':')).encode
+
+# The maximum decoded length of an array of zero-width items
+_MAX_ZERO_WIDTH_LENGTH = 65536
+
+
+# Unsigned and signed (zig-zag) varint encoding
+def _write_uvarint(value, out):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_uvarint(data, pos):
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = byte & 0x7f
+    shift = 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos + 1
+        shift += 7
+
+
+def _write_varint(value, out):
+    _write_uvarint(value << 1 if value >= 0 else ((-value) << 1) - 1, out)
+
+
+def _read_varint(data, pos):
+    value, pos = _read_uvarint(data, pos)
+    return (value >> 1 if not value & 1 else -(value >> 1) - 1), pos
+
+
+# Helper to read a varint length-prefixed byte slice
+def _read_slice(data, pos):
+    length, pos = _read_uvarint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise IndexError()
+    return data[pos:end], end
+
+
+# The built-in type encoders and decoders
+def _encode_string(value, out):
+    value_bytes = value.encode('utf-8')
+    _write_uvarint(len(value_bytes), out)
+    out += value_bytes
+
+
+def _decode_string(data, pos):
+    value_bytes, pos = _read_slice(data, pos)
+    return str(value_bytes, 'utf-8'), pos
+
+
+def _encode_float(value, out):
+    out += _PACK_DOUBLE(value)
+
+
+def _decode_float(data, pos):
+    return _UNPACK_DOUBLE_FROM(data, pos)[0], pos + 8
+
+
+def _encode_bool(value, out):
+    out.append(1 if value else 0)
+
+
+def _decode_bool(data, pos):
+    return data[pos] != 0, pos + 1
+
+
+def _encode_date(value, out):
+    _write_uvarint(value.toordinal(), out)
+
+
+def _decode_date(data, pos):
+    ordinal, pos = _read_uvarint(data, pos)
+    return date.fromordinal(ordinal), pos
+
+
+def _encode_datetime(value, out):
+    delta = (value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)) - _EPOCH
+    _write_varint((delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds, out)
+
+
+def _decode_datetime(data, pos):
+    microseconds, pos = _read_varint(data, pos)
+    return _EPOCH + timedelta(microseconds=microseconds), pos
+
+
+def _encode_uuid(value, out):
+    if isinstance(value, UUID):
+        out += value.bytes
+    elif isinstance(value, str):
+        out += UUID(value).bytes
+    else:
+        out += value
+
+
+def _decode_uuid(data, pos):
+    end = pos + 16
+    if end > len(data):
+        raise IndexError()
+    return UUID(bytes=bytes(data[pos:end])), end
+
+
+def _encode_json(value, out):
+    _encode_string(_ENCODE_JSON(value), out)
+
+
+def _decode_json(data, pos):
+    value_bytes, pos = _read_slice(data, pos)
+    return json.loads(str(value_bytes, 'utf-8')), pos
+
+
+# The built-in type encoder and decoder maps
+_BUILTIN_ENCODERS = {
+    'string': _encode_string,
+    'int': _write_varint,
+    'float': _encode_float,
+    'bool': _encode_bool,
+    'date': _encode_date,
+    'datetime': _encode_datetime,
+    'uuid': _encode_uuid,
+    'object': _encode_json,
+    'any': _encode_json
+}
+_BUILTIN_DECODERS = {
+    'string': _decode_string,
+    'int': _read_varint,
+    'float': _decode_float,
+    'bool': _decode_bool,
+    'date': _decode_date,
+    'datetime': _decode_datetime,
+    'uuid': _decode_uuid,
+    'object': _decode_json,
+    'any': _decode_json
+}
+
+
+# Helper function to get a type's encoder function - encoders append a value's encoding to a bytearray
+def _get_encoder(types, type_, attr, encoders):
+    # Nullable?
+    if attr is not None and attr.get('nullable', False):
+        encode_value = _get_encoder(types, type_, None, encoders)
+
+        def encode_nullable(value, out):
+            if value is None:
+                out.append(0)
+            else:
+                out.append(1)
+                encode_value(value, out)
+        return encode_nullable
+
+    # Built-in?
+    if 'builtin' in type_:
+        return _BUILTIN_ENCODERS[type_['builtin']]
+
+    # Array?
+    if 'array' in type_:
+        array = type_['array']
+        encode_item = _get_encoder(types, array['type'], array.get('attr'), encoders)
+
+        def encode_array(value, out):
+            _write_uvarint(len(value), out)
+            for item in value:
+                encode_item(item, out)
+        return encode_array
+
+    # Dict?
+    if 'dict' in type_:
+        dict_ = type_['dict']
+        encode_key = _get_encoder(types, dict_.get('keyType', {'builtin': 'string'}), dict_.get('keyAttr'), encoders)
+        encode_item = _get_encoder(types, dict_['type'], dict_.get('attr'), encoders)
+
+        def encode_dict(value, out):
+            _write_uvarint(len(value), out)
+            for key, item in value.items():
+                encode_key(key, out)
+                encode_item(item, out)
+        return encode_dict
+
+    # User type
+    type_name = type_['user']
+    user_type = types[type_name]
+
+    # Typedef?
+    if 'typedef' in user_type:
+        typedef = user_type['typedef']
+        return _get_encoder(types, typedef['type'], typedef.get('attr'), encoders)
+
+    # Enum?
+    if 'enum' in user_type:
+        value_indexes = {enum_value['name']: ix for ix, enum_value in enumerate(get_enum_values(types, user_type['enum']))}
+        return lambda value, out: _write_uvarint(value_indexes[value], out)
+
+    # Struct encoder already created? If not, the struct is recursive - lookup the encoder when called
+    if type_name in encoders:
+        existing_encoder = encoders[type_name]
+        if existing_encoder is None:
+            def encode_recursive(value, out):
+                encoders[type_name](value, out)
+            return encode_recursive
+        return existing_encoder
+
+    # Create the struct encoder
+    encoders[type_name] = None
+    struct_ = user_type['struct']
+    members = [
+        (member['name'], member.get('optional', False), _get_encoder(types, member['type'], member.get('attr'), encoders))
+        for member in get_struct_members(types, struct_)
+    ]
+
+    # Union?
+    if struct_.get('union', False):
+        member_indexes = {member_name: (ix, encode_member) for ix, (member_name, _, encode_member) in enumerate(members)}
+
+        def encode_union(value, out):
+            for member_name, member_value in value.items():
+                member_index, encode_member = member_indexes[member_name]
+                _write_uvarint(member_index, out)
+                encode_member(member_value, out)
+        encoders[type_name] = encode_union
+
+    else:
+        optional_names = [member_name for member_name, member_optional, _ in members if member_optional]
+        optional_members = [(member_name, 1 << ix) for ix, member_name in enumerate(optional_names)]
+
+        def encode_struct(value, out):
+            if optional_members:
+                optional_bits = 0
+                for member_name, member_bit in optional_members:
+                    if member_name in value:
+                        optional_bits |= member_bit
+                _write_uvarint(optional_bits, out)
+            for member_name, member_optional, encode_member in members:
+                if not member_optional:
+                    encode_member(value[member_name], out)
+                elif member_name in value:
+                    encode_member(value[member_name], out)
+        encoders[type_name] = encode_struct
+
+    return encoders[type_name]
+
+
+# Helper function to get a type's decoder function - decoders return the value and the value's end offset
+def _get_decoder(types, type_, attr, decoders):
+    # Nullable?
+    if attr is not None and attr.get('nullable', False):
+        decode_value = _get_decoder(types, type_, None, decoders)
+
+        def decode_nullable(data, pos):
+            if data[pos] == 0:
+                return None, pos + 1
+            return decode_value(data, pos + 1)
+        return decode_nullable
+
+    # Built-in?
+    if 'builtin' in type_:
+        return _BUILTIN_DECODERS[type_['builtin']]
+
+    # Array?
+    if 'array' in type_:
+        array = type_['array']
+        decode_item = _get_decoder(types, array['type'], array.get('attr'), decoders)
+        max_length = _MAX_ZERO_WIDTH_LENGTH if _is_zero_width(types, array['type'], array.get('attr'), frozenset()) else None
+
+        def decode_array(data, pos):
+            length, pos = _read_uvarint(data, pos)
+            if length > (len(data) - pos if max_length is None else max_length):
+                raise IndexError()
+            value = []
+            for _ in range(length):
+                item, pos = decode_item(data, pos)
+                value.append(item)
+            return value, pos
+        return decode_array
+
+    # Dict?
+    if 'dict' in type_:
+        dict_ = type_['dict']
+        decode_key = _get_decoder(types, dict_.get('keyType', {'builtin': 'string'}), dict_.get('keyAttr'), decoders)
+        decode_item = _get_decoder(types, dict_['type'], dict_.get('attr'), decoders)
+
+        # Dict keys are never zero-width
+        def decode_dict(data, pos):
+            length, pos = _read_uvarint(data, pos)
+            if length > len(data) - pos:
+                raise IndexError()
+            value = {}
+            for _ in range(length):
+                key, pos = decode_key(data, pos)
+                value[key], pos = decode_item(data, pos)
+            return value, pos
+        return decode_dict
+
+    # User type
+    type_name = type_['user']
+    user_type = types[type_name]
+
+    # Typedef?
+    if 'typedef' in user_type:
+        typedef = user_type['typedef']
+        return _get_decoder(types, typedef['type'], typedef.get('attr'), decoders)
+
+    # Enum?
+    if 'enum' in user_type:
+        value_names = tuple(enum_value['name'] for enum_value in get_enum_values(types, user_type['enum']))
+
+        def decode_enum(data, pos):
+            value_index, pos = _read_uvarint(data, pos)
+            return value_names[value_index], pos
+        return decode_enum
+
+    # Struct decoder already created? If not, the struct is recursive - lookup the decoder when called
+    if type_name in decoders:
+        existing_decoder = decoders[type_name]
+        if existing_decoder is None:
+            def decode_recursive(data, pos):
+                return decoders[type_name](data, pos)
+            return decode_recursive
+        return existing_decoder
+
+    # Create the struct decoder
+    decoders[type_name] = None
+    struct_ = user_type['struct']
+    members = [
+        (member['name'], member.get('optional', False), _get_decoder(types, member['type'], member.get('attr'), decoders))
+        for member in get_struct_members(types, struct_)
+    ]
+
+    # Union?
+    if struct_.get('union', False):
+        union_members = tuple((member_name, decode_member) for member_name, _, decode_member in members)
+
+        def decode_union(data, pos):
+            member_index, pos = _read_uvarint(data, pos)
+            member_name, decode_member = union_members[member_index]
+            member_value, pos = decode_member(data, pos)
+            return {member_name: member_value}, pos
+        decoders[type_name] = decode_union
+
+    else:
+        has_optional = any(optional for _, optional, _ in members)
+        struct_members = []
+        optional_bit = 1
+        for member_name, member_optional, decode_member in members:
+            struct_members.append((member_name, optional_bit if member_optional else 0, decode_member))
+            if member_optional:
+                optional_bit <<= 1
+
+        def decode_struct(data, pos):
+            optional_bits = 0
+            if has_optional:
+                optional_bits, pos = _read_uvarint(data, pos)
+            value = {}
+            for member_name, member_bit, decode_member in struct_members:
+                if not member_bit or optional_bits & member_bit:
+                    value[member_name], pos = decode_member(data, pos)
+            return value, pos
+        decoders[type_name] = decode_struct
+
+    return decoders[type_name]
+
+
+# Helper to determine if a type's values encode as zero bytes - non-union structs with no optional members whose members
+# are all zero-width
+def _is_zero_width(types, type_, attr, struct_names):
+    if (attr is not None and attr.get('nullable', False)) or 'user' not in type_:
+        return False
+    type_name = type_['user']
+    user_type = types[type_name]
+    if 'typedef' in user_type:
+        typedef = user_type['typedef']
+        return _is_zero_width(types, typedef['type'], typedef.get('attr'), struct_names)
+    if 'struct' not in user_type or type_name in struct_names or user_type['struct'].get('union', False):
+        return False
+    member_struct_names = struct_names | {type_name}
+    return all(
+        not member.get('optional', False) and _is_zero_width(types, member['type'], member.get('attr'), member_struct_names)
+        for member in get_struct_members(types, user_type['struct'])
+    )
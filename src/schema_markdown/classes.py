@@ -0,0 +1,192 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+Generated Python classes for schema-markdown user types
+"""
+
+from collections import namedtuple
+from enum import Enum, IntEnum
+
+from .schema import get_enum_values, get_struct_members
+
+
+class SchemaStruct:
+    """
+    The base class of generated struct classes (see :func:`~schema_markdown.get_struct_classes`). Struct members are
+    stored in ``__slots__`` - absent members are unset attributes.
+
+    :param members: The struct member values
+    """
+
+    __slots__ = ()
+
+    #: The struct's type name
+    _type_name = None
+
+    #: The tuple of the struct's member names (inherited members first)
+    _members = ()
+
+    def __init__(self, /, **members):
+        for member_name, member_value in members.items():
+            setattr(self, member_name, member_value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._asdict() == other._asdict() # pylint: disable=protected-access
+
+    def __repr__(self):
+        members_str = ', '.join(f'{member_name}={member_value!r}' for member_name, member_value in self._asdict().items())
+        return f'{self._type_name}({members_str})'
+
+    def _asdict(self):
+        """
+        Get the struct's members as a dict (inherited members first)
+
+        :returns: The dict of member name to member value
+        """
+
+        members = {}
+        for member_name in self._members:
+            member_value = getattr(self, member_name, _UNSET)
+            if member_value is not _UNSET:
+                members[member_name] = member_value
+        return members
+
+
+# Sentinel for unset struct member attributes
+_UNSET = object()
+
+
+def get_struct_classes(types, module=None):
+    """
+    Generate a :class:`~schema_markdown.SchemaStruct` sub-class with ``__slots__`` for each struct of a type model.
+    A struct's class derives from the class of its first base struct. Pass the result as the ``struct_classes``
+    argument of :func:`~schema_markdown.validate_type` to validate into struct class instances.
+
+    Struct class instances are picklable if the classes are generated with the ``module`` argument and are attributes
+    of that module with their type names. For example:
+
+    >>> types = schema_markdown.parse_schema_markdown('struct MyStruct\\n    int a')
+    >>> globals().update(schema_markdown.get_struct_classes(types, module=__name__))
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param module: The optional name of the module that defines the classes
+    :type module: str or None
+    :returns: The map of struct type name to struct class
+    """
+
+    struct_classes = {}
+    for type_name, user_type in types.items():
+        if 'struct' in user_type:
+            _get_struct_class(types, type_name, struct_classes, module)
+    return struct_classes
+
+
+def _get_struct_class(types, type_name, struct_classes, module):
+    struct_class = struct_classes.get(type_name)
+    if struct_class is None:
+        struct = types[type_name]['struct']
+
+        # Get the first base struct's class
+        base_class = SchemaStruct
+        if 'bases' in struct:
+            base_name = struct['bases'][0]
+            while 'typedef' in types[base_name]:
+                base_name = types[base_name]['typedef']['type']['user']
+            base_class = _get_struct_class(types, base_name, struct_classes, module)
+
+        # Create the struct class - slots are the members not inherited from the base class
+        members = tuple(member['name'] for member in get_struct_members(types, struct))
+        base_members = base_class._members # pylint: disable=protected-access
+        class_dict = {
+            '__slots__': tuple(member_name for member_name in members if member_name not in base_members),
+            '_type_name': type_name,
+            '_members': members
+        }
+        if module is not None:
+            class_dict['__module__'] = module
+        struct_class = type(type_name, (base_class,), class_dict)
+        struct_classes[type_name] = struct_class
+
+    return struct_class
+
+
+def get_struct_tuples(types, named=True, module=None):
+    """
+    Generate a tuple constructor for each struct of a type model. Struct tuple member positions are the
+    :func:`~schema_markdown.get_struct_members` order and absent members are None. Pass the result as the
+    ``struct_classes`` argument of :func:`~schema_markdown.validate_type` to validate into struct tuples. Use
+    :class:`~schema_markdown.StructTupleJSONEncoder` to encode struct tuples as JSON.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param bool named: If True, generate :func:`~collections.namedtuple` classes. Otherwise, structs are plain tuples.
+        Member names that are not valid :func:`~collections.namedtuple` field names (for example, Python keywords) are
+        renamed to their positional names (e.g. ``_1``). The class of such a struct is constructed with the struct's
+        member names.
+    :param module: The optional name of the module that defines the named tuple classes. As with
+        :func:`~schema_markdown.get_struct_classes`, named struct tuples are picklable if the classes are attributes
+        of that module with their type names.
+    :type module: str or None
+    :returns: The map of struct type name to struct tuple constructor
+    """
+
+    struct_tuples = {}
+    for type_name, user_type in types.items():
+        if 'struct' in user_type:
+            members = tuple(member['name'] for member in get_struct_members(types, user_type['struct']))
+            if named:
+                tuple_class = namedtuple(type_name, members, defaults=(None,) * len(members), rename=True, module=module)
+                if tuple_class._fields != members:
+                    tuple_class = _renamed_struct_tuple_class(tuple_class, members)
+                struct_tuples[type_name] = tuple_class
+            else:
+                struct_tuples[type_name] = _struct_tuple(members)
+    return struct_tuples
+
+
+# Helper to create a named tuple sub-class, with renamed fields, that is constructed with the struct's member names
+def _renamed_struct_tuple_class(tuple_class, members):
+    def __new__(cls, **member_values):
+        return tuple.__new__(cls, map(member_values.get, members))
+
+    def __reduce__(self):
+        return (self._make, (tuple(self),))
+
+    return type(tuple_class.__name__, (tuple_class,), {
+        '__slots__': (),
+        '__module__': tuple_class.__module__,
+        '__new__': __new__,
+        '__reduce__': __reduce__
+    })
+
+
+def _struct_tuple(members):
+    def struct_tuple(**member_values):
+        return tuple(map(member_values.get, members))
+    return struct_tuple
+
+
+def get_enum_classes(types, int_enum=False):
+    """
+    Generate an :class:`~enum.Enum` class for each enum of a type model. An enum class's members are the enum's values
+    (inherited values first). Pass the result as the ``enum_classes`` argument of :func:`~schema_markdown.validate_type`
+    to validate into enum class members.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param bool int_enum: If True, generate :class:`~enum.IntEnum` classes with member values numbered from 1.
+        Otherwise, member values are the enum value strings. Note that JSON encoders encode
+        :class:`~enum.IntEnum` members as integers, which do not validate as the enum type, while
+        :func:`~schema_markdown.encode_query_string` and :class:`~schema_markdown.CSVWriter` write them by name.
+    :returns: The map of enum type name to enum class
+    :raises ValueError: An enum value name is reserved by :class:`~enum.Enum`
+    """
+
+    enum_classes = {}
+    for type_name, user_type in types.items():
+        if 'enum' in user_type:
+            value_names = [enum_value['name'] for enum_value in get_enum_values(types, user_type['enum'])]
+            if int_enum:
+                enum_classes[type_name] = IntEnum(type_name, [(value_name, ix + 1) for ix, value_name in enumerate(value_names)])
+            else:
+                enum_classes[type_name] = Enum(type_name, [(value_name, value_name) for value_name in value_names])
+    return enum_classes
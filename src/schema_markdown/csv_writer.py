@@ -0,0 +1,232 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+CSV and TSV encoding of struct arrays
+"""
+
+import csv
+from datetime import date, datetime, timezone
+from enum import Enum
+from uuid import UUID
+
+from .classes import SchemaStruct
+from .encode import JSONEncoder
+from .schema import ValidationError, get_struct_members
+
+
+class CSVWriter:
+    """
+    A streaming CSV (or TSV) writer of struct values. The columns are computed from the struct type - nested struct
+    and union members are flattened to columns with dotted member paths, the same as
+    :func:`~schema_markdown.encode_query_string` keys (e.g. "child.name"). Array, dict, object, any, and recursive
+    struct members are written as compact JSON. The row function is generated Python code with each column's formatter
+    computed from its member type. String, number, and bool cells are written with no type checks. Date, datetime,
+    UUID, and enum cells have one type check each, since their values depend on the validation options (e.g. an enum
+    value may be a string or an :class:`~enum.Enum` member).
+
+    Booleans are written as "true" or "false", datetimes, dates, and UUIDs are written as ISO format strings, enums are
+    written by name, and null or missing values are written as empty cells. Values are not validated - validate values
+    with :func:`~schema_markdown.validate_type` (dicts, struct class instances, or struct tuples) before writing.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The struct or union type name, or the name of a typedef of a struct array
+    :param fileobj: The text file-like object with a ``write`` method. Files should be opened with ``newline=''``.
+    :param str delimiter: The column delimiter - use ``"\\t"`` for TSV
+    :param fmtparams: The additional :func:`csv.writer` format parameters
+    :raises ValidationError: The type name is unknown or is not a struct array type
+    """
+
+    __slots__ = ('columns', 'writer', 'get_row')
+
+    def __init__(self, types, type_name, fileobj, delimiter=',', **fmtparams):
+        row_type = _get_row_type(types, type_name)
+        compiler = _CSVRowCompiler(types)
+        compiler.add_struct(row_type, (), 'v', (row_type,))
+        namespace = dict(_CSV_ROW_GLOBALS)
+        exec(compiler.get_code(), namespace) # pylint: disable=exec-used
+
+        #: The list of column header strings
+        self.columns = compiler.columns
+        self.writer = csv.writer(fileobj, delimiter=delimiter, **fmtparams)
+        self.get_row = namespace['get_row']
+
+    def writeheader(self):
+        """
+        Write the header row of column names
+        """
+
+        self.writer.writerow(self.columns)
+
+    def writerow(self, value):
+        """
+        Write a struct value's row
+
+        :param value: The struct value
+        :type value: dict or ~schema_markdown.SchemaStruct or tuple
+        :raises TypeError: A struct value is not a dict, struct class instance, or struct tuple
+        """
+
+        self.writer.writerow(self.get_row(value))
+
+    def writerows(self, values):
+        """
+        Write the rows of an iterable of struct values
+
+        :param values: The iterable of struct values
+        :returns: The number of rows written
+        :raises TypeError: A struct value is not a dict, struct class instance, or struct tuple
+        """
+
+        count = 0
+        get_row = self.get_row
+        writerow = self.writer.writerow
+        for value in values:
+            writerow(get_row(value))
+            count += 1
+        return count
+
+
+# Helper to get a row user type name - the type must be a struct or union, or a typedef of a struct array
+def _get_row_type(types, type_name):
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    type_ = {'user': type_name}
+    is_array = False
+    while True:
+        if 'array' in type_ and not is_array:
+            type_ = type_['array']['type']
+            is_array = True
+        elif 'user' in type_ and 'typedef' in types[type_['user']]:
+            type_ = types[type_['user']]['typedef']['type']
+        else:
+            break
+    user_type = types.get(type_.get('user'), {})
+    if 'struct' not in user_type:
+        raise ValidationError(f"Invalid CSV type {type_name!r}, expected struct or struct array type")
+    return type_['user']
+
+
+# CSV row code generator - the generated function returns a struct value's list of column values
+class _CSVRowCompiler:
+    __slots__ = ('types', 'columns', 'lines', 'exprs')
+
+    def __init__(self, types):
+        self.types = types
+        self.columns = []
+        self.lines = ['def get_row(v):']
+        self.exprs = []
+
+    # Get the generated row function's code
+    def get_code(self):
+        return '\n'.join(self.lines) + '\n    return [' + ', '.join(self.exprs) + ']\n'
+
+    # Add a struct's columns - struct_names is the tuple of flattened struct type names (to stop recursion)
+    def add_struct(self, type_name, path, value_name, struct_names):
+        members = list(get_struct_members(self.types, self.types[type_name]['struct']))
+        member_names = tuple(member['name'] for member in members)
+        self.lines.append(f'    if {value_name}.__class__ is not dict:')
+        self.lines.append(f'        {value_name} = _dict({value_name}, {member_names!r})')
+        for member in members:
+            member_name = member['name']
+            member_path = (*path, member_name)
+            member_type = member['type']
+            while 'user' in member_type and 'typedef' in self.types[member_type['user']]:
+                member_type = self.types[member_type['user']]['typedef']['type']
+
+            # Flattened struct (or union) member? Null or missing struct values are replaced with an empty dict.
+            member_type_name = member_type.get('user')
+            if member_type_name is not None and 'struct' in self.types[member_type_name] and member_type_name not in struct_names:
+                struct_value_name = f's{len(self.lines)}'
+                self.lines.append(f'    {struct_value_name} = {value_name}.get({member_name!r})')
+                self.add_struct(member_type_name, member_path, struct_value_name, (*struct_names, member_type_name))
+                continue
+
+            # Column value expression
+            if 'builtin' in member_type:
+                formatter = _BUILTIN_FORMATTERS[member_type['builtin']]
+            elif member_type_name is not None and 'enum' in self.types[member_type_name]:
+                formatter = '_enum'
+            else:
+                formatter = '_json'
+            member_expr = f'{value_name}.get({member_name!r})'
+            if formatter is not None:
+                member_expr = f'(None if (c := {member_expr}) is None else {formatter}(c))'
+            self.columns.append('.'.join(member_path))
+            self.exprs.append(member_expr)
+
+
+# Helper to get a non-dict struct value's dict - struct class instances and struct tuples are converted and null or
+# missing values are empty
+def _get_dict(value, member_names):
+    if value is None:
+        return _EMPTY_DICT
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, SchemaStruct):
+        return value._asdict() # pylint: disable=protected-access
+    if isinstance(value, tuple) and len(value) == len(member_names):
+        return dict(zip(member_names, value))
+    raise TypeError(f'Invalid struct value {value!r:.100s} (type {value.__class__.__name__!r})')
+
+
+# The empty dict of null or missing struct values
+_EMPTY_DICT = {}
+
+
+def _format_bool(value):
+    return 'true' if value else 'false'
+
+
+def _format_date(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _format_datetime(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+
+def _format_uuid(value):
+    if isinstance(value, (bytes, bytearray)):
+        return f'{UUID(bytes=bytes(value))}'
+    return f'{value}'
+
+
+def _format_enum(value):
+    return value.name if isinstance(value, Enum) else value
+
+
+def _format_json(value):
+    return _JSON_ENCODER.encode(value)
+
+
+# The compact JSON encoder of JSON columns
+_JSON_ENCODER = JSONEncoder(separators=(',', ':'))
+
+
+# Map of builtin type name to formatter function name - None means the csv writer's native formatting
+_BUILTIN_FORMATTERS = {
+    'any': '_json',
+    'bool': '_bool',
+    'date': '_date',
+    'datetime': '_datetime',
+    'float': None,
+    'int': None,
+    'object': '_json',
+    'string': None,
+    'uuid': '_uuid'
+}
+
+
+# The CSV row generated code's globals
+_CSV_ROW_GLOBALS = {
+    '_bool': _format_bool,
+    '_date': _format_date,
+    '_datetime': _format_datetime,
+    '_dict': _get_dict,
+    '_enum': _format_enum,
+    '_json': _format_json,
+    '_uuid': _format_uuid
+}
@@ -7,15 +7,24 @@ Encoding and decoding utilities
 
 from datetime import date, datetime, timezone
 from decimal import Decimal
+from enum import Enum
+from functools import partial
 import json
+from math import inf, isinf, isnan
 from urllib.parse import quote, unquote
 from uuid import UUID
 
+from .classes import SchemaStruct
+from .schema import ValidationError, _get_validate_options, _member_error, _validate_attr, _validate_dict_key, _validate_type, \
+    get_enum_values, get_struct_members
+
 
 class JSONEncoder(json.JSONEncoder):
     """
     A :class:`~json.JSONEncoder` sub-class with support for :class:`~datetime.datetime`, :class:`~datetime.date`,
-    :class:`~decimal.Decimal`, and :class:`~uuid.UUID` objects.
+    :class:`~decimal.Decimal`, :class:`~uuid.UUID`, :class:`~enum.Enum`, and :class:`~schema_markdown.SchemaStruct`
+    objects. :class:`~enum.Enum` members are encoded by name, except :class:`~enum.IntEnum` members, which the
+    :mod:`json` module encodes as integers (see :func:`~schema_markdown.get_enum_classes`).
     """
 
     __slots__ = ()
@@ -23,7 +32,8 @@ class JSONEncoder(json.JSONEncoder):
     def default(self, o):
         """
         The override of the :meth:`~json.JSONEncoder.default` method to add support for :class:`~datetime.datetime`,
-        :class:`~datetime.date`, :class:`~decimal.Decimal`, and :class:`~uuid.UUID` objects.
+        :class:`~datetime.date`, :class:`~decimal.Decimal`, :class:`~uuid.UUID`, :class:`~enum.Enum`, and
+        :class:`~schema_markdown.SchemaStruct` objects.
         """
 
         if isinstance(o, datetime):
@@ -34,9 +44,256 @@ class JSONEncoder(json.JSONEncoder):
             return float(o)
         if isinstance(o, UUID):
             return f'{o}'
+        if isinstance(o, Enum):
+            return o.name
+        if isinstance(o, SchemaStruct):
+            return o._asdict() # pylint: disable=protected-access
         return json.JSONEncoder.default(self, o)
 
 
+class StructTupleJSONEncoder(JSONEncoder):
+    """
+    A :class:`~schema_markdown.JSONEncoder` sub-class that encodes the struct tuples of a type (see
+    :func:`~schema_markdown.get_struct_tuples`) as JSON objects. None struct tuple members are omitted unless the
+    member is nullable.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name of encoded values
+    :param kwargs: The :class:`~json.JSONEncoder` arguments
+    :raises ValidationError: The type name is unknown
+    """
+
+    __slots__ = ('_convert',)
+
+    def __init__(self, types, type_name, **kwargs):
+        if type_name not in types:
+            raise ValidationError(f"Unknown type {type_name!r}")
+        super().__init__(**kwargs)
+        self._convert = _get_struct_tuple_converter(types, {'user': type_name}, {})
+
+    def iterencode(self, o, _one_shot=False):
+        return super().iterencode(o if self._convert is None else self._convert(o), _one_shot)
+
+
+# Helper function to get a type's struct tuple to dict conversion function - None if no conversion is necessary
+def _get_struct_tuple_converter(types, type_, converters):
+    # Array?
+    if 'array' in type_:
+        convert_value = _get_struct_tuple_converter(types, type_['array']['type'], converters)
+        if convert_value is None:
+            return None
+        return lambda value: [None if array_value is None else convert_value(array_value) for array_value in value]
+
+    # Dict?
+    if 'dict' in type_:
+        convert_value = _get_struct_tuple_converter(types, type_['dict']['type'], converters)
+        if convert_value is None:
+            return None
+        return lambda value: {
+            dict_key: None if dict_value is None else convert_value(dict_value) for dict_key, dict_value in value.items()
+        }
+
+    # Typedef or struct?
+    if 'user' in type_:
+        type_name = type_['user']
+        user_type = types[type_name]
+        if 'typedef' in user_type:
+            return _get_struct_tuple_converter(types, user_type['typedef']['type'], converters)
+        if 'struct' in user_type:
+
+            # Struct converter already created? If not, the struct is recursive - lookup the converter when called
+            if type_name in converters:
+                existing_converter = converters[type_name]
+                if existing_converter is None:
+                    def convert_recursive(value):
+                        return converters[type_name](value)
+                    return convert_recursive
+                return existing_converter
+
+            # Create the struct converter
+            converters[type_name] = None
+            members = [
+                (
+                    member['name'],
+                    _get_struct_tuple_converter(types, member['type'], converters),
+                    'attr' in member and member['attr'].get('nullable', False)
+                )
+                for member in get_struct_members(types, user_type['struct'])
+            ]
+
+            def convert_struct(value):
+                struct_dict = {}
+                for (member_name, convert_member, member_nullable), member_value in zip(members, value):
+                    if member_value is not None:
+                        struct_dict[member_name] = member_value if convert_member is None else convert_member(member_value)
+                    elif member_nullable:
+                        struct_dict[member_name] = None
+                return struct_dict
+
+            converters[type_name] = convert_struct
+            return convert_struct
+
+    # Built-in or enum
+    return None
+
+
+def get_json_serializer(types, type_name):
+    """
+    Compile a JSON serializer function for the validated values of a type (see :func:`~schema_markdown.validate_type`).
+    The serializer is generated Python code that knows each member's type, so it writes compact JSON text directly,
+    with no per-value type checks and no :meth:`~json.JSONEncoder.default` callbacks. The output is the same as
+    :class:`~schema_markdown.JSONEncoder` with compact separators. Values must be validated without the
+    ``struct_classes`` and ``enum_classes`` options and without the "bytes" UUID format.
+
+    >>> types = schema_markdown.parse_schema_markdown('struct MyStruct\\n    int a\\n    optional date b')
+    >>> serialize = schema_markdown.get_json_serializer(types, 'MyStruct')
+    >>> serialize(schema_markdown.validate_type(types, 'MyStruct', {'b': '2020-06-17', 'a': 1}))
+    '{"a":1,"b":"2020-06-17"}'
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name of serialized values
+    :returns: The serializer function that returns a value's JSON text
+    :raises ValidationError: The type name is unknown
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    compiler = _JSONSerializerCompiler(types)
+    value_expr = compiler.get_expr({'user': type_name}, None, 'value', 0)
+    compiler.lines.append(f'def serialize(value):\n    return {value_expr}\n')
+    namespace = dict(_JSON_SERIALIZER_GLOBALS)
+    exec('\n'.join(compiler.lines), namespace) # pylint: disable=exec-used
+    return namespace['serialize']
+
+
+# Helper to serialize a datetime
+def _serialize_datetime(value):
+    return '"' + (value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)).isoformat() + '"'
+
+
+# Helper to serialize a non-finite float, the same as JSONEncoder
+def _serialize_float_nonfinite(value):
+    if isnan(value):
+        return 'NaN'
+    return 'Infinity' if value > 0 else '-Infinity'
+
+
+# The JSON serializer generated code's globals
+_JSON_SERIALIZER_GLOBALS = {
+    '_datetime': _serialize_datetime,
+    '_dumps': JSONEncoder(separators=(',', ':')).encode,
+    '_esc': json.encoder.encode_basestring_ascii,
+    '_float': _serialize_float_nonfinite,
+    '_inf': inf
+}
+
+
+# JSON serializer code generator - the expressions of the generated code are Python expressions of a value's JSON text
+class _JSONSerializerCompiler:
+    __slots__ = ('types', 'lines', 'struct_functions')
+
+    def __init__(self, types):
+        self.types = types
+        self.lines = []
+        self.struct_functions = {}
+
+    # Get the JSON text expression of a value expression - the value expression may be evaluated more than once
+    def get_expr(self, type_, attr, value_expr, depth):
+        if attr is not None and attr.get('nullable', False):
+            return f"('null' if {value_expr} is None else {self.get_expr(type_, None, value_expr, depth)})"
+
+        # Built-in?
+        if 'builtin' in type_:
+            builtin = type_['builtin']
+            if builtin == 'string':
+                return f'_esc({value_expr})'
+            if builtin == 'int':
+                return f'repr({value_expr})'
+            if builtin == 'float':
+                return f'(repr({value_expr}) if -_inf < {value_expr} < _inf else _float({value_expr}))'
+            if builtin == 'bool':
+                return f"('true' if {value_expr} else 'false')"
+            if builtin == 'date':
+                return f"""'"' + {value_expr}.isoformat() + '"'"""
+            if builtin == 'datetime':
+                return f'_datetime({value_expr})'
+            if builtin == 'uuid':
+                return f"""'"' + str({value_expr}) + '"'"""
+            return f'_dumps({value_expr})'
+
+        # Array?
+        if 'array' in type_:
+            array = type_['array']
+            item_expr = self.get_expr(array['type'], array.get('attr'), f'a{depth}', depth + 1)
+            return f"""('[' + ','.join([{item_expr} for a{depth} in {value_expr}]) + ']')"""
+
+        # Dict?
+        if 'dict' in type_:
+            dict_ = type_['dict']
+            if 'keyAttr' in dict_ and dict_['keyAttr'].get('nullable', False):
+                key_expr = f"""('"null"' if k{depth} is None else _esc(k{depth}))"""
+            else:
+                key_expr = f'_esc(k{depth})'
+            item_expr = self.get_expr(dict_['type'], dict_.get('attr'), f'd{depth}', depth + 1)
+            return f"""('{{' + ','.join([{key_expr} + ':' + {item_expr} for k{depth}, d{depth} in {value_expr}.items()]) + '}}')"""
+
+        # User type
+        user_type = self.types[type_['user']]
+        if 'typedef' in user_type:
+            typedef = user_type['typedef']
+            return self.get_expr(typedef['type'], typedef.get('attr'), value_expr, depth)
+        if 'enum' in user_type:
+            return f'_esc({value_expr})'
+        return f'{self.get_struct_function(type_["user"])}({value_expr})'
+
+    # Get a struct's serializer function name - the function is generated, if necessary
+    def get_struct_function(self, type_name):
+        function_name = self.struct_functions.get(type_name)
+        if function_name is None:
+            function_name = f'_struct{len(self.struct_functions)}'
+            self.struct_functions[type_name] = function_name
+
+            # Required member expressions are concatenated - optional member expressions are conditionally appended
+            struct = self.types[type_name]['struct']
+            is_union = struct.get('union', False)
+            body = []
+            required_exprs = []
+            for member in get_struct_members(self.types, struct):
+                member_name = member['name']
+                member_expr = f"{json.encoder.encode_basestring_ascii(member_name) + ':'!r} + " + \
+                    self.get_expr(member['type'], member.get('attr'), f'v[{member_name!r}]', 0)
+                if not is_union and not member.get('optional', False):
+                    required_exprs.append(member_expr)
+                else:
+                    if required_exprs:
+                        body.append(f'    p.append({_join_exprs(required_exprs)})')
+                        required_exprs = []
+                    body.append(f'    if {member_name!r} in v:')
+                    body.append(f'        p.append({member_expr})')
+
+            # Generate the struct serializer function
+            lines = [f'def {function_name}(v):']
+            if not body:
+                if required_exprs:
+                    lines.append(f"""    return '{{' + {_join_exprs(required_exprs)} + '}}'""")
+                else:
+                    lines.append("    return '{}'")
+            else:
+                lines.append('    p = []')
+                lines.extend(body)
+                if required_exprs:
+                    lines.append(f'    p.append({_join_exprs(required_exprs)})')
+                lines.append("    return '{' + ','.join(p) + '}'")
+            self.lines.append('\n'.join(lines) + '\n')
+
+        return function_name
+
+
+# Helper to join JSON text expressions with commas
+def _join_exprs(exprs):
+    return " + ',' + ".join(exprs)
+
+
 def encode_query_string(obj, encoding='utf-8'):
     """
     Encode an object as a query string. Dictionaries, lists, and tuples are recursed. Each member key is expressed in
@@ -54,6 +311,8 @@ def encode_query_string(obj, encoding='utf-8'):
 
 
 def _encode_query_string_items(obj, parent, encoding):
+    if isinstance(obj, SchemaStruct):
+        obj = obj._asdict() # pylint: disable=protected-access
     if isinstance(obj, dict):
         if obj:
             for member, value in sorted(obj.items()):
@@ -70,7 +329,9 @@ def _encode_query_string_items(obj, parent, encoding):
         elif parent:
             yield parent, ''
     else:
-        if isinstance(obj, bool):
+        if isinstance(obj, Enum):
+            yield parent, quote(obj.name, encoding=encoding)
+        elif isinstance(obj, bool):
             yield parent, 'true' if obj else 'false' # quote safe
         elif isinstance(obj, int):
             yield parent, f'{obj}' # quote safe
@@ -88,7 +349,180 @@ def _encode_query_string_items(obj, parent, encoding):
             yield parent, quote(f'{obj}', encoding=encoding)
 
 
-def decode_query_string(query_string, encoding='utf-8'):
+def get_query_string_encoder(types, type_name, encoding='utf-8'):
+    """
+    Compile a query string encoder function for the validated values of a type (see
+    :func:`~schema_markdown.validate_type`). The encoder is generated Python code that knows each member's type - struct
+    members are encoded in a precomputed order with pre-quoted keys, and int, bool, date, and UUID values are not
+    quoted. The output is the same as :func:`~schema_markdown.encode_query_string`. Values must be validated without the
+    ``struct_classes`` and ``enum_classes`` options and without the "bytes" UUID format.
+
+    >>> types = schema_markdown.parse_schema_markdown('struct MyStruct\\n    int a\\n    optional date b\\n    optional string[] c')
+    >>> encode = schema_markdown.get_query_string_encoder(types, 'MyStruct')
+    >>> encode(schema_markdown.validate_type(types, 'MyStruct', {'c': ['x y'], 'b': '2020-06-17', 'a': 1}))
+    'a=1&b=2020-06-17&c.0=x%20y'
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name of encoded values
+    :param str encoding: The query string encoding
+    :returns: The encoder function that returns a value's query string
+    :raises ValidationError: The type name is unknown
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    compiler = _QueryStringEncoderCompiler(types, encoding)
+    value_statement = compiler.get_statement({'user': type_name}, None, 'value', (None, ''), 1)
+    compiler.lines.append(f"def encode(value):\n    p = []\n    {value_statement}\n    return '&'.join(p)\n")
+    namespace = {
+        '_datetime': _encode_query_string_datetime,
+        '_items': _encode_query_string_items,
+        '_quote': partial(quote, encoding=encoding),
+        **compiler.enums
+    }
+    exec('\n'.join(compiler.lines), namespace) # pylint: disable=exec-used
+    return namespace['encode']
+
+
+# Helper to encode a query string datetime value
+def _encode_query_string_datetime(value):
+    value_text = (value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value_text.replace(':', '%3A').replace('+', '%2B')
+
+
+# Query string encoder code generator - the generated statements append "key=value" strings to the list "p". A key is
+# a tuple of the key's prefix expression (None for the root value) and the key's static suffix text.
+class _QueryStringEncoderCompiler:
+    __slots__ = ('types', 'encoding', 'lines', 'enums', 'enum_names', 'functions')
+
+    def __init__(self, types, encoding):
+        self.types = types
+        self.encoding = encoding
+        self.lines = []
+        self.enums = {}
+        self.enum_names = {}
+        self.functions = {}
+
+    # Get the statement that encodes a value expression - the value expression may be evaluated more than once
+    def get_statement(self, type_, attr, value_expr, key, depth):
+        key_prefix, key_suffix = key
+        is_root = key_prefix is None and key_suffix == ''
+
+        # Nullable?
+        if attr is not None and attr.get('nullable', False):
+            null_statement = "p.append('null')" if is_root else f"p.append({_key_expr(key, '=null')})"
+            statement = self.get_statement(type_, None, value_expr, key, depth + 1)
+            return f'if {value_expr} is None:\n{_indent(depth + 1)}{null_statement}\n{_indent(depth)}else:\n' \
+                f'{_indent(depth + 1)}{statement}'
+
+        # Typedef?
+        user_type = self.types[type_['user']] if 'user' in type_ else None
+        if user_type is not None and 'typedef' in user_type:
+            typedef = user_type['typedef']
+            return self.get_statement(typedef['type'], typedef.get('attr'), value_expr, key, depth)
+
+        # Container?
+        if 'array' in type_ or 'dict' in type_ or (user_type is not None and 'struct' in user_type):
+            return f"{self.get_function(type_)}(p, {value_expr}, {_key_expr(key, '.') if not is_root else repr('')})"
+
+        # Any?
+        if type_.get('builtin') in ('any', 'object'):
+            parent_expr = 'None' if is_root else _key_expr(key, '')
+            return f"p.extend(v if k is None else k + '=' + v for k, v in _items({value_expr}, {parent_expr}, " \
+                f'{self.encoding!r}))'
+
+        # Scalar value - the root scalar value has no key
+        value_text_expr = self.get_scalar_expr(type_, value_expr)
+        if is_root:
+            return f'p.append({value_text_expr})'
+        return f"p.append({_key_expr(key, '=')} + {value_text_expr})"
+
+    # Get the query string text expression of a scalar value expression
+    def get_scalar_expr(self, type_, value_expr):
+        if 'builtin' in type_:
+            builtin = type_['builtin']
+            if builtin in ('int', 'uuid'):
+                return f'str({value_expr})'
+            if builtin == 'bool':
+                return f"('true' if {value_expr} else 'false')"
+            if builtin == 'date':
+                return f'{value_expr}.isoformat()'
+            if builtin == 'datetime':
+                return f'_datetime({value_expr})'
+            return f'_quote(str({value_expr}))'
+
+        # Enum - the enum values are pre-quoted
+        enum_type_name = type_['user']
+        enum_name = self.enum_names.get(enum_type_name)
+        if enum_name is None:
+            enum_name = self.enum_names[enum_type_name] = f'_enum{len(self.enums)}'
+            self.enums[enum_name] = {
+                enum_value['name']: quote(enum_value['name'], encoding=self.encoding)
+                for enum_value in get_enum_values(self.types, self.types[enum_type_name]['enum'])
+            }
+        return f'{enum_name}[{value_expr}]'
+
+    # Get a container type's encoder function name - the function is generated, if necessary. The function's key
+    # prefix argument, "k", is the parent key with a trailing "." (or '' for the root value).
+    def get_function(self, type_):
+        type_key = json.dumps(type_, sort_keys=True)
+        function_name = self.functions.get(type_key)
+        if function_name is not None:
+            return function_name
+        function_name = self.functions[type_key] = f'_encode{len(self.functions)}'
+        lines = [f'def {function_name}(p, v, k):']
+
+        # Array?
+        if 'array' in type_:
+            array = type_['array']
+            item_statement = self.get_statement(array['type'], array.get('attr'), 'x', ('k + str(i)', ''), 3)
+            lines.append('    if v:')
+            lines.append('        for i, x in enumerate(v):')
+            lines.append(f'            {item_statement}')
+            lines.append('    elif k:')
+            lines.append("        p.append(k[:-1] + '=')")
+
+        # Dict?
+        elif 'dict' in type_:
+            dict_ = type_['dict']
+            item_statement = self.get_statement(dict_['type'], dict_.get('attr'), 'x', ('k + _quote(str(d))', ''), 3)
+            lines.append('    if v:')
+            lines.append('        for d, x in sorted(v.items()):')
+            lines.append(f'            {item_statement}')
+            lines.append('    elif k:')
+            lines.append("        p.append(k[:-1] + '=')")
+
+        # Struct - the members are encoded in sorted order with pre-quoted keys
+        else:
+            struct = self.types[type_['user']]['struct']
+            lines.append('    n = len(p)')
+            for member in sorted(get_struct_members(self.types, struct), key=lambda member: member['name']):
+                member_name = member['name']
+                member_key = ('k', quote(member_name, encoding=self.encoding))
+                member_statement = self.get_statement(member['type'], member.get('attr'), f'v[{member_name!r}]', member_key, 2)
+                lines.append(f'    if {member_name!r} in v:')
+                lines.append(f'        {member_statement}')
+            lines.append('    if k and len(p) == n:')
+            lines.append("        p.append(k[:-1] + '=')")
+
+        self.lines.append('\n'.join(lines) + '\n')
+        return function_name
+
+
+# Helper to get a query string encoder key expression with the suffix text appended - the root key has no expression
+def _key_expr(key, suffix):
+    key_prefix, key_suffix = key
+    if key_suffix + suffix == '':
+        return key_prefix
+    return f'{key_prefix} + {key_suffix + suffix!r}'
+
+
+# Helper to get a generated code indent
+def _indent(depth):
+    return '    ' * depth
+
+
+def decode_query_string(query_string, encoding='utf-8', max_pairs=None, max_depth=None, max_key_length=None, max_array_length=None):
     """
     Decode an object from a query string. Each member key of the query string is expressed in fully-qualified
     form. List keys are the index into the list, must be in order. For example:
@@ -96,69 +530,830 @@ def decode_query_string(query_string, encoding='utf-8'):
     >>> schema_markdown.decode_query_string('a=5&b=3.14&c.d=foo&c.e.0=1&c.e.1=2&c.e.2=3&f.0.g=true&f.1.g=false')
     {'a': '5', 'b': '3.14', 'c': {'d': 'foo', 'e': ['1', '2', '3']}, 'f': [{'g': 'true'}, {'g': 'false'}]}
 
-    :param str query_string: The query string
+    The optional limits are checked as the query string is scanned, before keys are unquoted and before arrays grow
+    beyond the limit, so hostile query strings are rejected before large objects are built.
+
+    :param query_string: The query string - bytes-like query strings (e.g. a WSGI ``QUERY_STRING`` encoded as latin-1)
+        are accepted as-is, without decoding them to text first
+    :type query_string: str or bytes or bytearray or memoryview
     :param str encoding: The query string encoding
+    :param max_pairs: The optional maximum number of key/value pairs
+    :type max_pairs: int or None
+    :param max_depth: The optional maximum key depth (the number of dot-separated key segments)
+    :type max_depth: int or None
+    :param max_key_length: The optional maximum length of a key, before unquoting
+    :type max_key_length: int or None
+    :param max_array_length: The optional maximum total length of all arrays
+    :type max_array_length: int or None
     :returns: The decoded object
-    :raises ValueError: Query string is invalid
-    """
-
-    # Build the object
-    result = [None]
-    key_values = query_string.split('&')
-    for ix_key_value, key_value in enumerate(key_values):
-        # Split the key/value string
-        try:
-            key_str, value_str = key_value.split('=', 1)
-            value = unquote(value_str, encoding=encoding)
-        except ValueError:
-            # Ignore hash IDs
-            if ix_key_value == len(key_values) - 1:
+    :raises ValueError: Query string is invalid or exceeds a limit
+    """
+
+    decoder = QueryStringDecoder(
+        encoding=encoding, max_pairs=max_pairs, max_depth=max_depth, max_key_length=max_key_length,
+        max_array_length=max_array_length, max_cache_size=0
+    )
+    return decoder.decode(query_string)
+
+
+# Helper to decode a bytes-like query string - percent-encoded query strings are ASCII, so this is usually a copy.
+# Otherwise, the raw bytes are decoded with the query string encoding.
+def _decode_query_string_bytes(query_string, encoding):
+    try:
+        return str(query_string, 'ascii')
+    except UnicodeDecodeError:
+        return str(query_string, encoding, 'replace')
+
+
+# Helper to split a query string's key/value pairs - raises ValueError if there are more than max_pairs pairs
+def _split_key_values(query_string, max_pairs):
+    if max_pairs is None:
+        return query_string.split('&')
+
+    # Split no more than max_pairs + 1 items - a trailing hash ID is not a key/value pair
+    key_values = query_string.split('&', max_pairs)
+    if len(key_values) > max_pairs and ('&' in key_values[-1] or '=' in key_values[-1]):
+        raise ValueError(f"Query string exceeds the maximum of {max_pairs} key/value pairs")
+    return key_values
+
+
+# Helper to check a query string key's depth and length limits
+def _check_key_limits(key_str, max_depth, max_key_length):
+    if max_key_length is not None and len(key_str) > max_key_length:
+        raise ValueError(f"Key {key_str!r:.100s} exceeds the maximum key length of {max_key_length}")
+    if max_depth is not None and key_str.count('.') >= max_depth:
+        raise ValueError(f"Key {key_str!r:.100s} exceeds the maximum key depth of {max_depth}")
+
+
+def decode_query_string_typed(types, type_name, query_string, encoding='utf-8', struct_classes=None, intern_strings=False,
+                              enum_classes=None, uuid_format=None, max_pairs=None, max_depth=None, max_key_length=None,
+                              max_array_length=None):
+    """
+    Decode and type-validate an object from a query string in a single pass. Each key is resolved against the type as
+    it is decoded - values are converted to their member types as they are decoded and unknown keys are rejected
+    immediately. The result is the same as :func:`~schema_markdown.validate_type` of the
+    :func:`~schema_markdown.decode_query_string` object, except that dict keys may be array indices (e.g. "a.0"). For
+    example:
+
+    >>> types = schema_markdown.parse_schema_markdown('struct MyStruct\\n    int a\\n    optional bool[] b')
+    >>> schema_markdown.decode_query_string_typed(types, 'MyStruct', 'a=5&b.0=true&b.1=false')
+    {'a': 5, 'b': [True, False]}
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name
+    :param query_string: The query string (see :func:`~schema_markdown.decode_query_string`)
+    :type query_string: str or bytes or bytearray or memoryview
+    :param str encoding: The query string encoding
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :param max_pairs: The optional maximum number of key/value pairs
+    :type max_pairs: int or None
+    :param max_depth: The optional maximum key depth (the number of dot-separated key segments)
+    :type max_depth: int or None
+    :param max_key_length: The optional maximum length of a key, before unquoting
+    :type max_key_length: int or None
+    :param max_array_length: The optional maximum total length of all arrays
+    :type max_array_length: int or None
+    :returns: The validated, transformed value object
+    :raises ValueError: Query string is invalid or exceeds a limit
+    :raises ValidationError: A validation error occurred
+    """
+
+    decoder = QueryStringDecoder(
+        types, type_name, encoding=encoding, struct_classes=struct_classes, intern_strings=intern_strings,
+        enum_classes=enum_classes, uuid_format=uuid_format, max_pairs=max_pairs, max_depth=max_depth,
+        max_key_length=max_key_length, max_array_length=max_array_length, max_cache_size=0
+    )
+    return decoder.decode(query_string)
+
+
+def decode_query_string_columns(types, type_name, query_strings, encoding='utf-8', struct_classes=None, intern_strings=False,
+                                enum_classes=None, uuid_format=None, max_pairs=None, max_depth=None, max_key_length=None,
+                                max_array_length=None):
+    """
+    Decode and type-validate many query strings of a struct type into columns. The result is a dict of member path to
+    the list of the member's values, in query string order. Nested struct members are flattened to columns with dotted
+    member paths (e.g. "child.name"), the same as :class:`~schema_markdown.CSVWriter`. Union, array, dict, object,
+    any, and recursive struct members are single columns of validated values. Null or missing values are None.
+
+    Each query string's keys are resolved directly to their columns, so no per-query-string objects are built and
+    transposed. The values are the same as :func:`~schema_markdown.validate_type` of the
+    :func:`~schema_markdown.decode_query_string` objects. For example:
+
+    >>> types = schema_markdown.parse_schema_markdown('struct S\\n    int a\\n    optional C c\\n\\nstruct C\\n    bool b')
+    >>> schema_markdown.decode_query_string_columns(types, 'S', ['a=1&c.b=true', 'a=2'])
+    {'a': [1, 2], 'c.b': [True, None]}
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The struct type name
+    :param query_strings: The iterable of query strings - :class:`str` or bytes-like (see
+        :func:`~schema_markdown.decode_query_string`)
+    :param str encoding: The query string encoding
+    :param dict struct_classes: The optional map of struct type name to struct class of column values (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :param max_pairs: The optional maximum number of key/value pairs of a query string
+    :type max_pairs: int or None
+    :param max_depth: The optional maximum key depth (the number of dot-separated key segments)
+    :type max_depth: int or None
+    :param max_key_length: The optional maximum length of a key, before unquoting
+    :type max_key_length: int or None
+    :param max_array_length: The optional maximum total length of a column value's arrays
+    :type max_array_length: int or None
+    :returns: The dict of member path to list of member values
+    :raises ValueError: A query string is invalid or exceeds a limit
+    :raises ValidationError: The type is not a struct type or a validation error occurred
+    """
+
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    decoder = _QueryStringColumnsDecoder(types, type_name, options, encoding, max_depth, max_key_length, max_array_length)
+    column_values = [[] for _ in decoder.columns]
+    for query_string in query_strings:
+        for values, value in zip(column_values, decoder.decode(query_string, max_pairs)):
+            values.append(value)
+    return {column[0]: values for column, values in zip(decoder.columns, column_values)}
+
+
+# Columnar query string decoder - struct members are flattened to columns and key strings are resolved to their
+# columns once.
+#
+# Columns are (name, type, attr, convert, path, is_value) tuples - value columns are decoded and validated as values.
+# Structs are (member_fqn, type, required_members, is_nullable) tuples - required members are (name, is_struct, index)
+# tuples. Key resolutions are (kind, index, ancestor struct indexes) tuples, where kind is "column", "value" (a key
+# within a value column), or "struct".
+class _QueryStringColumnsDecoder:
+    __slots__ = ('types', 'options', 'encoding', 'max_depth', 'max_key_length', 'value_decoder', 'columns', 'structs',
+                 'members', 'keys')
+
+    def __init__(self, types, type_name, options, encoding, max_depth, max_key_length, max_array_length):
+        if type_name not in types:
+            raise ValidationError(f"Unknown type {type_name!r}")
+        root_type = {'user': type_name}
+        root_type_name = _get_columns_struct_name(types, root_type, ())
+        if root_type_name is None:
+            raise ValidationError(f"Invalid columns type {type_name!r}, expected struct type")
+        self.types = types
+        self.options = options
+        self.encoding = encoding
+        self.max_depth = max_depth
+        self.max_key_length = max_key_length
+        self.value_decoder = QueryStringDecoder(encoding=encoding, max_array_length=max_array_length)
+        self.columns = []
+        self.structs = []
+        self.members = []
+        self.keys = {}
+        self.add_struct(root_type_name, root_type, (), False, (root_type_name,))
+
+    # Add a struct's columns - struct_names is the tuple of flattened struct type names (to stop recursion)
+    def add_struct(self, type_name, type_, path, is_nullable, struct_names):
+        struct_index = len(self.structs)
+        self.structs.append(None)
+        self.members.append(None)
+        members = {}
+        required_members = []
+        for member in get_struct_members(self.types, self.types[type_name]['struct']):
+            member_name = member['name']
+            member_path = (*path, member_name)
+            member_type = member['type']
+            member_attr = member.get('attr')
+
+            # Flattened struct member?
+            member_type_name = _get_columns_struct_name(self.types, member_type, struct_names)
+            if member_type_name is not None:
+                member_is_nullable = _is_columns_nullable(self.types, member_type, member_attr)
+                member_struct_names = (*struct_names, member_type_name)
+                member_index = self.add_struct(member_type_name, member_type, member_path, member_is_nullable, member_struct_names)
+                members[member_name] = (True, member_index)
+                if not member.get('optional', False):
+                    required_members.append((member_name, True, member_index))
                 continue
-            raise ValueError(f"Invalid key/value pair {key_value!r:.100s}")
 
-        # Find/create the object on which to set the value
-        parent = result
-        key_parent = 0
-        for key in (unquote(key, encoding=encoding) for key in key_str.split('.')):
-            obj = parent[key_parent]
+            # Column
+            member_index = len(self.columns)
+            _, _, convert = _get_typed_member(member_type, member_attr, self.options)
+            is_value = _get_typed_step(self.types, member_type, self.options)[0] != 'scalar'
+            self.columns.append(('.'.join(member_path), member_type, member_attr, convert, member_path, is_value))
+            members[member_name] = (False, member_index)
+            if not member.get('optional', False):
+                required_members.append((member_name, False, member_index))
 
-            # Array key?  First "key" of an array must start with "0".
-            if isinstance(obj, list) or (obj is None and key == '0'):
+        self.structs[struct_index] = ('.'.join(path) if path else None, type_, required_members, is_nullable)
+        self.members[struct_index] = members
+        return struct_index
 
-                # Create this key's container, if necessary
-                if obj is None:
-                    obj = parent[key_parent] = []
+    # Resolve a key string to its column or struct - the key limits are checked before the key is cached
+    def get_key(self, key_str):
+        _check_key_limits(key_str, self.max_depth, self.max_key_length)
+        struct_index = 0
+        ancestors = []
+        key_segments = key_str.split('.')
+        # The last key segment always breaks
+        for ix_key, key in enumerate(key_segments): # pragma: no branch
+            if '%' in key:
+                key = unquote(key, encoding=self.encoding)
+            member = self.members[struct_index].get(key)
+            if member is None:
+                member_fqn = '.'.join(unquote(key, encoding=self.encoding) for key in key_segments[:ix_key + 1])
+                raise ValidationError(f"Unknown member {member_fqn!r:.100s}")
+            is_struct, member_index = member
+            is_last = ix_key == len(key_segments) - 1
 
-                # Parse the key as an integer
-                try:
-                    key = int(key)
-                except:
-                    raise ValueError(f"Invalid array index {key!r:.100s} in key {key_str!r:.100s}")
+            # Flattened struct member?
+            if is_struct:
+                if is_last:
+                    key_resolution = ('struct', member_index, tuple(ancestors))
+                    break
+                struct_index = member_index
+                ancestors.append(member_index)
+                continue
+
+            # Column member
+            if is_last:
+                key_resolution = ('column', member_index, tuple(ancestors))
+            elif self.columns[member_index][5]:
+                key_resolution = ('value', member_index, tuple(ancestors))
+            else:
+                member_fqn = '.'.join(unquote(key, encoding=self.encoding) for key in key_segments)
+                raise ValidationError(f"Unknown member {member_fqn!r:.100s}")
+            break
 
-                # Append the value placeholder None
-                if key == len(obj):
-                    obj.append(None)
-                elif key < 0 or key > len(obj):
-                    raise ValueError(f"Invalid array index {key} in key {key_str!r:.100s}")
+        # Cache the key resolution - the cache is cleared when full
+        if len(self.keys) >= _COLUMNS_KEY_CACHE_SIZE:
+            self.keys.clear()
+        self.keys[key_str] = key_resolution
+        return key_resolution
 
-            # Dictionary key
+    # Decode and validate a query string's list of column values
+    def decode(self, query_string, max_pairs):
+        if not isinstance(query_string, str):
+            query_string = _decode_query_string_bytes(query_string, self.encoding)
+        types = self.types
+        options = self.options
+        encoding = self.encoding
+        columns = self.columns
+        keys = self.keys
+        values = [_UNSET] * len(columns)
+        value_key_values = None
+
+        # The struct states - 0 is missing, 1 is present, 2 is null, and 3 is empty (e.g. "a=")
+        struct_states = bytearray(len(self.structs))
+        struct_states[0] = 1
+
+        key_values = _split_key_values(query_string, max_pairs)
+        for ix_key_value, key_value in enumerate(key_values):
+            # Split the key/value string
+            try:
+                key_str, value_str = key_value.split('=', 1)
+            except ValueError:
+                # Ignore hash IDs
+                if ix_key_value == len(key_values) - 1:
+                    continue
+                raise ValueError(f"Invalid key/value pair {key_value!r:.100s}")
+            key_resolution = keys.get(key_str)
+            if key_resolution is None:
+                key_resolution = self.get_key(key_str)
+            kind, index, ancestors = key_resolution
+
+            # Mark the ancestor structs present
+            for struct_index in ancestors:
+                if struct_states[struct_index] > 1:
+                    raise ValueError(f"Duplicate key {key_str!r:.100s}")
+                struct_states[struct_index] = 1
+
+            # Column value?
+            if kind == 'column':
+                if values[index] is not _UNSET:
+                    raise ValueError(f"Duplicate key {key_str!r:.100s}")
+                _, type_, attr, convert, _, _ = columns[index]
+                value = unquote(value_str, encoding=encoding) if '%' in value_str else value_str
+                if attr is not None and value == 'null' and attr.get('nullable', False):
+                    value = None
+                else:
+                    member_fqn = columns[index][0]
+                    if convert is _VALIDATE:
+                        value = _validate_type(types, type_, value, member_fqn, options)
+                    elif convert is not None:
+                        try:
+                            value = convert(value)
+                        except (ValueError, KeyError):
+                            raise _member_error(type_, value, member_fqn) from None
+                    if attr is not None:
+                        _validate_attr(type_, attr, value, member_fqn)
+                values[index] = value
+
+            # Key within a value column? The value column's key/values are decoded after all keys are seen.
+            elif kind == 'value':
+                if value_key_values is None:
+                    value_key_values = {}
+                value_key_values.setdefault(index, []).append(key_value)
+
+            # Null or empty struct
             else:
+                if struct_states[index] != 0:
+                    raise ValueError(f"Duplicate key {key_str!r:.100s}")
+                struct_fqn, struct_type, _, is_nullable = self.structs[index]
+                value = unquote(value_str, encoding=encoding)
+                if value == 'null' and is_nullable:
+                    struct_states[index] = 2
+                elif value == '':
+                    struct_states[index] = 3
+                else:
+                    raise _member_error(struct_type, value, struct_fqn)
+
+        # Decode and validate the value columns
+        if value_key_values is not None:
+            for index, column_key_values in value_key_values.items():
+                column_name, type_, attr, _, path, _ = columns[index]
+                if values[index] is not _UNSET:
+                    raise ValueError(f"Duplicate key {column_key_values[0].split('=', 1)[0]!r:.100s}")
+
+                # A key within a string value (e.g. "a.0=&a.0.b=1") fails the untyped decode with an attribute error
+                try:
+                    value = self.value_decoder.decode('&'.join(column_key_values))
+                except AttributeError:
+                    raise ValueError(f"Duplicate key {column_key_values[0].split('=', 1)[0]!r:.100s}") from None
+                for key in path:
+                    value = value[key]
+                value = _validate_type(types, type_, value, column_name, options)
+                if attr is not None:
+                    _validate_attr(type_, attr, value, column_name)
+                values[index] = value
+
+        # Check for missing required members of present structs
+        for struct_index, struct_state in enumerate(struct_states):
+            if struct_state in (1, 3):
+                struct_fqn, _, required_members, _ = self.structs[struct_index]
+                for member_name, is_struct, index in required_members:
+                    if (struct_states[index] == 0) if is_struct else (values[index] is _UNSET):
+                        member_fqn = member_name if struct_fqn is None else f'{struct_fqn}.{member_name}'
+                        raise ValidationError(f"Required member {member_fqn!r} missing")
+
+        return [None if value is _UNSET else value for value in values]
+
+
+# The maximum number of cached columnar query string key resolutions
+_COLUMNS_KEY_CACHE_SIZE = 1024
+
+
+# Helper to determine if a flattened columns struct member is nullable - the member or any of its typedefs may be
+# nullable
+def _is_columns_nullable(types, type_, attr):
+    while True:
+        if attr is not None and attr.get('nullable', False):
+            return True
+        if 'user' not in type_ or 'typedef' not in types[type_['user']]:
+            return False
+        typedef = types[type_['user']]['typedef']
+        type_, attr = typedef['type'], typedef.get('attr')
+
+
+# Helper to get a flattened columns struct type name - None if the type is not a non-union struct type (or typedef of
+# one), or if the struct is recursive
+def _get_columns_struct_name(types, type_, struct_names):
+    while 'user' in type_ and 'typedef' in types[type_['user']]:
+        type_ = types[type_['user']]['typedef']['type']
+    type_name = type_.get('user')
+    if type_name is None or type_name in struct_names:
+        return None
+    struct = types[type_name].get('struct')
+    if struct is None or struct.get('union', False):
+        return None
+    return type_name
+
+
+class QueryStringDecoder:
+    """
+    A reusable query string decoder. Use a decoder to decode many query strings with the same options (e.g. decoding
+    access logs) - each key string's unquoted key segments are cached, so frequent keys are split and unquoted once, and
+    typed decoders compute each type's key resolution once. For example:
+
+    >>> decoder = schema_markdown.QueryStringDecoder()
+    >>> decoder.decode('a=5&c.d=foo&c.e.0=1')
+    {'a': '5', 'c': {'d': 'foo', 'e': ['1']}}
+
+    If a type name is provided, query strings are decoded and type-validated in a single pass (see
+    :func:`~schema_markdown.decode_query_string_typed`). Otherwise, query strings are decoded as
+    :func:`~schema_markdown.decode_query_string`.
+
+    :param types: The optional `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :type types: dict or None
+    :param type_name: The optional type name
+    :type type_name: str or None
+    :param str encoding: The query string encoding
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :param max_pairs: The optional maximum number of key/value pairs
+    :type max_pairs: int or None
+    :param max_depth: The optional maximum key depth (the number of dot-separated key segments)
+    :type max_depth: int or None
+    :param max_key_length: The optional maximum length of a key, before unquoting
+    :type max_key_length: int or None
+    :param max_array_length: The optional maximum total length of all arrays
+    :type max_array_length: int or None
+    :param int max_cache_size: The maximum number of cached key strings - the cache is cleared when full. Use 0 to
+        disable the cache.
+    :raises ValidationError: The type name is unknown
+    """
+
+    __slots__ = (
+        'encoding', 'max_pairs', 'max_depth', 'max_key_length', 'max_array_length', 'max_cache_size', 'key_cache',
+        'typed_decoder'
+    )
+
+    def __init__(self, types=None, type_name=None, encoding='utf-8', struct_classes=None, intern_strings=False,
+                 enum_classes=None, uuid_format=None, max_pairs=None, max_depth=None, max_key_length=None,
+                 max_array_length=None, max_cache_size=1024):
+        self.encoding = encoding
+        self.max_pairs = max_pairs
+        self.max_depth = max_depth
+        self.max_key_length = max_key_length
+        self.max_array_length = max_array_length
+        self.max_cache_size = max_cache_size
+        self.key_cache = {}
+        self.typed_decoder = None
+        if type_name is not None:
+            if type_name not in types:
+                raise ValidationError(f"Unknown type {type_name!r}")
+            options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+            self.typed_decoder = _TypedQueryStringDecoder(types, type_name, options)
+
+    def decode(self, query_string):
+        """
+        Decode an object from a query string
+
+        :param query_string: The query string (see :func:`~schema_markdown.decode_query_string`)
+        :type query_string: str or bytes or bytearray or memoryview
+        :returns: The decoded object, or the validated, transformed value object if the decoder has a type name
+        :raises ValueError: Query string is invalid or exceeds a limit
+        :raises ValidationError: A validation error occurred
+        """
+
+        if not isinstance(query_string, str):
+            query_string = _decode_query_string_bytes(query_string, self.encoding)
+        if self.typed_decoder is not None:
+            return self.typed_decoder.decode(self, query_string)
+
+        # Build the object
+        result = [None]
+        array_length = 0
+        max_array_length = self.max_array_length
+        encoding = self.encoding
+        key_cache = self.key_cache
+        key_values = _split_key_values(query_string, self.max_pairs)
+        for ix_key_value, key_value in enumerate(key_values):
+            # Split the key/value string
+            try:
+                key_str, value_str = key_value.split('=', 1)
+            except ValueError:
+                # Ignore hash IDs
+                if ix_key_value == len(key_values) - 1:
+                    continue
+                raise ValueError(f"Invalid key/value pair {key_value!r:.100s}")
+            key_segments = key_cache.get(key_str)
+            if key_segments is None:
+                key_segments = self._get_key_segments(key_str)
+            value = unquote(value_str, encoding=encoding) if '%' in value_str else value_str
+
+            # Find/create the object on which to set the value
+            parent = result
+            key_parent = 0
+            for key in key_segments:
+                obj = parent[key_parent]
+
+                # Array key?  First "key" of an array must start with "0".
+                if isinstance(obj, list) or (obj is None and key == '0'):
+
+                    # Create this key's container, if necessary
+                    if obj is None:
+                        obj = parent[key_parent] = []
+
+                    # Parse the key as an integer
+                    try:
+                        key = int(key)
+                    except:
+                        raise ValueError(f"Invalid array index {key!r:.100s} in key {key_str!r:.100s}")
+
+                    # Append the value placeholder None
+                    if key == len(obj):
+                        array_length += 1
+                        if max_array_length is not None and array_length > max_array_length:
+                            raise ValueError(f"Key {key_str!r:.100s} exceeds the maximum total array length of {max_array_length}")
+                        obj.append(None)
+                    elif key < 0 or key > len(obj):
+                        raise ValueError(f"Invalid array index {key} in key {key_str!r:.100s}")
+
+                # Dictionary key
+                else:
+
+                    # Create this key's container, if necessary
+                    if obj is None:
+                        obj = parent[key_parent] = {}
+
+                    # Create the index for this key
+                    if obj.get(key) is None:
+                        obj[key] = None
+
+                # Update the parent object and key
+                parent = obj
+                key_parent = key
+
+            # Set the value
+            if parent[key_parent] is not None:
+                raise ValueError(f"Duplicate key {key_str!r:.100s}")
+            parent[key_parent] = value
+
+        return result[0] if result[0] is not None else {}
+
+    # Get a key string's tuple of unquoted key segments - the key limits are checked before the key is cached
+    def _get_key_segments(self, key_str):
+        _check_key_limits(key_str, self.max_depth, self.max_key_length)
+        if '%' in key_str:
+            key_segments = tuple(unquote(key, encoding=self.encoding) for key in key_str.split('.'))
+        else:
+            key_segments = tuple(key_str.split('.'))
+
+        # Cache the key segments - the cache is cleared when full
+        if self.max_cache_size:
+            if len(self.key_cache) >= self.max_cache_size:
+                self.key_cache.clear()
+            self.key_cache[key_str] = key_segments
+
+        return key_segments
+
+
+# Typed query string decoder - the key steps of the decoded types are computed as needed and reused
+class _TypedQueryStringDecoder:
+    __slots__ = ('types', 'root_type', 'options', 'steps')
+
+    def __init__(self, types, type_name, options):
+        self.types = types
+        self.root_type = {'user': type_name}
+        self.options = options
+        self.steps = {}
+
+    # Decode and validate a query string - the query string decoder provides the encoding, limits, and key cache
+    def decode(self, decoder, query_string):
+        types = self.types
+        options = self.options
+        steps = self.steps
+
+        # Build the object - containers is the list of typed containers, in creation order, to finish validation
+        result = [_UNSET]
+        containers = []
+        leaf_container_ids = set()
+        array_length = 0
+        max_array_length = decoder.max_array_length
+        encoding = decoder.encoding
+        key_cache = decoder.key_cache
+        key_values = _split_key_values(query_string, decoder.max_pairs)
+        for ix_key_value, key_value in enumerate(key_values):
+            # Split the key/value string
+            try:
+                key_str, value_str = key_value.split('=', 1)
+            except ValueError:
+                # Ignore hash IDs
+                if ix_key_value == len(key_values) - 1:
+                    continue
+                raise ValueError(f"Invalid key/value pair {key_value!r:.100s}")
+            key_segments = key_cache.get(key_str)
+            if key_segments is None:
+                key_segments = decoder._get_key_segments(key_str) # pylint: disable=protected-access
+            value = unquote(value_str, encoding=encoding) if '%' in value_str else value_str
+
+            # Find/create the object on which to set the value - the type is None within "any" values
+            parent = result
+            key_parent = 0
+            type_, attr, convert = self.root_type, None, _VALIDATE
+            member_fqn = None
+            for key in key_segments:
+                obj = parent[key_parent]
+
+                # Get the type's key step
+                if type_ is not None:
+                    step = steps.get(id(type_))
+                    if step is None:
+                        step = steps[id(type_)] = _get_typed_step(types, type_, options)
+                    step_kind = step[0]
+                    if step_kind is None:
+                        type_ = None
+                else:
+                    step_kind = None
+
+                # Untyped array or dict?
+                if step_kind is None:
+                    step_kind = 'array' if obj.__class__ is list or (obj is _UNSET and key == '0') else 'dict'
 
                 # Create this key's container, if necessary
-                if obj is None:
-                    obj = parent[key_parent] = {}
+                step_class = list if step_kind == 'array' else dict
+                if obj is _UNSET:
+                    obj = parent[key_parent] = step_class()
+                    if type_ is not None:
+                        containers.append((step, type_, attr, member_fqn, parent, key_parent))
+                elif obj.__class__ is not step_class or (leaf_container_ids and id(obj) in leaf_container_ids):
+                    raise ValueError(f"Duplicate key {key_str!r:.100s}")
+
+                # Array key?
+                if step_kind == 'array':
+
+                    # Parse the key as an integer
+                    try:
+                        key = int(key)
+                    except:
+                        raise ValueError(f"Invalid array index {key!r:.100s} in key {key_str!r:.100s}")
+
+                    # Append the value placeholder
+                    if key == len(obj):
+                        array_length += 1
+                        if max_array_length is not None and array_length > max_array_length:
+                            raise ValueError(f"Key {key_str!r:.100s} exceeds the maximum total array length of {max_array_length}")
+                        obj.append(_UNSET)
+                    elif key < 0 or key > len(obj):
+                        raise ValueError(f"Invalid array index {key} in key {key_str!r:.100s}")
+
+                    # Update the member type
+                    if type_ is not None:
+                        type_, attr, convert = step[1]
+                        member_fqn = f'{key}' if member_fqn is None else f'{member_fqn}.{key}'
+
+                # Dictionary key
+                else:
+
+                    # Validate the key and update the member type
+                    if type_ is not None:
+                        member_fqn_key = key if member_fqn is None else f'{member_fqn}.{key}'
+
+                        # Struct member?
+                        if step_kind == 'struct':
+                            member = step[1].get(key)
+                            if member is None:
+                                raise ValidationError(f"Unknown member {member_fqn_key!r:.100s}")
+                            key, type_, attr, convert = member
+
+                        # Dict key?
+                        elif step_kind == 'dict':
+                            key = _validate_dict_key(types, step[1], step[2], key, member_fqn, options)
+                            type_, attr, convert = step[3]
 
-                # Create the index for this key
-                if obj.get(key) is None:
-                    obj[key] = None
+                        # Non-container type
+                        else:
+                            raise ValidationError(f"Unknown member {member_fqn_key!r:.100s}")
 
-            # Update the parent object and key
-            parent = obj
-            key_parent = key
+                        member_fqn = member_fqn_key
 
-        # Set the value
-        if parent[key_parent] is not None:
-            raise ValueError(f"Duplicate key {key_str!r:.100s}")
-        parent[key_parent] = value
+                    # Create the index for this key
+                    if key not in obj:
+                        obj[key] = _UNSET
+
+                # Update the parent object and key
+                parent = obj
+                key_parent = key
+
+            # Set the value
+            if parent[key_parent] is not _UNSET:
+                raise ValueError(f"Duplicate key {key_str!r:.100s}")
+            if type_ is not None:
+                if attr is not None and value == 'null' and attr.get('nullable', False):
+                    value = None
+                else:
+                    # Convert the value
+                    if convert is _VALIDATE:
+                        value = _validate_type(types, type_, value, member_fqn, options)
+                    elif convert is not None:
+                        try:
+                            value = convert(value)
+                        except (ValueError, KeyError):
+                            raise _member_error(type_, value, member_fqn) from None
+                    if attr is not None:
+                        _validate_attr(type_, attr, value, member_fqn)
+
+                    # Empty container value (e.g. "a=")? If so, it can't have keys.
+                    if value.__class__ is list or value.__class__ is dict:
+                        leaf_container_ids.add(id(value))
+            parent[key_parent] = value
+
+        # Empty query string?
+        if result[0] is _UNSET:
+            return _validate_type(types, self.root_type, {}, None, options)
+
+        # Finish the typed containers - child containers are finished before their parent
+        for step, type_, attr, member_fqn, parent, key in reversed(containers):
+            parent[key] = _finish_typed_container(types, step, type_, attr, parent[key], member_fqn, options)
+
+        return result[0]
+
+
+# Query string placeholder value
+_UNSET = object()
+
+
+# Typed query string value converter that calls _validate_type
+_VALIDATE = object()
+
+
+# Helper to get a typed query string type's key step - a tuple of the step kind (None for "any"), the step's member
+# types, and the resolved typedef types. Member types are (type, attr, convert) tuples - struct member types are
+# (name, type, attr, convert) tuples.
+def _get_typed_step(types, type_, options):
+    typedef_types = []
+    while 'user' in type_ and 'typedef' in types[type_['user']]:
+        typedef_types.append(type_)
+        type_ = types[type_['user']]['typedef']['type']
+    if 'array' in type_:
+        array = type_['array']
+        return ('array', _get_typed_member(array['type'], array.get('attr'), options), typedef_types)
+    if 'dict' in type_:
+        dict_ = type_['dict']
+        dict_key_type = dict_['keyType'] if 'keyType' in dict_ else {'builtin': 'string'}
+        dict_member = _get_typed_member(dict_['type'], dict_.get('attr'), options)
+        return ('dict', dict_key_type, dict_.get('keyAttr'), dict_member, typedef_types)
+    if 'user' in type_ and 'struct' in types[type_['user']]:
+        struct = types[type_['user']]['struct']
+        is_union = struct.get('union', False)
+        members = list(get_struct_members(types, struct))
+        return (
+            'struct',
+            {member['name']: (member['name'], *_get_typed_member(member['type'], member.get('attr'), options)) for member in members},
+            typedef_types,
+            type_['user'],
+            [member['name'] for member in members],
+            [] if is_union else [member['name'] for member in members if not member.get('optional', False)],
+            is_union
+        )
+    if type_.get('builtin') in ('any', 'object'):
+        return (None,)
+    return ('scalar',)
+
+
+# Helper to get a typed query string member's (type, attr, convert) tuple
+def _get_typed_member(type_, attr, options):
+    convert = _VALIDATE
+    if 'builtin' in type_ and (type_['builtin'] != 'uuid' or options is None or options.uuid_format is None):
+        convert = _TYPED_CONVERTERS.get(type_['builtin'], _VALIDATE)
+    return (type_, attr, convert)
+
+
+def _convert_float(value):
+    value_float = float(value)
+    if isnan(value_float) or isinf(value_float):
+        raise ValueError()
+    return value_float
+
+
+def _convert_date(value):
+    return datetime.fromisoformat(value).date()
+
+
+def _convert_datetime(value):
+    value_datetime = datetime.fromisoformat(value)
+    if value_datetime.tzinfo is None:
+        value_datetime = value_datetime.replace(tzinfo=timezone.utc)
+    return value_datetime
+
+
+# Map of builtin type to typed query string value converter - None means no conversion. The conversions are the same
+# as validate_type's string value conversions.
+_TYPED_CONVERTERS = {
+    'string': None,
+    'int': int,
+    'float': _convert_float,
+    'bool': {'true': True, 'false': False}.__getitem__,
+    'date': _convert_date,
+    'datetime': _convert_datetime,
+    'uuid': UUID
+}
+
+
+# Helper to finish validation of a typed query string container - check for missing struct members, create struct
+# class instances, and validate attributes
+def _finish_typed_container(types, step, type_, attr, value, member_fqn, options):
+    # Struct? If so, check for missing members and order the members the same as validate_type.
+    if step[0] == 'struct':
+        _, _, typedef_types, struct_name, member_names, required_names, is_union = step
+        for member_name in required_names:
+            if member_name not in value:
+                member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+                raise ValidationError(f"Required member {member_fqn_member!r} missing")
+        value = {member_name: value[member_name] for member_name in member_names if member_name in value}
+        if is_union and len(value) != 1:
+            raise _member_error({'user': struct_name}, value, member_fqn)
+        if options is not None and options.struct_classes is not None and struct_name in options.struct_classes:
+            value = options.struct_classes[struct_name](**value)
+    else:
+        typedef_types = step[-1]
 
-    return result[0] if result[0] is not None else {}
+    # Validate the attributes
+    for typedef_type in reversed(typedef_types):
+        _validate_attr(typedef_type, types[typedef_type['user']]['typedef'].get('attr'), value, member_fqn)
+    _validate_attr(type_, attr, value, member_fqn)
+    return value
@@ -0,0 +1,704 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+Fused JSON decoding and type validation
+"""
+
+import codecs
+import json
+from json.decoder import JSONDecodeError, scanstring
+import re
+
+from .schema import ValidationError, _get_validate_options, _member_error, _validate_attr, _validate_dict_key, _validate_type, \
+    get_struct_members
+
+
+def validate_json(types, type_name, data, struct_classes=None, intern_strings=False, enum_classes=None, uuid_format=None):
+    """
+    Decode and type-validate a JSON document using the schema-markdown user type model. The result is the same as
+    :func:`~schema_markdown.validate_type` of the decoded JSON. Arrays, dicts, and structs with container members are
+    decoded and validated item by item, so the decoded (unvalidated) JSON of the whole document never exists. Peak
+    memory use is lower than :func:`~json.loads` followed by :func:`~schema_markdown.validate_type`. Arrays of structs
+    with only non-container members are decoded faster - otherwise, the speed is about the same. If a document has more
+    than one error, the reported error may differ.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name
+    :param data: The JSON document
+    :type data: str or bytes
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :returns: The validated, transformed value object
+    :raises ~json.JSONDecodeError: The JSON document is invalid
+    :raises ValidationError: A validation error occurred
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode(json.detect_encoding(data), 'surrogatepass')
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    decoder = _JSONValidator(types, options, data)
+    value, end = decoder.decode({'user': type_name}, _skip_ws(data, 0), None)
+    end = _skip_ws(data, end)
+    if end != len(data):
+        raise JSONDecodeError('Extra data', data, end)
+    return value
+
+
+def validate_json_array(types, type_name, fileobj, chunk_size=65536, struct_classes=None, intern_strings=False, enum_classes=None,
+                        uuid_format=None):
+    """
+    Incrementally decode and type-validate the values of a JSON array document from a file-like object. The document is
+    read in chunks and each array value is validated as soon as it is decoded, so memory use is bounded by the largest
+    array value rather than the document size. JSON syntax errors are raised as soon as they are read. Validation errors
+    have the array index as the member name (e.g. "3.a").
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The array value type name
+    :param fileobj: The file-like object with a ``read`` method that returns :class:`str` or UTF-8 :class:`bytes`
+    :param int chunk_size: The read size
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :returns: An iterator of validated, transformed array values
+    :raises ~json.JSONDecodeError: The JSON document is invalid
+    :raises ValidationError: A validation error occurred
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    parser = _JSONArrayParser(types, {'user': type_name}, options)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        yield from parser.values()
+    parser.close()
+    yield from parser.values()
+
+
+async def validate_json_array_async(types, type_name, stream, chunk_size=65536, struct_classes=None, intern_strings=False,
+                                    enum_classes=None, uuid_format=None):
+    """
+    Incrementally decode and type-validate the values of a JSON array document from an asynchronous byte stream (see
+    :func:`~schema_markdown.validate_json_array`). Each array value is validated as soon as its bytes arrive, and the
+    stream is read only as fast as values are consumed.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The array value type name
+    :param stream: The :class:`~asyncio.StreamReader` (or object with a ``read`` coroutine method) or the asynchronous
+        iterable of :class:`str` or UTF-8 :class:`bytes` chunks
+    :param int chunk_size: The read size
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :returns: An asynchronous iterator of validated, transformed array values
+    :raises ~json.JSONDecodeError: The JSON document is invalid
+    :raises ValidationError: A validation error occurred
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    parser = _JSONArrayParser(types, {'user': type_name}, options)
+    async for chunk in _read_chunks_async(stream, chunk_size):
+        parser.feed(chunk)
+        for value in parser.values():
+            yield value
+    parser.close()
+    for value in parser.values():
+        yield value
+
+
+# Helper to iterate the chunks of an asynchronous stream or an asynchronous iterable
+async def _read_chunks_async(stream, chunk_size):
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        async for chunk in stream:
+            if chunk:
+                yield chunk
+
+
+# Incremental JSON array parser/validator - feed text chunks and iterate validated array values
+class _JSONArrayParser:
+    __slots__ = (
+        'types', 'type_', 'options', 'text', 'pos', 'chunks', 'chunks_len', 'wait_len', 'state', 'index', 'eof', 'decoder',
+        'text_pos', 'text_lineno', 'text_colno'
+    )
+
+    # Parser states
+    _START = 0
+    _VALUE_OR_END = 1
+    _VALUE = 2
+    _DELIMITER = 3
+    _END = 4
+
+    def __init__(self, types, type_, options):
+        self.types = types
+        self.type_ = type_
+        self.options = options
+        self.text = ''
+        self.pos = 0
+        self.state = self._START
+        self.index = 0
+        self.eof = False
+        self.decoder = None
+
+        # The chunks not yet added to the text buffer and the pending text length required to rescan an incomplete value
+        self.chunks = []
+        self.chunks_len = 0
+        self.wait_len = 0
+
+        # The document position of the text buffer - used for error messages
+        self.text_pos = 0
+        self.text_lineno = 1
+        self.text_colno = 1
+
+    # Add a chunk of input - bytes are decoded as UTF-8
+    def feed(self, chunk):
+        if not isinstance(chunk, str):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = self.decoder.decode(chunk)
+        if chunk:
+            self.chunks.append(chunk)
+            self.chunks_len += len(chunk)
+
+    # Mark the end of input
+    def close(self):
+        if self.decoder is not None:
+            self.feed(self.decoder.decode(b'', True))
+        self.eof = True
+
+    # Add the pending chunks to the text buffer, discarding the parsed text
+    def add_chunks(self):
+        text = self.text
+        pos = self.pos
+        newlines = text.count('\n', 0, pos)
+        self.text_pos += pos
+        self.text_lineno += newlines
+        self.text_colno = pos - text.rindex('\n', 0, pos) if newlines else self.text_colno + pos
+        self.chunks.insert(0, text[pos:])
+        self.text = ''.join(self.chunks)
+        self.pos = 0
+        self.chunks = []
+        self.chunks_len = 0
+
+    # Create a JSON decode error with the document position of a text buffer index
+    def error(self, message, pos):
+        text = self.text
+        newlines = text.count('\n', 0, pos)
+        doc_pos = self.text_pos + pos
+        lineno = self.text_lineno + newlines
+        colno = pos - text.rindex('\n', 0, pos) if newlines else self.text_colno + pos
+        error = JSONDecodeError(message, text, pos)
+        error.args = (f'{message}: line {lineno} column {colno} (char {doc_pos})',)
+        error.pos = doc_pos
+        error.lineno = lineno
+        error.colno = colno
+        return error
+
+    # Iterate the available validated array values
+    def values(self):
+        # Incomplete value? If so, wait until the pending text is as long as the buffered text so that a large value is
+        # rescanned a logarithmic number of times.
+        if not self.eof and self.chunks_len < self.wait_len:
+            return
+        if self.chunks:
+            self.add_chunks()
+        self.wait_len = 0
+
+        text = self.text
+        while True:
+            pos = _skip_ws(text, self.pos)
+            self.pos = pos
+            if pos == len(text):
+                if self.eof and self.state != self._END:
+                    message = "Expecting ',' delimiter" if self.state == self._DELIMITER else 'Expecting value'
+                    raise self.error(message, pos)
+                return
+            state = self.state
+
+            # Array start
+            if state == self._START:
+                if text[pos] != '[':
+                    raise self.error('Expecting array', pos)
+                self.pos = pos + 1
+                self.state = self._VALUE_OR_END
+
+            # Array value
+            elif state in (self._VALUE_OR_END, self._VALUE):
+                if state == self._VALUE_OR_END and text[pos] == ']':
+                    self.pos = pos + 1
+                    self.state = self._END
+                    continue
+
+                # Decode the value - incomplete values wait for more input, other errors are raised immediately
+                try:
+                    value, end = _SCAN_ONCE(text, pos)
+                except StopIteration as exc:
+                    if not self.eof and _is_json_error_incomplete(text, exc.value, 'Expecting value'):
+                        self.wait_len = len(text) - pos
+                        return
+                    raise self.error('Expecting value', exc.value) from None
+                except JSONDecodeError as exc:
+                    if not self.eof and _is_json_error_incomplete(text, exc.pos, exc.msg):
+                        self.wait_len = len(text) - pos
+                        return
+                    raise self.error(exc.msg, exc.pos) from None
+                if not self.eof and isinstance(value, (int, float)) and _RE_NUMBER_CHARS.fullmatch(text, end):
+                    self.wait_len = len(text) - pos
+                    return
+                self.pos = end
+                self.state = self._DELIMITER
+
+                # Validate the value
+                member_fqn = f'{self.index}'
+                self.index += 1
+                yield _validate_type(self.types, self.type_, value, member_fqn, self.options)
+
+            # Array delimiter
+            elif state == self._DELIMITER:
+                char = text[pos]
+                if char == ',':
+                    self.state = self._VALUE
+                elif char == ']':
+                    self.state = self._END
+                else:
+                    raise self.error("Expecting ',' delimiter", pos)
+                self.pos = pos + 1
+
+            # Extra data
+            else:
+                raise self.error('Extra data', pos)
+
+
+# Helper to determine if a JSON decode error at a text index may be due to the end of the (incomplete) text
+def _is_json_error_incomplete(text, pos, message):
+    if message.startswith('Unterminated string'):
+        return True
+    if message.startswith('Invalid \\uXXXX escape'):
+        return len(text) - pos < 12
+    if len(text) - pos < 9 and any(literal.startswith(text[pos:]) for literal in _JSON_LITERALS):
+        return True
+    return _RE_NUMBER_CHARS.fullmatch(text, pos) is not None
+
+
+# JSON literals, including the non-standard literals accepted by the json module
+_JSON_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+
+
+# Number characters regular expression - used to detect possibly-incomplete numbers
+_RE_NUMBER_CHARS = re.compile(r'[0-9.eE+-]*')
+
+
+# JSON whitespace
+_WS = ' \t\n\r'
+_RE_WS = re.compile(r'[ \t\n\r]*')
+
+
+# Helper to skip JSON whitespace - returns the index of the next non-whitespace character
+def _skip_ws(text, idx):
+    if text[idx:idx + 1] in _WS:
+        return _RE_WS.match(text, idx).end()
+    return idx
+
+
+# The JSON scanner used to decode non-container values
+_SCAN_ONCE = json.JSONDecoder().scan_once
+
+
+# Schema-directed JSON decoder/validator - arrays and dicts of containers and structs with container members are
+# decoded item by item, other values are decoded whole and validated
+class _JSONValidator:
+    __slots__ = ('types', 'options', 'text', 'structs')
+
+    def __init__(self, types, options, text):
+        self.types = types
+        self.options = options
+        self.text = text
+        self.structs = {}
+
+    # Decode a JSON value, at a non-whitespace index, as a type - returns a value, end index tuple
+    def decode(self, type_, idx, member_fqn):
+        char = self.text[idx:idx + 1]
+
+        # Array?
+        if 'array' in type_:
+            if char == '[':
+                return self.decode_array(type_, idx, member_fqn)
+
+        # Dict?
+        elif 'dict' in type_:
+            if char == '{':
+                return self.decode_dict(type_, idx, member_fqn)
+
+        # Typedef or struct?
+        elif 'user' in type_:
+            user_type = self.types[type_['user']]
+            if 'typedef' in user_type:
+                typedef = user_type['typedef']
+                return self.decode_nullable(typedef['type'], typedef.get('attr'), idx, member_fqn, type_)
+            if 'struct' in user_type and char == '{':
+                return self.decode_struct(type_['user'], idx + 1, member_fqn)
+
+        # Decode and validate the value
+        value, end = self.scan(idx)
+        return _validate_type(self.types, type_, value, member_fqn, self.options), end
+
+    # Decode a JSON value with nullable and attribute validation - returns a value, end index tuple
+    def decode_nullable(self, type_, attr, idx, member_fqn, attr_type=None):
+        if attr is not None and attr.get('nullable', False) and self.text[idx:idx + 1] in ('n', '"'):
+            value, end = self.scan(idx)
+            if value is None or value == 'null':
+                return None, end
+            value = _validate_type(self.types, type_, value, member_fqn, self.options)
+        else:
+            value, end = self.decode(type_, idx, member_fqn)
+        _validate_attr(type_ if attr_type is None else attr_type, attr, value, member_fqn)
+        return value, end
+
+    # Decode a JSON array, at the opening bracket - returns a value, end index tuple
+    def decode_array(self, type_, idx, member_fqn):
+        array = type_['array']
+        array_type = array['type']
+        array_attr = array.get('attr')
+
+        # Array of non-container values? If so, decode the array whole. Arrays of values of the exact Python type need
+        # no conversion.
+        if _is_scanned_type(self.types, array_type):
+            value, end = self.scan(idx)
+            exact_types = _EXACT_TYPES.get(array_type.get('builtin')) if array_attr is None else None
+            if exact_types is None or not set(map(type, value)) <= exact_types:
+                value = _validate_type(self.types, type_, value, member_fqn, self.options)
+            return value, end
+
+        # Decode the array values - struct values are decoded directly
+        text = self.text
+        struct_name = _get_struct_name(self.types, array_type) if array_attr is None else None
+        value = []
+        idx, closed = self.decode_open(idx + 1, ']')
+        while not closed:
+            ix_array_value = len(value)
+            member_fqn_value = f'{ix_array_value}' if member_fqn is None else f'{member_fqn}.{ix_array_value}'
+            if struct_name is not None and text[idx:idx + 1] == '{':
+                array_value, idx = self.decode_struct(struct_name, idx + 1, member_fqn_value)
+            elif array_attr is None:
+                array_value, idx = self.decode(array_type, idx, member_fqn_value)
+            else:
+                array_value, idx = self.decode_nullable(array_type, array_attr, idx, member_fqn_value)
+            value.append(array_value)
+
+            # Decode the delimiter
+            match_delimiter = _RE_ARRAY_NEXT.match(text, idx)
+            if match_delimiter is None:
+                raise JSONDecodeError("Expecting ',' delimiter", text, _skip_ws(text, idx))
+            idx = match_delimiter.end()
+            closed = match_delimiter.group(1) is not None
+
+        return value, idx
+
+    # Decode a JSON object as a dict, at the opening brace - returns a value, end index tuple
+    def decode_dict(self, type_, idx, member_fqn):
+        dict_ = type_['dict']
+        dict_type = dict_['type']
+        dict_attr = dict_.get('attr')
+        dict_key_type = dict_['keyType'] if 'keyType' in dict_ else {'builtin': 'string'}
+        dict_key_attr = dict_.get('keyAttr')
+
+        # Dict of non-container values? If so, decode the dict whole. String-keyed dicts of values of the exact Python
+        # type need no conversion.
+        if _is_scanned_type(self.types, dict_type):
+            value, end = self.scan(idx)
+            exact_types = _EXACT_TYPES.get(dict_type.get('builtin')) \
+                if dict_attr is None and 'keyType' not in dict_ and dict_key_attr is None and \
+                (self.options is None or not self.options.intern_strings) else None
+            if exact_types is None or not set(map(type, value.values())) <= exact_types:
+                value = _validate_type(self.types, type_, value, member_fqn, self.options)
+            return value, end
+
+        # Decode the dict key/value pairs
+        value = {}
+        idx, closed = self.decode_open(idx + 1, '}')
+        while not closed:
+            dict_key, idx = self.decode_key(idx)
+            member_fqn_key = dict_key if member_fqn is None else f'{member_fqn}.{dict_key}'
+            dict_key = _validate_dict_key(self.types, dict_key_type, dict_key_attr, dict_key, member_fqn, self.options)
+            value[dict_key], idx = self.decode_nullable(dict_type, dict_attr, idx, member_fqn_key)
+            idx, closed = self.decode_delimiter(idx, '}')
+        return value, idx
+
+    # Decode a JSON object as a struct, after the opening brace - returns a value, end index tuple. Structs with only
+    # non-container members are decoded whole. Otherwise, members are decoded one at a time. Unknown members are errors
+    # when validated, and required and union members are checked after all members are validated.
+    def decode_struct(self, type_name, start, member_fqn):
+        struct_info = self.structs.get(type_name)
+        if struct_info is None:
+            struct_info = self.structs[type_name] = _JSONStruct(self.types, self.types[type_name]['struct'])
+
+        # Decode and validate the struct members
+        if struct_info.is_scanned:
+            json_value, idx = self.scan(start - 1)
+            value, is_ordered = self.validate_struct_members(struct_info, json_value, member_fqn)
+        else:
+            json_value = None
+            value, is_ordered, idx = self.decode_struct_members(struct_info, start, member_fqn)
+
+        # Union with other than one member? The error value is the decoded JSON object.
+        if struct_info.is_union:
+            if len(value) != 1:
+                if json_value is None:
+                    json_value = self.scan(start - 1)[0]
+                raise _member_error({'user': type_name}, json_value, member_fqn)
+
+        # Missing required member?
+        elif not value.keys() >= struct_info.required:
+            member_name = next(
+                member_name for member_name in struct_info.names if member_name in struct_info.required and member_name not in value
+            )
+            member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+            raise ValidationError(f"Required member {member_fqn_member!r} missing")
+
+        # Members are in struct member order
+        if not is_ordered:
+            value = {member_name: value[member_name] for member_name in struct_info.names if member_name in value}
+        options = self.options
+        if options is not None and options.struct_classes is not None and type_name in options.struct_classes:
+            value = options.struct_classes[type_name](**value)
+        return value, idx
+
+    # Validate the members of a decoded JSON object - returns a members dict, is-member-ordered tuple
+    def validate_struct_members(self, struct_info, json_value, member_fqn):
+        types = self.types
+        options = self.options
+        members = struct_info.members
+        value = {}
+        is_ordered = True
+        ix_member_last = -1
+        for member_key, member_value in json_value.items():
+
+            # Unknown member?
+            member = members.get(member_key)
+            if member is None:
+                unknown_fqn = member_key if member_fqn is None else f'{member_fqn}.{member_key}'
+                raise ValidationError(f"Unknown member {unknown_fqn!r:.100s}")
+            ix_member, member_name, _, member_exact_type, member_type, member_attr, member_nullable = member
+
+            # Validate the member value - values of the exact Python type need no conversion. The type check is exact since
+            # bool is an int sub-class.
+            if type(member_value) is not member_exact_type: # pylint: disable=unidiomatic-typecheck
+                member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+                if member_nullable and (member_value is None or member_value == 'null'):
+                    member_value = None
+                else:
+                    member_value = _validate_type(types, member_type, member_value, member_fqn_member, options)
+                    if member_attr is not None:
+                        _validate_attr(member_type, member_attr, member_value, member_fqn_member)
+            elif member_attr is not None:
+                member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+                _validate_attr(member_type, member_attr, member_value, member_fqn_member)
+
+            # Add the member
+            if ix_member < ix_member_last:
+                is_ordered = False
+            ix_member_last = ix_member
+            value[member_name] = member_value
+
+        return value, is_ordered
+
+    # Decode the members of a JSON object, after the opening brace - returns a members dict, is-member-ordered, end index
+    # tuple
+    def decode_struct_members(self, struct_info, start, member_fqn):
+        text = self.text
+        types = self.types
+        options = self.options
+        members = struct_info.members
+        value = {}
+        is_ordered = True
+        ix_member_last = -1
+        idx = start
+        match_key = _RE_STRUCT_OPEN.match(text, idx)
+        while True:
+
+            # Decode the delimiter and member key - the regular expressions do not match keys with escapes or errors, but
+            # do match the closing brace
+            if match_key is not None:
+                close_char, member_key = match_key.groups()
+                idx = match_key.end()
+                if close_char is not None:
+                    break
+            else:
+                idx = _skip_ws(text, idx) if idx == start else self.decode_delimiter(idx, '}')[0]
+                member_key, idx = self.decode_key(idx)
+
+            # Unknown member?
+            member = members.get(member_key)
+            if member is None:
+                unknown_fqn = member_key if member_fqn is None else f'{member_fqn}.{member_key}'
+                raise ValidationError(f"Unknown member {unknown_fqn!r:.100s}")
+            ix_member, member_name, member_scanned, member_exact_type, member_type, member_attr, member_nullable = member
+
+            # Decode a non-container value - values of the exact Python type need no conversion. The type check is exact
+            # since bool is an int sub-class.
+            if member_scanned:
+                try:
+                    member_value, idx = _SCAN_ONCE(text, idx)
+                except StopIteration as exc:
+                    raise JSONDecodeError('Expecting value', text, exc.value) from None
+                if type(member_value) is not member_exact_type: # pylint: disable=unidiomatic-typecheck
+                    member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+                    if member_nullable and (member_value is None or member_value == 'null'):
+                        member_value = None
+                    else:
+                        member_value = _validate_type(types, member_type, member_value, member_fqn_member, options)
+                        if member_attr is not None:
+                            _validate_attr(member_type, member_attr, member_value, member_fqn_member)
+                elif member_attr is not None:
+                    member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+                    _validate_attr(member_type, member_attr, member_value, member_fqn_member)
+
+            # Decode a container value
+            else:
+                member_fqn_member = member_name if member_fqn is None else f'{member_fqn}.{member_name}'
+                if member_attr is None:
+                    member_value, idx = self.decode(member_type, idx, member_fqn_member)
+                else:
+                    member_value, idx = self.decode_nullable(member_type, member_attr, idx, member_fqn_member)
+
+            # Add the member
+            if ix_member < ix_member_last:
+                is_ordered = False
+            ix_member_last = ix_member
+            value[member_name] = member_value
+            match_key = _RE_STRUCT_NEXT.match(text, idx)
+
+        return value, is_ordered, idx
+
+    # Decode a container's first item, after the open character - returns the next index and True if the container is
+    # closed (empty)
+    def decode_open(self, idx, close_char):
+        idx = _skip_ws(self.text, idx)
+        if self.text[idx:idx + 1] == close_char:
+            return idx + 1, True
+        return idx, False
+
+    # Decode the delimiter following a container item - returns the next index and True if the container is closed
+    def decode_delimiter(self, idx, close_char):
+        text = self.text
+        match_delimiter = _RE_DELIMITER.match(text, idx)
+        if match_delimiter is not None:
+            char = match_delimiter.group(1)
+            if char == ',':
+                return match_delimiter.end(), False
+            if char == close_char:
+                return match_delimiter.end(1), True
+            idx = match_delimiter.start(1)
+        else:
+            idx = _skip_ws(text, idx)
+        raise JSONDecodeError("Expecting ',' delimiter", text, idx)
+
+    # Decode a JSON object key, at a non-whitespace index - returns a key, value index tuple
+    def decode_key(self, idx):
+        text = self.text
+        if text[idx:idx + 1] != '"':
+            raise JSONDecodeError('Expecting property name enclosed in double quotes', text, idx)
+        key, idx = scanstring(text, idx + 1)
+        idx = _skip_ws(text, idx)
+        if text[idx:idx + 1] != ':':
+            raise JSONDecodeError("Expecting ':' delimiter", text, idx)
+        return key, _skip_ws(text, idx + 1)
+
+    # Decode a JSON value - returns a value, end index tuple
+    def scan(self, idx):
+        try:
+            return _SCAN_ONCE(self.text, idx)
+        except StopIteration as exc:
+            raise JSONDecodeError('Expecting value', self.text, exc.value) from None
+
+
+# Helper to determine if a type's JSON values are decoded whole
+def _is_scanned_type(types, type_):
+    if 'builtin' in type_:
+        return True
+    if 'user' in type_:
+        user_type = types[type_['user']]
+        return 'typedef' not in user_type and 'struct' not in user_type
+    return False
+
+
+# Helper to get a type's struct name - None if the type is not a struct type
+def _get_struct_name(types, type_):
+    if 'user' in type_ and 'struct' in types[type_['user']]:
+        return type_['user']
+    return None
+
+
+# Struct member decoding information
+class _JSONStruct:
+    __slots__ = ('members', 'names', 'required', 'is_union', 'is_scanned')
+
+    def __init__(self, types, struct):
+        # Map of member name to (member index, member name, is scanned, exact value type, type, attr, is nullable). The
+        # exact value type is None if the value must be validated. Scanned members have no nullable-only attr.
+        self.members = {}
+        self.names = []
+        required = []
+        for ix_member, member in enumerate(get_struct_members(types, struct)):
+            member_name = member['name']
+            member_type = member['type']
+            member_attr = member.get('attr')
+            member_nullable = member_attr is not None and member_attr.get('nullable', False)
+            member_scanned = _is_scanned_type(types, member_type)
+            member_exact_type = None
+            if member_scanned:
+                if member_attr is not None and all(attr_name == 'nullable' for attr_name in member_attr):
+                    member_attr = None
+                if not member_nullable and 'builtin' in member_type:
+                    member_exact_type = _EXACT_TYPE.get(member_type['builtin'])
+            self.members[member_name] = (
+                ix_member, member_name, member_scanned, member_exact_type, member_type, member_attr, member_nullable
+            )
+            self.names.append(member_name)
+            if not member.get('optional', False):
+                required.append(member_name)
+        self.is_union = struct.get('union', False)
+        self.required = frozenset(required)
+        self.is_scanned = all(member[2] for member in self.members.values())
+
+
+# Maps of built-in type to the Python type (and set of Python types) of its JSON values that need no conversion
+_EXACT_TYPE = {'string': str, 'int': int, 'float': float, 'bool': bool}
+_EXACT_TYPES = {builtin: frozenset((exact_type,)) for builtin, exact_type in _EXACT_TYPE.items()}
+
+
+# Struct member key regular expressions - the first member key or closing brace, and the delimiter and next member key
+# or closing brace
+_RE_STRUCT_OPEN = re.compile(r'[ \t\n\r]*(?:(\})|"([^"\\\x00-\x1f]*)"[ \t\n\r]*:[ \t\n\r]*)')
+_RE_STRUCT_NEXT = re.compile(r'[ \t\n\r]*(?:(\})|,[ \t\n\r]*"([^"\\\x00-\x1f]*)"[ \t\n\r]*:[ \t\n\r]*)')
+
+
+# Array delimiter regular expression - the delimiter and whitespace or the closing bracket
+_RE_ARRAY_NEXT = re.compile(r'[ \t\n\r]*(?:(\])|,[ \t\n\r]*)')
+
+
+# Container delimiter regular expression
+_RE_DELIMITER = re.compile(r'[ \t\n\r]*([,\]}])[ \t\n\r]*')
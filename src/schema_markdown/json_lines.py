@@ -0,0 +1,514 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+JSON Lines decoding and type validation
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+import json
+import os
+from json.encoder import c_make_encoder, encode_basestring, encode_basestring_ascii
+
+from .encode import JSONEncoder
+from .json_decode import _read_chunks_async
+from .schema import ValidationError, _get_validate_options, _validate_type
+
+
+def validate_jsonl(types, type_name, fileobj, errors='collect', chunk_size=1048576, executor=None, batch_size=1000,
+                   max_pending=None, struct_classes=None, intern_strings=False, enum_classes=None, uuid_format=None):
+    """
+    Decode and type-validate the lines of a `JSON Lines <https://jsonlines.org/>`__ file-like object. The file is read
+    in large chunks and each non-blank line is decoded and validated. Results are ``(line_number, value_or_error)``
+    tuples, in line order, where line numbers start at 1 and an invalid line's error is the
+    :class:`~json.JSONDecodeError` or :class:`~schema_markdown.ValidationError`.
+
+    For throughput, pass a :class:`~concurrent.futures.Executor` to validate batches of lines in parallel. A
+    :class:`~concurrent.futures.ProcessPoolExecutor` requires picklable options - generated struct classes and
+    struct tuples are picklable only if generated with the ``module`` argument, and generated enum classes are not
+    picklable.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The line value type name
+    :param fileobj: The file-like object with a ``read`` method that returns :class:`str` or UTF-8 :class:`bytes`
+    :param str errors: The invalid line handling - "collect" to include errors in the results, "skip" to omit them, or
+        "stop" to end the results after the first error
+    :param int chunk_size: The read size
+    :param executor: The optional executor with which to validate batches of lines
+    :type executor: ~concurrent.futures.Executor or None
+    :param int batch_size: The number of lines per executor batch
+    :param max_pending: The maximum number of executor batches in flight. If None, the default is twice the CPU count.
+    :type max_pending: int or None
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :returns: An iterator of ``(line_number, value_or_error)`` tuples
+    :raises ValueError: The errors value is invalid
+    :raises ValidationError: The type name is unknown
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    if errors not in ('collect', 'skip', 'stop'):
+        raise ValueError(f"Invalid errors value {errors!r}")
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    lines = _read_lines(fileobj, chunk_size)
+    if executor is None:
+        results = _validate_lines(types, type_name, options, lines)
+    else:
+        results = _validate_lines_executor(executor, batch_size, _get_max_pending(max_pending), types, type_name, options, lines)
+
+    return _apply_errors(results, errors)
+
+
+# Helper to apply the errors option to (line_number, value_or_error) tuples
+def _apply_errors(results, errors):
+    for line_number, value in results:
+        if isinstance(value, Exception):
+            if errors == 'skip':
+                continue
+            yield line_number, value
+            if errors == 'stop':
+                break
+        else:
+            yield line_number, value
+
+
+def validate_jsonl_async(types, type_name, stream, errors='collect', chunk_size=65536, struct_classes=None, intern_strings=False,
+                         enum_classes=None, uuid_format=None):
+    """
+    Decode and type-validate the lines of a `JSON Lines <https://jsonlines.org/>`__ asynchronous byte stream (see
+    :func:`~schema_markdown.validate_jsonl`). Lines are validated as their bytes arrive, and the stream is read only as
+    fast as results are consumed.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The line value type name
+    :param stream: The :class:`~asyncio.StreamReader` (or object with a ``read`` coroutine method) or the asynchronous
+        iterable of :class:`str` or UTF-8 :class:`bytes` chunks
+    :param str errors: The invalid line handling - "collect", "skip", or "stop"
+    :param int chunk_size: The read size
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :returns: An asynchronous iterator of ``(line_number, value_or_error)`` tuples
+    :raises ValueError: The errors value is invalid
+    :raises ValidationError: The type name is unknown
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    if errors not in ('collect', 'skip', 'stop'):
+        raise ValueError(f"Invalid errors value {errors!r}")
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    return _validate_jsonl_async(types, type_name, options, stream, errors, chunk_size)
+
+
+async def _validate_jsonl_async(types, type_name, options, stream, errors, chunk_size):
+    line_number = 0
+    remainder = None
+    async for chunk in _read_chunks_async(stream, chunk_size):
+        lines, remainder = _split_lines(chunk, remainder)
+        for result in _apply_errors(_validate_lines(types, type_name, options, enumerate(lines, line_number + 1)), errors):
+            yield result
+            if errors == 'stop' and isinstance(result[1], Exception):
+                return
+        line_number += len(lines)
+
+    if remainder:
+        for result in _apply_errors(_validate_lines(types, type_name, options, ((line_number + 1, remainder),)), errors):
+            yield result
+
+
+# Helper to iterate the (line_number, line) tuples of a file-like object using large reads
+def _read_lines(fileobj, chunk_size):
+    line_number = 0
+    remainder = None
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        lines, remainder = _split_lines(chunk, remainder)
+        for line in lines:
+            line_number += 1
+            yield line_number, line
+
+    if remainder:
+        yield line_number + 1, remainder
+
+
+# Helper to split a chunk into lines - returns the complete lines and the incomplete last line. Note that splitting
+# UTF-8 bytes on newline never splits a multi-byte character.
+def _split_lines(chunk, remainder):
+    lines = chunk.split('\n' if isinstance(chunk, str) else b'\n')
+    if remainder:
+        lines[0] = remainder + lines[0]
+    return lines, lines.pop()
+
+
+# Helper to decode and validate (line_number, line) tuples - yields (line_number, value_or_error) tuples
+def _validate_lines(types, type_name, options, lines):
+    type_ = {'user': type_name}
+    loads = json.loads
+    for line_number, line in lines:
+        if not line or line.isspace():
+            continue
+        try:
+            yield line_number, _validate_type(types, type_, loads(line), None, options)
+        except (ValueError, ValidationError) as exc:
+            yield line_number, exc
+
+
+# Helper to decode and validate a batch of (line_number, line) tuples in an executor
+def _validate_lines_batch(types, type_name, options, lines):
+    return list(_validate_lines(types, type_name, options, lines))
+
+
+# Helper to get the maximum number of executor batches in flight - the default is twice the CPU count
+def _get_max_pending(max_pending):
+    if max_pending is None:
+        return 2 * (os.cpu_count() or 1)
+    return max_pending
+
+
+# Helper to decode and validate (line_number, line) tuples in executor batches - at most a few batches are pending
+# at a time, so memory use is bounded regardless of the file size
+def _validate_lines_executor(executor, batch_size, max_pending, types, type_name, options, lines):
+    pending = deque()
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            pending.append(executor.submit(_validate_lines_batch, types, type_name, options, batch))
+            batch = []
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+    if batch:
+        pending.append(executor.submit(_validate_lines_batch, types, type_name, options, batch))
+    while pending:
+        yield from pending.popleft().result()
+
+
+class JSONLinesIndex:
+    """
+    A line offset index of a `JSON Lines <https://jsonlines.org/>`__ buffer, such as a read-only :class:`~mmap.mmap`
+    of a JSON Lines file. The index is built in one pass and is stored as a compact :class:`~array.array` of line
+    offsets. Use it to validate specific lines, to resume validation from a checkpointed byte offset, or to split
+    validation across processes by byte range. For example::
+
+        with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            index = schema_markdown.JSONLinesIndex(data)
+            for line_number, value in index.validate(types, 'MyStruct'):
+                ...
+
+    :param data: The UTF-8 JSON Lines buffer
+    :type data: bytes or ~mmap.mmap
+    :param offsets: The optional line offsets of a previously-built index of the same buffer (see :attr:`offsets`)
+    :type offsets: ~array.array or None
+    """
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data, offsets=None):
+        #: The JSON Lines buffer
+        self.data = data
+
+        #: The :class:`~array.array` of line start byte offsets followed by the buffer's length. Line number *N*
+        #: is the bytes from ``offsets[N - 1]`` to ``offsets[N]``, including its newline.
+        self.offsets = offsets if offsets is not None else _get_line_offsets(data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_offset(self, line_number):
+        """
+        Get a line's start byte offset
+
+        :param int line_number: The line number (starting at 1). The line number after the last line is the buffer's
+            length.
+        :returns: The byte offset
+        """
+
+        return self.offsets[line_number - 1]
+
+    def get_line_number(self, offset):
+        """
+        Get the line number of the first line that starts at or after a byte offset
+
+        :param int offset: The byte offset
+        :returns: The line number (starting at 1) - the line number after the last line if there is no such line
+        """
+
+        return bisect_left(self.offsets, offset, 0, len(self.offsets) - 1) + 1
+
+    def get_line_numbers(self, start=0, end=None):
+        """
+        Get the line numbers of the lines that start within a byte range. Adjacent byte ranges have disjoint line
+        numbers, so byte ranges can be validated independently.
+
+        :param int start: The byte range start offset
+        :param end: The byte range end offset (exclusive). The default is the buffer's length.
+        :type end: int or None
+        :returns: The :class:`range` of line numbers
+        """
+
+        end_line_number = self.get_line_number(end) if end is not None else len(self.offsets)
+        return range(self.get_line_number(start), end_line_number)
+
+    def split(self, count):
+        """
+        Split the lines into contiguous ranges of roughly equal byte size
+
+        :param int count: The maximum number of ranges
+        :returns: The list of non-empty line number :class:`range` objects
+        """
+
+        size = self.offsets[-1]
+        ranges = []
+        start = 0
+        for ix in range(1, count + 1):
+            end = size * ix // count if ix < count else size + 1
+            line_numbers = self.get_line_numbers(start, end)
+            if line_numbers:
+                ranges.append(line_numbers)
+            start = end
+        return ranges
+
+    def validate(self, types, type_name, line_numbers=None, errors='collect', struct_classes=None, intern_strings=False,
+                 enum_classes=None, uuid_format=None):
+        """
+        Decode and type-validate the non-blank lines of the buffer (see :func:`~schema_markdown.validate_jsonl`)
+
+        :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+        :param str type_name: The line value type name
+        :param line_numbers: The optional iterable of line numbers (starting at 1) to validate. The default is all lines.
+        :param str errors: The invalid line handling - "collect", "skip", or "stop"
+        :param dict struct_classes: The optional map of struct type name to struct class (see
+            :func:`~schema_markdown.validate_type`)
+        :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+        :param dict enum_classes: The optional map of enum type name to enum class (see
+            :func:`~schema_markdown.validate_type`)
+        :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+        :returns: An iterator of ``(line_number, value_or_error)`` tuples
+        :raises IndexError: A line number is out of range
+        :raises ValueError: The errors value is invalid
+        :raises ValidationError: The type name is unknown
+        """
+
+        if type_name not in types:
+            raise ValidationError(f"Unknown type {type_name!r}")
+        if errors not in ('collect', 'skip', 'stop'):
+            raise ValueError(f"Invalid errors value {errors!r}")
+        options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+        if line_numbers is None:
+            line_numbers = range(1, len(self.offsets))
+        results = _validate_lines(types, type_name, options, self._get_lines(line_numbers))
+        return _apply_errors(results, errors)
+
+    # Helper to iterate the (line_number, line) tuples of line numbers
+    def _get_lines(self, line_numbers):
+        data = self.data
+        offsets = self.offsets
+        count = len(offsets) - 1
+        for line_number in line_numbers:
+            if line_number < 1 or line_number > count:
+                raise IndexError(f'Line number {line_number} out of range')
+            start = offsets[line_number - 1]
+            end = offsets[line_number]
+            if end > start and data[end - 1] == 10:
+                end -= 1
+            yield line_number, data[start:end]
+
+
+# Helper to compute the line offsets array of a JSON Lines buffer
+def _get_line_offsets(data):
+    offsets = array('q', (0,))
+    append = offsets.append
+    find = data.find
+    pos = find(b'\n')
+    while pos != -1:
+        pos += 1
+        append(pos)
+        pos = find(b'\n', pos)
+    if offsets[-1] != len(data):
+        append(len(data))
+    return offsets
+
+
+class JSONLinesWriter:
+    """
+    A buffered `JSON Lines <https://jsonlines.org/>`__ writer. Values are encoded with one reused encoder and the
+    lines are written in large writes. Optionally, values are encoded in batches using an executor (such as a
+    :class:`~concurrent.futures.ProcessPoolExecutor`) - lines are written in order regardless.
+
+    A writer is a context manager that closes (flushes) the writer on exit. The file-like object is not closed.
+
+    :param fileobj: The file-like object with a ``write`` method
+    :param encoder: The JSON encoder - a :class:`~json.JSONEncoder` object or a function that returns a value's JSON
+        text (see :func:`~schema_markdown.get_json_serializer`). The default is a compact
+        :class:`~schema_markdown.JSONEncoder`. An executor encoder must be picklable.
+    :param int buffer_size: The buffered text length at which lines are written
+    :param encoding: The optional encoding of written bytes. If None, :class:`str` is written.
+    :type encoding: str or None
+    :param executor: The optional executor with which to encode batches of values
+    :type executor: ~concurrent.futures.Executor or None
+    :param int batch_size: The number of values per executor batch
+    :param max_pending: The maximum number of executor batches in flight. If None, the default is twice the CPU count.
+    :type max_pending: int or None
+    :raises ValueError: The encoder has an indent
+    """
+
+    __slots__ = (
+        'fileobj', 'encode', 'buffer_size', 'encoding', 'executor', 'batch_size', 'max_pending', 'buffer', 'buffer_length', 'batch',
+        'pending'
+    )
+
+    def __init__(self, fileobj, encoder=None, buffer_size=1048576, encoding=None, executor=None, batch_size=1000, max_pending=None):
+        if encoder is None:
+            encoder = JSONEncoder(separators=(',', ':'))
+        if isinstance(encoder, json.JSONEncoder):
+            if encoder.indent is not None:
+                raise ValueError('JSON Lines encoder must not indent')
+            encoder = _JSONLineEncoder(encoder)
+
+        self.fileobj = fileobj
+        self.encode = encoder
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_pending = _get_max_pending(max_pending)
+        self.buffer = []
+        self.buffer_length = 0
+        self.batch = []
+        self.pending = deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def write(self, value):
+        """
+        Write a value's line
+
+        :param object value: The value
+        """
+
+        if self.executor is None:
+            self._write_text(self.encode(value) + '\n')
+        else:
+            self.batch.append(value)
+            if len(self.batch) >= self.batch_size:
+                self._submit_batch()
+
+    def writelines(self, values):
+        """
+        Write the lines of an iterable of values
+
+        :param values: The iterable of values
+        """
+
+        for value in values:
+            self.write(value)
+
+    def flush(self):
+        """
+        Write all pending lines, wait for executor batches, and flush the file-like object, if possible
+        """
+
+        if self.batch:
+            self._submit_batch()
+        while self.pending:
+            self._write_text(self.pending.popleft().result())
+        self._write_buffer()
+        if hasattr(self.fileobj, 'flush'):
+            self.fileobj.flush()
+
+    def close(self):
+        """
+        Flush the writer
+        """
+
+        self.flush()
+
+    # Helper to submit the current executor batch - the oldest batch is written if too many batches are in flight
+    def _submit_batch(self):
+        self.pending.append(self.executor.submit(_encode_lines, self.encode, self.batch))
+        self.batch = []
+        if len(self.pending) >= self.max_pending:
+            self._write_text(self.pending.popleft().result())
+
+    # Helper to buffer text and write the buffer when it's full
+    def _write_text(self, text):
+        self.buffer.append(text)
+        self.buffer_length += len(text)
+        if self.buffer_length >= self.buffer_size:
+            self._write_buffer()
+
+    # Helper to write the buffered text
+    def _write_buffer(self):
+        if self.buffer:
+            text = ''.join(self.buffer)
+            self.buffer = []
+            self.buffer_length = 0
+            self.fileobj.write(text if self.encoding is None else text.encode(self.encoding))
+
+
+# Helper to encode a batch of values as JSON Lines text
+def _encode_lines(encode, values):
+    return '\n'.join(map(encode, values)) + '\n'
+
+
+# A picklable single-line JSON encoder function that reuses one C encoder (which is not picklable), if possible
+class _JSONLineEncoder:
+    __slots__ = ('encoder', 'iterencode')
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.iterencode = None
+
+    def __getstate__(self):
+        return self.encoder
+
+    def __setstate__(self, state):
+        self.encoder = state
+        self.iterencode = None
+
+    def __call__(self, value):
+        iterencode = self.iterencode
+        if iterencode is None:
+            iterencode = self.iterencode = self._get_iterencode()
+        try:
+            return ''.join(iterencode(value, 0))
+        except Exception:
+            # Encoding errors may leave circular reference markers - recreate the C encoder on next use
+            self.iterencode = None
+            raise
+
+    # Helper to create the iterencode function - sub-classes that override encoding use the encoder's encode method
+    def _get_iterencode(self):
+        encoder = self.encoder
+        encoder_type = type(encoder)
+        if c_make_encoder is None or encoder_type.encode is not json.JSONEncoder.encode or \
+           encoder_type.iterencode is not json.JSONEncoder.iterencode:
+            return lambda value, _: (encoder.encode(value),)
+        return c_make_encoder(
+            {} if encoder.check_circular else None,
+            encoder.default,
+            encode_basestring_ascii if encoder.ensure_ascii else encode_basestring,
+            None,
+            encoder.key_separator,
+            encoder.item_separator,
+            encoder.sort_keys,
+            encoder.skipkeys,
+            encoder.allow_nan
+        )
@@ -0,0 +1,360 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+MessagePack encoding and decoding
+"""
+
+from datetime import datetime, timedelta, timezone
+import struct
+
+from .encode import JSONEncoder
+from .schema import ValidationError, _get_validate_options, _validate_type
+
+
+def encode_msgpack(value):
+    """
+    Encode a value as `MessagePack <https://msgpack.org/>`__. :class:`~datetime.datetime`,
+    :class:`~datetime.date`, :class:`~decimal.Decimal`, :class:`~uuid.UUID`, :class:`~enum.Enum`, and
+    :class:`~schema_markdown.SchemaStruct` values are encoded the same as :class:`~schema_markdown.JSONEncoder`
+    (e.g. datetimes are ISO format strings). Floats are always encoded as 64-bit floats.
+
+    Encoding is generic - it follows the value's Python types, not a type model, so the value should be validated
+    (see :func:`~schema_markdown.validate_type`) before encoding if it must conform to a user type.
+
+    :param object value: The value to encode
+    :returns: The MessagePack :class:`bytes`
+    :raises TypeError: A value is not MessagePack-serializable
+    :raises OverflowError: An int is out of range
+    """
+
+    out = bytearray()
+    _encode(value, out)
+    return bytes(out)
+
+
+def decode_msgpack(data):
+    """
+    Decode a `MessagePack <https://msgpack.org/>`__ value. Binary values are decoded as :class:`bytes` and timestamp
+    extension values are decoded as UTC :class:`~datetime.datetime` objects. Maps with array or map keys are not
+    supported, since Python dict keys must be hashable. Data nested too deeply to decode recursively is invalid.
+
+    :param data: The MessagePack data
+    :type data: bytes or bytearray or memoryview
+    :returns: The decoded value
+    :raises ValueError: The data is invalid
+    """
+
+    data = memoryview(data).cast('B')
+    try:
+        value, pos = _decode(data, 0)
+    except (IndexError, KeyError, OverflowError, RecursionError, struct.error, UnicodeDecodeError):
+        raise ValueError('Invalid MessagePack data') from None
+    if pos != len(data):
+        raise ValueError(f'Invalid MessagePack data: extra data at offset {pos}')
+    return value
+
+
+def validate_msgpack(types, type_name, data, struct_classes=None, intern_strings=False, enum_classes=None, uuid_format=None):
+    """
+    Decode and type-validate a `MessagePack <https://msgpack.org/>`__ value using the schema-markdown user type model.
+    The data is decoded generically (see :func:`~schema_markdown.decode_msgpack`) and then validated, so the result is
+    the same as :func:`~schema_markdown.validate_type` of the decoded value. Decoding is not driven by the type model -
+    the decoded value is built in full before validation, which builds the validated value as a second copy.
+
+    :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param str type_name: The type name
+    :param data: The MessagePack data
+    :type data: bytes or bytearray or memoryview
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.validate_type`)
+    :param bool intern_strings: If True, intern enum values and dict keys (see :func:`~schema_markdown.validate_type`)
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.validate_type`)
+    :param str uuid_format: The optional validated UUID format (see :func:`~schema_markdown.validate_type`)
+    :returns: The validated, transformed value object
+    :raises ValueError: The data is invalid
+    :raises ValidationError: A validation error occurred
+    """
+
+    if type_name not in types:
+        raise ValidationError(f"Unknown type {type_name!r}")
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    return _validate_type(types, {'user': type_name}, decode_msgpack(data), None, options)
+
+
+# Non-native value conversion (e.g. datetime to string)
+_DEFAULT = JSONEncoder().default
+
+# Fixed-size value packing
+_PACK_B = struct.Struct('>B').pack
+_PACK_H = struct.Struct('>H').pack
+_PACK_I = struct.Struct('>I').pack
+_PACK_Q = struct.Struct('>Q').pack
+_PACK_SB = struct.Struct('>b').pack
+_PACK_SH = struct.Struct('>h').pack
+_PACK_SI = struct.Struct('>i').pack
+_PACK_SQ = struct.Struct('>q').pack
+_PACK_D = struct.Struct('>d').pack
+_UNPACK_H = struct.Struct('>H').unpack_from
+_UNPACK_I = struct.Struct('>I').unpack_from
+_UNPACK_Q = struct.Struct('>Q').unpack_from
+_UNPACK_SB = struct.Struct('>b').unpack_from
+_UNPACK_SH = struct.Struct('>h').unpack_from
+_UNPACK_SI = struct.Struct('>i').unpack_from
+_UNPACK_SQ = struct.Struct('>q').unpack_from
+_UNPACK_F = struct.Struct('>f').unpack_from
+_UNPACK_D = struct.Struct('>d').unpack_from
+
+
+# Helper to encode a value
+def _encode(value, out):
+    value_type = type(value)
+
+    # str?
+    if value_type is str:
+        value_bytes = value.encode('utf-8')
+        _encode_length(len(value_bytes), out, 0xa0, 32, b'\xd9', b'\xda', b'\xdb')
+        out += value_bytes
+
+    # int?
+    elif value_type is int:
+        _encode_int(value, out)
+
+    # dict?
+    elif value_type is dict:
+        _encode_length(len(value), out, 0x80, 16, None, b'\xde', b'\xdf')
+        for member_key, member_value in value.items():
+            _encode(member_key, out)
+            _encode(member_value, out)
+
+    # list or tuple?
+    elif value_type is list or value_type is tuple:
+        _encode_length(len(value), out, 0x90, 16, None, b'\xdc', b'\xdd')
+        for item in value:
+            _encode(item, out)
+
+    # float?
+    elif value_type is float:
+        out.append(0xcb)
+        out += _PACK_D(value)
+
+    # None or bool?
+    elif value is None:
+        out.append(0xc0)
+    elif value is False:
+        out.append(0xc2)
+    elif value is True:
+        out.append(0xc3)
+
+    # bytes?
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        value_bytes = bytes(value)
+        _encode_length(len(value_bytes), out, None, 0, b'\xc4', b'\xc5', b'\xc6')
+        out += value_bytes
+
+    # Sub-classes
+    elif isinstance(value, str):
+        _encode(str(value), out)
+    elif isinstance(value, int):
+        _encode(int(value), out)
+    elif isinstance(value, float):
+        _encode(float(value), out)
+    elif isinstance(value, dict):
+        _encode(dict(value), out)
+    elif isinstance(value, (list, tuple)):
+        _encode(list(value), out)
+
+    # Non-native value (e.g. datetime) - encode like the JSON encoder
+    else:
+        _encode(_DEFAULT(value), out)
+
+
+# Helper to encode a length-prefix - fix_base is the fixed-size type's base byte (or None)
+def _encode_length(length, out, fix_base, fix_limit, type8, type16, type32):
+    if length < fix_limit:
+        out.append(fix_base | length)
+    elif type8 is not None and length < 0x100:
+        out += type8
+        out.append(length)
+    elif length < 0x10000:
+        out += type16
+        out += _PACK_H(length)
+    elif length < 0x100000000:
+        out += type32
+        out += _PACK_I(length)
+    else:
+        raise OverflowError('MessagePack length out of range')
+
+
+# Helper to encode an int
+def _encode_int(value, out):
+    if 0 <= value < 0x80 or -32 <= value < 0:
+        out += _PACK_SB(value) if value < 0 else _PACK_B(value)
+    elif value >= 0:
+        if value < 0x100:
+            out.append(0xcc)
+            out.append(value)
+        elif value < 0x10000:
+            out.append(0xcd)
+            out += _PACK_H(value)
+        elif value < 0x100000000:
+            out.append(0xce)
+            out += _PACK_I(value)
+        elif value < 0x10000000000000000:
+            out.append(0xcf)
+            out += _PACK_Q(value)
+        else:
+            raise OverflowError('MessagePack int out of range')
+    elif value >= -0x80:
+        out.append(0xd0)
+        out += _PACK_SB(value)
+    elif value >= -0x8000:
+        out.append(0xd1)
+        out += _PACK_SH(value)
+    elif value >= -0x80000000:
+        out.append(0xd2)
+        out += _PACK_SI(value)
+    elif value >= -0x8000000000000000:
+        out.append(0xd3)
+        out += _PACK_SQ(value)
+    else:
+        raise OverflowError('MessagePack int out of range')
+
+
+# Helper to decode a value - returns the value and the value's end offset
+def _decode(data, pos):
+    byte = data[pos]
+    pos += 1
+
+    # Fixed-size types
+    if byte < 0x80:
+        return byte, pos
+    if byte >= 0xe0:
+        return byte - 0x100, pos
+    if byte < 0x90:
+        return _decode_map(data, pos, byte & 0x0f)
+    if byte < 0xa0:
+        return _decode_array(data, pos, byte & 0x0f)
+    if byte < 0xc0:
+        return _decode_str(data, pos, byte & 0x1f)
+
+    # Other types
+    if byte == 0xc0:
+        return None, pos
+    if byte == 0xc2:
+        return False, pos
+    if byte == 0xc3:
+        return True, pos
+    if byte == 0xcb:
+        return _UNPACK_D(data, pos)[0], pos + 8
+    if byte == 0xca:
+        return _UNPACK_F(data, pos)[0], pos + 4
+    if byte == 0xcc:
+        return data[pos], pos + 1
+    if byte == 0xcd:
+        return _UNPACK_H(data, pos)[0], pos + 2
+    if byte == 0xce:
+        return _UNPACK_I(data, pos)[0], pos + 4
+    if byte == 0xcf:
+        return _UNPACK_Q(data, pos)[0], pos + 8
+    if byte == 0xd0:
+        return _UNPACK_SB(data, pos)[0], pos + 1
+    if byte == 0xd1:
+        return _UNPACK_SH(data, pos)[0], pos + 2
+    if byte == 0xd2:
+        return _UNPACK_SI(data, pos)[0], pos + 4
+    if byte == 0xd3:
+        return _UNPACK_SQ(data, pos)[0], pos + 8
+    if byte == 0xd9:
+        return _decode_str(data, pos + 1, data[pos])
+    if byte == 0xda:
+        return _decode_str(data, pos + 2, _UNPACK_H(data, pos)[0])
+    if byte == 0xdb:
+        return _decode_str(data, pos + 4, _UNPACK_I(data, pos)[0])
+    if byte == 0xc4:
+        return _decode_bin(data, pos + 1, data[pos])
+    if byte == 0xc5:
+        return _decode_bin(data, pos + 2, _UNPACK_H(data, pos)[0])
+    if byte == 0xc6:
+        return _decode_bin(data, pos + 4, _UNPACK_I(data, pos)[0])
+    if byte == 0xdc:
+        return _decode_array(data, pos + 2, _UNPACK_H(data, pos)[0])
+    if byte == 0xdd:
+        return _decode_array(data, pos + 4, _UNPACK_I(data, pos)[0])
+    if byte == 0xde:
+        return _decode_map(data, pos + 2, _UNPACK_H(data, pos)[0])
+    if byte == 0xdf:
+        return _decode_map(data, pos + 4, _UNPACK_I(data, pos)[0])
+    if byte in _EXT_FIXED_LENGTHS:
+        return _decode_ext(data, pos + 1, _EXT_FIXED_LENGTHS[byte], _UNPACK_SB(data, pos)[0])
+    if byte == 0xc7:
+        return _decode_ext(data, pos + 2, data[pos], _UNPACK_SB(data, pos + 1)[0])
+    if byte == 0xc8:
+        return _decode_ext(data, pos + 3, _UNPACK_H(data, pos)[0], _UNPACK_SB(data, pos + 2)[0])
+    if byte == 0xc9:
+        return _decode_ext(data, pos + 5, _UNPACK_I(data, pos)[0], _UNPACK_SB(data, pos + 4)[0])
+    raise ValueError(f'Invalid MessagePack type byte 0x{byte:02x} at offset {pos - 1}')
+
+
+# The fixext type byte data lengths
+_EXT_FIXED_LENGTHS = {0xd4: 1, 0xd5: 2, 0xd6: 4, 0xd7: 8, 0xd8: 16}
+
+
+# Helper to get a byte slice - raises IndexError if the data is too short
+def _get_slice(data, pos, length):
+    end = pos + length
+    if end > len(data):
+        raise IndexError()
+    return data[pos:end], end
+
+
+def _decode_str(data, pos, length):
+    value_bytes, pos = _get_slice(data, pos, length)
+    return str(value_bytes, 'utf-8'), pos
+
+
+def _decode_bin(data, pos, length):
+    value_bytes, pos = _get_slice(data, pos, length)
+    return bytes(value_bytes), pos
+
+
+def _decode_array(data, pos, length):
+    value = []
+    for _ in range(length):
+        item, pos = _decode(data, pos)
+        value.append(item)
+    return value, pos
+
+
+def _decode_map(data, pos, length):
+    value = {}
+    for _ in range(length):
+        key_pos = pos
+        member_key, pos = _decode(data, pos)
+        if type(member_key) in (list, dict):
+            raise ValueError(f'Invalid MessagePack map key at offset {key_pos}')
+        value[member_key], pos = _decode(data, pos)
+    return value, pos
+
+
+# Helper to decode an extension value - only timestamps (type -1) are supported
+def _decode_ext(data, pos, length, ext_type):
+    value_bytes, pos = _get_slice(data, pos, length)
+    if ext_type != -1 or length not in (4, 8, 12):
+        raise ValueError(f'Unsupported MessagePack extension type {ext_type} at offset {pos - length}')
+    if length == 4:
+        seconds = _UNPACK_I(value_bytes, 0)[0]
+        nanoseconds = 0
+    elif length == 8:
+        value64 = _UNPACK_Q(value_bytes, 0)[0]
+        seconds = value64 & 0x3ffffffff
+        nanoseconds = value64 >> 34
+    else:
+        nanoseconds = _UNPACK_I(value_bytes, 0)[0]
+        seconds = _UNPACK_SQ(value_bytes, 4)[0]
+    return _EPOCH + timedelta(seconds=seconds, microseconds=nanoseconds // 1000), pos
+
+
+# The timestamp epoch
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
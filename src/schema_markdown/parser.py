@@ -5,8 +5,15 @@
 Schema Markdown parser
 """
 
+from functools import cache
+import hashlib
+import importlib.metadata
 from itertools import chain
+import marshal
+import os
 import re
+import sys
+import tempfile
 
 from .schema_util import validate_type_model_errors
 
@@ -27,7 +34,6 @@ RE_PART_ATTRS = r'(?:' + RE_PART_ATTR + r'(?:\s*,\s*' + RE_PART_ATTR + r')*)'
 RE_ATTR_GROUP = re.compile(RE_PART_ATTR_GROUP)
 RE_FIND_ATTRS = re.compile(RE_PART_ATTR + r'(?:\s*,\s*|\s*\Z)')
 RE_LINE_CONT = re.compile(r'\\s*$')
-RE_COMMENT = re.compile(r'^\s*(?:#-.*|#(?P<doc>.*))?$')
 RE_GROUP = re.compile(r'^group(?:\s+"(?P<group>.+?)")?\s*$')
 RE_ACTION = re.compile(r'^action\s+(?P<id>' + RE_PART_ID + r')')
 RE_PART_BASE_IDS = r'(?:\s*\(\s*(?P<base_ids>' + RE_PART_ID + r'(?:\s*,\s*' + RE_PART_ID + r')*)\s*\)\s*)'
@@ -55,9 +61,25 @@ RE_VALUE_QUOTED = re.compile(r'^\s+"(?P<id>.*?)"\s*$')
 RE_URL = re.compile(r'^\s+(?P<method>[A-Za-z]+|\*)(?:\s+(?P<path>/\S*))?')
 
 
+# Map of unindented line first keyword to match name and regex
+_KEYWORDS = {
+    'group': ('group', RE_GROUP),
+    'action': ('action', RE_ACTION),
+    'struct': ('definition', RE_DEFINITION),
+    'union': ('definition', RE_DEFINITION),
+    'enum': ('definition', RE_DEFINITION),
+    'typedef': ('typedef', RE_TYPEDEF)
+}
+
+
+# The action section keywords
+_SECTION_KEYWORDS = ('path', 'query', 'input', 'output', 'errors')
+
+
 def parse_schema_markdown(text, types=None, filename='', validate=True):
     """
-    Parse Schema Markdown from a string or an iterator of strings
+    Parse Schema Markdown from a string or an iterator of strings. Iterators of strings, such as an open file, are read
+    and parsed line by line, so the text is not held in memory.
 
     :param text: The Schema Markdown text
     :type text: str or ~collections.abc.Iterable(str)
@@ -68,11 +90,176 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
     :raises SchemaMarkdownParserError: A parsing error occurred
     """
 
-    # Current parser state
     if types is None:
         types = {}
     error_map = {}
     filepos = {}
+    _parse_text(text, types, filename, error_map, filepos, {})
+
+    # Validate the type model, if requested
+    if validate:
+        _add_validation_errors(types, {name: (filename, linenum) for name, linenum in filepos.items()}, error_map)
+
+    # Raise a parser exception if there are any errors
+    _raise_errors(error_map)
+
+    return types
+
+
+def parse_schema_markdown_files(paths, types=None, cache_dir=None, validate=True):
+    """
+    Parse Schema Markdown files. The type model is the same as parsing the files, in order, with
+    :func:`~schema_markdown.parse_schema_markdown` into the same type model, and validation errors are reported with
+    the file and line number of the invalid definition. Files are UTF-8 encoded.
+
+    Each file's parsed types are cached, keyed by a hash of the file's content and the library version, so unchanged
+    files are not parsed again. Parsed types are cached in-process and, if a cache directory is provided, on disk for
+    use by other processes.
+
+    :param paths: The iterable of Schema Markdown file paths
+    :param object types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :param cache_dir: The optional parse cache directory - the directory is created, if necessary
+    :type cache_dir: str or None
+    :param bool validate: If True, validate after parsing
+    :returns: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+    :raises SchemaMarkdownParserError: A parsing error occurred
+    :raises OSError: A file could not be read
+    """
+
+    if types is None:
+        types = {}
+    error_map = {}
+    filepos = {}
+    for path in paths:
+        filename = os.fspath(path)
+        with open(path, 'rb') as smd_file:
+            text_bytes = smd_file.read()
+        file_types, file_filepos, file_actionpos = _parse_file_types(text_bytes, filename, cache_dir, error_map)
+
+        # Add the file's types - redefinitions are errors, the same as parse_schema_markdown
+        for type_name, user_type in file_types.items():
+            if type_name in types:
+                if 'action' in user_type:
+                    _add_error(error_map, f"Redefinition of action '{type_name}'", filename, file_actionpos[type_name])
+                elif not _is_section_type(file_types, type_name):
+                    _add_error(error_map, f"Redefinition of type '{type_name}'", filename, file_filepos[type_name])
+            types[type_name] = user_type
+        filepos.update((name, (filename, linenum)) for name, linenum in file_filepos.items())
+
+    # Validate the type model, if requested
+    if validate:
+        _add_validation_errors(types, filepos, error_map)
+
+    # Raise a parser exception if there are any errors
+    _raise_errors(error_map)
+
+    return types
+
+
+# Helper function to get a Schema Markdown file's (types, filepos, actionpos) tuple - the parsed types are cached as
+# marshal data, so each cache hit returns new objects. Files with errors are not cached.
+def _parse_file_types(text_bytes, filename, cache_dir, error_map):
+    cache_key = hashlib.sha256(_get_parse_cache_prefix() + text_bytes).hexdigest()
+    cache_path = os.path.join(cache_dir, f'{cache_key}.marshal') if cache_dir is not None else None
+
+    # Cached?
+    cache_data = _PARSE_CACHE.get(cache_key)
+    if cache_data is None and cache_path is not None:
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                cache_data = cache_file.read()
+        except OSError:
+            pass
+    if cache_data is not None:
+        try:
+            cache_value = marshal.loads(cache_data)
+        except (EOFError, ValueError, TypeError):
+            cache_value = None
+
+        # Cache data of the wrong shape (e.g. an unrelated marshal file) is ignored and the file is parsed
+        if type(cache_value) is tuple and len(cache_value) == 3 and all(type(item) is dict for item in cache_value):
+            _set_parse_cache(cache_key, cache_data)
+            return cache_value
+
+    # Parse the file
+    file_types = {}
+    file_error_map = {}
+    file_filepos = {}
+    file_actionpos = {}
+    _parse_text(text_bytes.decode('utf-8'), file_types, filename, file_error_map, file_filepos, file_actionpos)
+    if file_error_map:
+        error_map.update(file_error_map)
+        return file_types, file_filepos, file_actionpos
+
+    # Cache the parsed types - the on-disk cache file is written atomically and write errors are ignored
+    cache_data = marshal.dumps((file_types, file_filepos, file_actionpos))
+    _set_parse_cache(cache_key, cache_data)
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(temp_fd, 'wb') as temp_file:
+                    temp_file.write(cache_data)
+                os.replace(temp_path, cache_path)
+            except OSError:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            pass
+
+    return file_types, file_filepos, file_actionpos
+
+
+# Helper function to get the parse cache key prefix - the cached marshal data is specific to the library, Python, and
+# marshal versions
+@cache
+def _get_parse_cache_prefix():
+    version = _get_parse_cache_version('schema-markdown')
+    python_version = f'{sys.version_info[0]}.{sys.version_info[1]}'
+    return f'schema-markdown {version} {_PARSE_CACHE_FORMAT} {python_version} {marshal.version}\n'.encode()
+
+
+# Helper function to get a library's parse cache version - if the library is not installed, the parser source's hash is
+# used as the library version
+def _get_parse_cache_version(distribution_name):
+    try:
+        return importlib.metadata.version(distribution_name)
+    except importlib.metadata.PackageNotFoundError:
+        with open(__file__, 'rb') as parser_file:
+            return hashlib.sha256(parser_file.read()).hexdigest()
+
+
+# Helper function to set an in-process parse cache entry - the cache is cleared when full
+def _set_parse_cache(cache_key, cache_data):
+    if cache_key not in _PARSE_CACHE and len(_PARSE_CACHE) >= _PARSE_CACHE_SIZE:
+        _PARSE_CACHE.clear()
+    _PARSE_CACHE[cache_key] = cache_data
+
+
+# The in-process parse cache - map of cache key to marshal data
+_PARSE_CACHE = {}
+_PARSE_CACHE_SIZE = 256
+
+
+# The parse cache data format version
+_PARSE_CACHE_FORMAT = 1
+
+
+# Helper function to determine if a type name is an action section type name
+def _is_section_type(types, type_name):
+    return any(
+        user_type['action'].get(section) == type_name
+        for user_type in types.values() if 'action' in user_type
+        for section in _SECTION_KEYWORDS
+    )
+
+
+# Helper function to parse Schema Markdown text into a type model - errors are added to error_map, and the line numbers
+# of definitions, members, and enum values are added to filepos. The line numbers of actions are added to actionpos.
+def _parse_text(text, types, filename, error_map, filepos, actionpos):
+
+    # Current parser state
     action = None
     urls = None
     user_type = None
@@ -82,8 +269,7 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
 
     # Helper function to add an error message
     def add_error(msg, error_filename, error_linenum):
-        error_msg = f'{error_filename}:{error_linenum}: error: {msg}'
-        error_map[error_msg] = (error_filename, error_linenum, error_msg)
+        _add_error(error_map, msg, error_filename, error_linenum)
 
     # Helper function to get documentation strings
     def get_doc():
@@ -94,20 +280,22 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
             doc = []
         return result
 
-    # Line-split all script text
+    # Line-split the script text - iterables of text parts (e.g. files) are line-split as they are parsed
     if isinstance(text, str):
-        lines = text.splitlines()
+        text_lines = text.splitlines()
     else:
-        lines = list(chain.from_iterable(text_part.splitlines() for text_part in text))
-    lines.append('')
+        text_lines = chain.from_iterable(text_part.splitlines() for text_part in text)
 
-    # Process each line
+    # Process each line - the final empty line ends any line continuation
     line_continuation = []
-    for line_part in lines:
+    for line_part in chain(text_lines, ('',)):
         linenum += 1
 
         # Line continuation?
-        line_part_no_continuation = RE_LINE_CONT.sub('', line_part)
+        if '\\' in line_part:
+            line_part_no_continuation = RE_LINE_CONT.sub('', line_part)
+        else:
+            line_part_no_continuation = line_part
         if line_continuation or line_part_no_continuation is not line_part:
             line_continuation.append(line_part_no_continuation)
         if line_part_no_continuation is not line_part:
@@ -118,37 +306,40 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
         else:
             line = line_part
 
-        # Match syntax
-        match_name, match = 'comment', RE_COMMENT.search(line)
-        if match is None:
-            match_name, match = 'group', RE_GROUP.search(line)
-        if match is None:
-            match_name, match = 'action', RE_ACTION.search(line)
-        if match is None:
-            match_name, match = 'definition', RE_DEFINITION.search(line)
-        if match is None and action is not None:
-            match_name, match = 'section', RE_SECTION.search(line)
-        if match is None and action is not None:
-            match_name, match = 'section_plain', RE_SECTION_PLAIN.search(line)
-        if match is None and user_type is not None and 'enum' in user_type:
-            match_value = RE_VALUE.search(line)
-            if match_value is not None:
-                match_name, match = 'value', match_value
-            else:
-                match_name, match = 'value', RE_VALUE_QUOTED.search(line)
-        if match is None and user_type is not None and 'struct' in user_type:
-            match_name, match = 'member', RE_MEMBER.search(line)
-        if match is None and urls is not None:
-            match_name, match = 'urls', RE_URL.search(line)
-        if match is None:
-            match_name, match = 'typedef', RE_TYPEDEF.search(line)
-        if match is None:
+        # Match syntax - lines are dispatched on indentation, parser state, and first keyword, so each line is matched
+        # with at most one pattern (comment lines aren't matched with a pattern at all)
+        match_name, match = None, None
+        line_lstrip = line.lstrip()
+        if not line_lstrip or line_lstrip[0] == '#':
+            match_name = 'comment'
+        elif not line[0].isspace():
+            keyword = _KEYWORDS.get(line.split(None, 1)[0])
+            if keyword is not None:
+                match_name, regex = keyword
+                match = regex.search(line)
+        else:
+            if action is not None:
+                if line_lstrip.startswith(_SECTION_KEYWORDS):
+                    match_name, match = 'section', RE_SECTION.search(line)
+                elif line_lstrip.startswith('urls'):
+                    match_name, match = 'section_plain', RE_SECTION_PLAIN.search(line)
+            if match is None:
+                if user_type is not None:
+                    if 'struct' in user_type:
+                        match_name, match = 'member', RE_MEMBER.search(line)
+                    elif line_lstrip[0] == '"':
+                        match_name, match = 'value', RE_VALUE_QUOTED.search(line)
+                    else:
+                        match_name, match = 'value', RE_VALUE.search(line)
+                elif urls is not None:
+                    match_name, match = 'urls', RE_URL.search(line)
+        if match is None and match_name != 'comment':
             match_name = None
 
         # Comment?
         if match_name == 'comment':
-            doc_string = match.group('doc')
-            if doc_string is not None:
+            if line_lstrip and not line_lstrip.startswith('#-'):
+                doc_string = line_lstrip[1:]
                 doc.append(doc_string if not doc_string.startswith(' ') else doc_string[1:])
 
         # Documentation group?
@@ -175,6 +366,7 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
             # Create the new action
             action = {'name': action_id}
             types[action_id] = {'action': action}
+            actionpos[action_id] = linenum
             if action_doc is not None:
                 action['doc'] = action_doc
             if doc_group is not None:
@@ -271,7 +463,7 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
 
         # Enum value?
         elif match_name == 'value':
-            value_string = match.group('id')
+            value_string = sys.intern(match.group('id'))
 
             # Add the enum value
             enum = user_type['enum']
@@ -289,7 +481,7 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
         # Struct member?
         elif match_name == 'member':
             optional = match.group('optional') is not None
-            member_name = match.group('id')
+            member_name = sys.intern(match.group('id'))
 
             # Add the member
             struct = user_type['struct']
@@ -369,27 +561,33 @@ def parse_schema_markdown(text, types=None, filename='', validate=True):
         else:
             add_error('Syntax error', filename, linenum)
 
-    # Validate the type model, if requested
-    if validate:
-        for type_name, member_name, error_msg in validate_type_model_errors(types):
-            error_filename = filename
-            error_linenum = None
-            if member_name is not None:
-                error_linenum = filepos.get(f'{type_name}.{member_name}')
-            if error_linenum is None:
-                error_linenum = filepos.get(type_name)
-            if error_linenum is None:
-                error_filename = ''
-                error_linenum = 1
-            add_error(error_msg, error_filename, error_linenum)
 
-    # Raise a parser exception if there are any errors
+# Helper function to add an error message
+def _add_error(error_map, msg, error_filename, error_linenum):
+    error_msg = f'{error_filename}:{error_linenum}: error: {msg}'
+    error_map[error_msg] = (error_filename, error_linenum, error_msg)
+
+
+# Helper function to add the type model validation errors - filepos is the map of definition and member names to
+# (filename, linenum) tuples
+def _add_validation_errors(types, filepos, error_map):
+    for type_name, member_name, error_msg in validate_type_model_errors(types):
+        error_pos = None
+        if member_name is not None:
+            error_pos = filepos.get(f'{type_name}.{member_name}')
+        if error_pos is None:
+            error_pos = filepos.get(type_name)
+        if error_pos is None:
+            error_pos = ('', 1)
+        _add_error(error_map, error_msg, *error_pos)
+
+
+# Helper function to raise a parser exception if there are any errors
+def _raise_errors(error_map):
     errors = [msg for _, _, msg in sorted(error_map.values())]
     if errors:
         raise SchemaMarkdownParserError(errors)
 
-    return types
-
 
 # Helper function to parse a typedef - returns a type-model and attributes-model tuple
 def _parse_typedef(match_typedef):
@@ -0,0 +1,282 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+"""
+Generator pipelines of decode, validate, transform, and encode stages
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import json
+from queue import Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+
+from .encode import JSONEncoder, decode_query_string, encode_query_string
+from .schema import validate_type
+
+
+class Pipeline:
+    """
+    A generator pipeline that streams source items through a sequence of stages. For example::
+
+        pipeline = schema_markdown.Pipeline(input_file).decode().validate(types, 'MyStruct').encode()
+        pipeline.run(lambda line: output_file.write(line + '\\n'))
+
+    Stages run inline by default. A "thread" stage runs (along with the stages before it) in its own thread and
+    passes items to the next stage via a bounded queue. A "process" stage maps batches of items using an executor
+    (by default, a :class:`~concurrent.futures.ProcessPoolExecutor`) with a bounded number of batches in flight. In
+    all cases, upstream stages block when downstream stages fall behind, so memory use is bounded.
+
+    :param source: The iterable of source items
+    :param int queue_size: The maximum number of items queued by a "thread" stage or in flight in a "process" stage
+    :param int batch_size: The number of items per "process" stage batch
+    """
+
+    __slots__ = ('source', 'stages', 'queue_size', 'batch_size')
+
+    def __init__(self, source, queue_size=1000, batch_size=100):
+        #: The iterable of source items
+        self.source = source
+
+        #: The list of :class:`~schema_markdown.PipelineStage` objects
+        self.stages = []
+
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+    def stage(self, name, function, mode=None, executor=None):
+        """
+        Add a stage to the pipeline
+
+        :param str name: The stage name
+        :param function: The stage function that transforms an item. The function of a "process" stage must be
+            picklable.
+        :param mode: The stage mode - None (inline), "thread", or "process"
+        :type mode: str or None
+        :param executor: The optional executor of a "process" stage
+        :type executor: ~concurrent.futures.Executor or None
+        :returns: The pipeline
+        :raises ValueError: The mode is invalid
+        """
+
+        if mode not in (None, 'thread', 'process'):
+            raise ValueError(f"Invalid pipeline stage mode {mode!r}")
+        self.stages.append(PipelineStage(name, function, mode, executor))
+        return self
+
+    def decode(self, query_string=False, mode=None, executor=None):
+        """
+        Add a stage that decodes JSON (or query string) items
+
+        :param bool query_string: If True, decode query strings (see :func:`~schema_markdown.decode_query_string`).
+            Otherwise, decode JSON (see :func:`json.loads`).
+        :param mode: The stage mode (see :meth:`stage`)
+        :type mode: str or None
+        :param executor: The optional executor of a "process" stage
+        :type executor: ~concurrent.futures.Executor or None
+        :returns: The pipeline
+        """
+
+        return self.stage('decode', decode_query_string if query_string else json.loads, mode, executor)
+
+    def validate(self, types, type_name, mode=None, executor=None, **options):
+        """
+        Add a stage that type-validates items (see :func:`~schema_markdown.validate_type`)
+
+        :param dict types: The `type model <https://craigahobbs.github.io/bare-script-py/model/#var.vURL=''&var.vName='Types'>`__
+        :param str type_name: The type name
+        :param mode: The stage mode (see :meth:`stage`)
+        :type mode: str or None
+        :param executor: The optional executor of a "process" stage
+        :type executor: ~concurrent.futures.Executor or None
+        :param options: The :func:`~schema_markdown.validate_type` keyword arguments
+        :returns: The pipeline
+        """
+
+        return self.stage('validate', partial(validate_type, types, type_name, **options), mode, executor)
+
+    def transform(self, function, mode=None, executor=None):
+        """
+        Add a stage that transforms items
+
+        :param function: The function that transforms an item
+        :param mode: The stage mode (see :meth:`stage`)
+        :type mode: str or None
+        :param executor: The optional executor of a "process" stage
+        :type executor: ~concurrent.futures.Executor or None
+        :returns: The pipeline
+        """
+
+        return self.stage('transform', function, mode, executor)
+
+    def encode(self, query_string=False, mode=None, executor=None):
+        """
+        Add a stage that encodes items as JSON (or query strings)
+
+        :param bool query_string: If True, encode query strings (see :func:`~schema_markdown.encode_query_string`).
+            Otherwise, encode JSON (see :class:`~schema_markdown.JSONEncoder`).
+        :param mode: The stage mode (see :meth:`stage`)
+        :type mode: str or None
+        :param executor: The optional executor of a "process" stage
+        :type executor: ~concurrent.futures.Executor or None
+        :returns: The pipeline
+        """
+
+        return self.stage('encode', encode_query_string if query_string else _JSON_ENCODER.encode, mode, executor)
+
+    def __iter__(self):
+        items = iter(self.source)
+        for stage in self.stages:
+            stage.count = 0
+            stage.seconds = 0.
+            if stage.mode is None:
+                items = _inline_stage(stage, items)
+            elif stage.mode == 'thread':
+                items = _thread_stage(stage, items, self.queue_size)
+            else:
+                items = _executor_stage(stage, items, self.queue_size, self.batch_size)
+        return items
+
+    def run(self, sink=None):
+        """
+        Run the pipeline
+
+        :param sink: The optional function called with each output item
+        :returns: The number of output items
+        """
+
+        count = 0
+        for item in self:
+            if sink is not None:
+                sink(item)
+            count += 1
+        return count
+
+
+class PipelineStage:
+    """
+    A :class:`~schema_markdown.Pipeline` stage and its counters. Counters are reset when the pipeline runs.
+
+    :param str name: The stage name
+    :param function: The stage function
+    :param mode: The stage mode - None (inline), "thread", or "process"
+    :type mode: str or None
+    :param executor: The optional executor of a "process" stage
+    :type executor: ~concurrent.futures.Executor or None
+    """
+
+    __slots__ = ('name', 'function', 'mode', 'executor', 'count', 'seconds')
+
+    def __init__(self, name, function, mode=None, executor=None):
+        self.name = name
+        self.function = function
+        self.mode = mode
+        self.executor = executor
+
+        #: The number of items processed
+        self.count = 0
+
+        #: The total seconds spent in the stage function
+        self.seconds = 0.
+
+    @property
+    def throughput(self):
+        """
+        The items processed per second spent in the stage function
+        """
+
+        return self.count / self.seconds if self.seconds else 0.
+
+
+# The encode stage JSON encoder
+_JSON_ENCODER = JSONEncoder()
+
+
+# Helper to run a stage inline
+def _inline_stage(stage, items):
+    function = stage.function
+    for item in items:
+        start = perf_counter()
+        value = function(item)
+        stage.seconds += perf_counter() - start
+        stage.count += 1
+        yield value
+
+
+# Helper to run a stage (and the stages before it) in a thread - values are passed via a bounded queue
+def _thread_stage(stage, items, queue_size):
+    queue = Queue(queue_size)
+    stopped = Event()
+    thread = Thread(target=_thread_stage_worker, args=(stage, items, queue, stopped), daemon=True)
+    thread.start()
+    try:
+        while True:
+            is_value, value = queue.get()
+            if is_value:
+                yield value
+            elif value is None:
+                break
+            else:
+                raise value
+    finally:
+        stopped.set()
+
+
+# The thread stage worker - puts (True, value) for values, (False, exception) on error, and (False, None) when done
+def _thread_stage_worker(stage, items, queue, stopped):
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    try:
+        for value in _inline_stage(stage, items):
+            if not put((True, value)):
+                return
+        put((False, None))
+    except Exception as exc: # pylint: disable=broad-exception-caught
+        put((False, exc))
+
+
+# Helper to run a stage in an executor - at most queue_size items are in flight
+def _executor_stage(stage, items, queue_size, batch_size):
+    max_pending = max(1, queue_size // batch_size)
+    executor = stage.executor if stage.executor is not None else ProcessPoolExecutor()
+    try:
+        pending = deque()
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                pending.append(executor.submit(_map_batch, stage.function, batch))
+                batch = []
+                if len(pending) >= max_pending:
+                    yield from _batch_result(stage, pending.popleft())
+        if batch:
+            pending.append(executor.submit(_map_batch, stage.function, batch))
+        while pending:
+            yield from _batch_result(stage, pending.popleft())
+    finally:
+        if stage.executor is None:
+            executor.shutdown(cancel_futures=True)
+
+
+# Helper to map a function over a batch of items - returns the values and the seconds elapsed
+def _map_batch(function, items):
+    start = perf_counter()
+    values = [function(item) for item in items]
+    return values, perf_counter() - start
+
+
+# Helper to get an executor stage batch's values and update the stage's counters
+def _batch_result(stage, future):
+    values, seconds = future.result()
+    stage.count += len(values)
+    stage.seconds += seconds
+    return values
@@ -7,7 +7,10 @@ schema-markdown schema type model
 
 from datetime import date, datetime, timezone
 from decimal import Decimal
+from enum import Enum
 from math import isnan, isinf
+import re
+import sys
 from uuid import UUID
 
 from .schema_util import validate_type_model_errors
@@ -109,8 +112,12 @@ class ValidationError(Exception):
         #: The fully qualified member name or None
         self.member = member_fqn
 
+    def __reduce__(self):
+        return (type(self), (str(self), self.member))
 
-def validate_type(types, type_name, value, member_fqn=None):
+
+def validate_type(types, type_name, value, member_fqn=None, struct_classes=None, intern_strings=False, enum_classes=None,
+                  uuid_format=None):
     """
     Type-validate a value using the schema-markdown user type model. Container values are duplicated
     since some member types are transformed during validation.
@@ -119,16 +126,53 @@ def validate_type(types, type_name, value, member_fqn=None):
     :param str type_name: The type name
     :param object value: The value object to validate
     :param str member_fqn: The fully-qualified member name
+    :param dict struct_classes: The optional map of struct type name to struct class (see
+        :func:`~schema_markdown.get_struct_classes` and :func:`~schema_markdown.get_struct_tuples`). Validated structs
+        of these types are created by calling the struct class with the validated members as keyword arguments.
+    :param bool intern_strings: If True, enum values are the type model's enum value strings and dict keys are
+        interned (see :func:`sys.intern`). Struct member names are always the type model's member name strings.
+    :param dict enum_classes: The optional map of enum type name to enum class (see
+        :func:`~schema_markdown.get_enum_classes`). Validated enum values of these types are the enum class members.
+        Dict keys remain enum value strings.
+    :param str uuid_format: The optional validated UUID format - "string" for canonical lowercase UUID strings or
+        "bytes" for 16-byte :class:`bytes`. By default, validated UUIDs are :class:`~uuid.UUID` objects.
     :returns: The validated, transformed value object
     :raises ValidationError: A validation error occurred
     """
 
     if type_name not in types:
         raise ValidationError(f"Unknown type {type_name!r}")
-    return _validate_type(types, {'user': type_name}, value, member_fqn)
+    options = _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format)
+    return _validate_type(types, {'user': type_name}, value, member_fqn, options)
+
+
+# Helper to create the validate_type options - returns None if there are no options
+def _get_validate_options(struct_classes, intern_strings, enum_classes, uuid_format):
+    if uuid_format not in (None, 'string', 'bytes'):
+        raise ValueError(f"Invalid UUID format {uuid_format!r}")
+    if struct_classes is None and not intern_strings and enum_classes is None and uuid_format is None:
+        return None
+    return _ValidateOptions(struct_classes, intern_strings, enum_classes, uuid_format)
+
+
+# The validate_type options
+class _ValidateOptions:
+    __slots__ = ('struct_classes', 'intern_strings', 'enum_classes', 'uuid_format')
+
+    def __init__(self, struct_classes, intern_strings, enum_classes, uuid_format):
+        self.struct_classes = struct_classes
+        self.intern_strings = intern_strings
+        self.enum_classes = enum_classes
+        self.uuid_format = uuid_format
 
 
-def _validate_type(types, type_, value, member_fqn=None):
+# Canonical UUID string regular expressions
+_RE_PART_UUID = r'[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}'
+_RE_UUID = re.compile(_RE_PART_UUID)
+_RE_UUID_ARRAY = re.compile(r'(?:' + _RE_PART_UUID + r'\n)*' + _RE_PART_UUID)
+
+
+def _validate_type(types, type_, value, member_fqn=None, options=None):
     value_new = value
 
     # Built-in type?
@@ -224,17 +268,27 @@ def _validate_type(types, type_, value, member_fqn=None):
 
         # uuid?
         elif builtin == 'uuid':
+            uuid_format = options.uuid_format if options is not None else None
 
-            # Convert string?
-            if isinstance(value, str):
-                try:
-                    value_new = UUID(value)
-                except ValueError:
+            # Canonical UUID string with a UUID format? If so, skip UUID object construction.
+            if uuid_format is not None and isinstance(value, str) and _RE_UUID.fullmatch(value) is not None:
+                value_new = value.lower() if uuid_format == 'string' else bytes.fromhex(value.replace('-', ''))
+
+            else:
+                # Convert string?
+                if isinstance(value, str):
+                    try:
+                        value_new = UUID(value)
+                    except ValueError:
+                        raise _member_error(type_, value, member_fqn)
+
+                # Not a UUID?
+                elif not isinstance(value, UUID):
                     raise _member_error(type_, value, member_fqn)
 
-            # Not a UUID?
-            elif not isinstance(value, UUID):
-                raise _member_error(type_, value, member_fqn)
+                # Format the UUID
+                if uuid_format is not None:
+                    value_new = f'{value_new}' if uuid_format == 'string' else value_new.bytes
 
     # array?
     elif 'array' in type_:
@@ -248,6 +302,13 @@ def _validate_type(types, type_, value, member_fqn=None):
         elif not isinstance(value, (list, tuple)):
             raise _member_error(type_, value, member_fqn)
 
+        # Array of canonical UUID strings with a UUID format? If so, validate and format the array all at once.
+        if options is not None and options.uuid_format is not None and array_attr is None and \
+           array_type.get('builtin') == 'uuid' and value_new:
+            value_copy = _validate_uuid_array(value_new, options.uuid_format)
+            if value_copy is not None:
+                return value_copy
+
         # Validate the list contents
         value_copy = []
         array_value_nullable = array_attr is not None and 'nullable' in array_attr and array_attr['nullable']
@@ -256,7 +317,7 @@ def _validate_type(types, type_, value, member_fqn=None):
             if array_value_nullable and (array_value is None or array_value == 'null'):
                 array_value = None
             else:
-                array_value = _validate_type(types, array_type, array_value, member_fqn_value)
+                array_value = _validate_type(types, array_type, array_value, member_fqn_value, options)
                 _validate_attr(array_type, array_attr, array_value, member_fqn_value)
             value_copy.append(array_value)
 
@@ -279,23 +340,18 @@ def _validate_type(types, type_, value, member_fqn=None):
 
         # Validate the dict key/value pairs
         value_copy = {}
-        dict_key_nullable = dict_key_attr is not None and 'nullable' in dict_key_attr and dict_key_attr['nullable']
         dict_value_nullable = dict_attr is not None and 'nullable' in dict_attr and dict_attr['nullable']
         for dict_key, dict_value in value_new.items():
             member_fqn_key = dict_key if member_fqn is None else f'{member_fqn}.{dict_key}'
 
             # Validate the key
-            if dict_key_nullable and (dict_key is None or dict_key == 'null'):
-                dict_key = None
-            else:
-                dict_key = _validate_type(types, dict_key_type, dict_key, member_fqn)
-                _validate_attr(dict_key_type, dict_key_attr, dict_key, member_fqn)
+            dict_key = _validate_dict_key(types, dict_key_type, dict_key_attr, dict_key, member_fqn, options)
 
             # Validate the value
             if dict_value_nullable and (dict_value is None or dict_value == 'null'):
                 dict_value = None
             else:
-                dict_value = _validate_type(types, dict_type, dict_value, member_fqn_key)
+                dict_value = _validate_type(types, dict_type, dict_value, member_fqn_key, options)
                 _validate_attr(dict_type, dict_attr, dict_value, member_fqn_key)
 
             # Copy the key/value
@@ -322,15 +378,30 @@ def _validate_type(types, type_, value, member_fqn=None):
             if value_nullable and (value is None or value == 'null'):
                 value_new = None
             else:
-                value_new = _validate_type(types, typedef['type'], value, member_fqn)
+                value_new = _validate_type(types, typedef['type'], value, member_fqn, options)
                 _validate_attr(type_, typedef_attr, value_new, member_fqn)
 
         # enum?
         elif 'enum' in user_type:
             enum = user_type['enum']
 
+            # Enum class member?
+            if options is not None and options.enum_classes is not None and type_['user'] in options.enum_classes:
+                enum_class = options.enum_classes[type_['user']]
+                if not isinstance(value, enum_class):
+                    try:
+                        value_new = enum_class[value]
+                    except (KeyError, TypeError):
+                        raise _member_error(type_, value, member_fqn) from None
+
             # Not a valid enum value?
-            if value not in (enum_value['name'] for enum_value in get_enum_values(types, enum)):
+            elif options is not None and options.intern_strings:
+                value_new = next(
+                    (enum_value['name'] for enum_value in get_enum_values(types, enum) if enum_value['name'] == value), None
+                )
+                if value_new is None:
+                    raise _member_error(type_, value, member_fqn)
+            elif value not in (enum_value['name'] for enum_value in get_enum_values(types, enum)):
                 raise _member_error(type_, value, member_fqn)
 
         # struct?
@@ -367,7 +438,7 @@ def _validate_type(types, type_, value, member_fqn=None):
                     if member_nullable and (member_value is None or member_value == 'null'):
                         member_value = None
                     else:
-                        member_value = _validate_type(types, member['type'], member_value, member_fqn_member)
+                        member_value = _validate_type(types, member['type'], member_value, member_fqn_member, options)
                         _validate_attr(member['type'], member.get('attr'), member_value, member_fqn_member)
 
                     # Copy the validated member
@@ -382,10 +453,44 @@ def _validate_type(types, type_, value, member_fqn=None):
 
             # Return the validated, transformed copy
             value_new = value_copy
+            if options is not None and options.struct_classes is not None and type_['user'] in options.struct_classes:
+                value_new = options.struct_classes[type_['user']](**value_copy)
 
     return value_new
 
 
+# Helper to validate a dict key
+def _validate_dict_key(types, dict_key_type, dict_key_attr, dict_key, member_fqn, options):
+    if dict_key_attr is not None and dict_key_attr.get('nullable', False) and (dict_key is None or dict_key == 'null'):
+        return None
+
+    dict_key = _validate_type(types, dict_key_type, dict_key, member_fqn, options)
+    _validate_attr(dict_key_type, dict_key_attr, dict_key, member_fqn)
+
+    # Dict keys are enum value strings
+    if options is not None:
+        if isinstance(dict_key, Enum):
+            dict_key = dict_key.name
+        if options.intern_strings and isinstance(dict_key, str):
+            dict_key = sys.intern(dict_key)
+
+    return dict_key
+
+
+# Helper to validate and format an array of canonical UUID strings - returns None if any value is not a canonical UUID
+def _validate_uuid_array(values, uuid_format):
+    try:
+        values_str = '\n'.join(values)
+    except TypeError:
+        return None
+    if len(values_str) != 37 * len(values) - 1 or _RE_UUID_ARRAY.fullmatch(values_str) is None:
+        return None
+    if uuid_format == 'string':
+        return values_str.lower().split('\n')
+    values_bytes = bytes.fromhex(values_str.replace('-', '').replace('\n', ''))
+    return [values_bytes[ix:ix + 16] for ix in range(0, len(values_bytes), 16)]
+
+
 def _member_error(type_, value, member_fqn, attr=None):
     member_part = f" for member {member_fqn!r}" if member_fqn else ''
     type_name = type_['builtin'] if 'builtin' in type_ else (
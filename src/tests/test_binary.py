@@ -0,0 +1,241 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+from array import array
+from datetime import datetime, timedelta, timezone
+import json
+import unittest
+from uuid import UUID
+
+from schema_markdown import BinaryCodec, JSONEncoder, ValidationError, parse_schema_markdown, validate_type
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional string b
+    optional float c
+    optional bool d
+    optional date e
+    optional datetime f
+    optional uuid g
+    optional object h
+    optional any i
+    optional MyEnum j
+    optional MyStruct(nullable) child
+    optional MyUnion[] unions
+    optional MyTypedef{} dict
+    optional int(nullable)[] nullables
+    optional MyEnum(nullable) : float(nullable) {} counts
+    optional MyTypedefNullable typedefNullable
+
+union MyUnion
+    int c
+    date d
+
+enum MyEnum
+    A
+    B
+
+struct MyEmpty
+
+struct MyRequired
+    int a
+    string b
+
+typedef MyUnion MyTypedef
+
+typedef MyStruct(nullable) MyTypedefNullable
+
+typedef MyStruct[] MyStructs
+
+struct MyEmptyPair
+    MyEmpty a
+    MyEmpty b
+
+typedef MyEmptyPair[] MyEmptyPairs
+
+typedef MyEmpty MyEmptyTypedef
+
+typedef MyEmptyTypedef[] MyEmptyTypedefs
+
+struct MyRecursive
+    optional MyRecursive child
+''')
+
+
+class TestBinaryCodec(unittest.TestCase):
+
+    def assert_round_trip(self, type_name, value, expected_data=None):
+        value = validate_type(TEST_TYPES, type_name, value)
+        codec = BinaryCodec(TEST_TYPES, type_name)
+        data = codec.encode(value)
+        self.assertIsInstance(data, bytes)
+        if expected_data is not None:
+            self.assertEqual(data, expected_data)
+        value_decoded = codec.decode(data)
+        self.assertEqual(value_decoded, value)
+        self.assertEqual(json.dumps(value_decoded, cls=JSONEncoder), json.dumps(value, cls=JSONEncoder))
+        return data
+
+    def test_struct(self):
+        data = self.assert_round_trip('MyStruct', {
+            'a': -1,
+            'b': 'café',
+            'c': 1.5,
+            'd': True,
+            'e': '2020-06-17',
+            'f': '2020-06-17T12:30:00.123456+00:00',
+            'g': 'AE8F3B7E-6E9E-4F5D-8B7A-5C7E3F9E1A2B',
+            'h': {'x': [1, {'y': None}]},
+            'i': [1, 'two'],
+            'j': 'B',
+            'child': {'a': 2, 'child': None},
+            'unions': [{'c': 3}, {'d': '2020-06-18'}],
+            'dict': {'x': {'c': 4}},
+            'nullables': [1, None],
+            'counts': {'A': 1.5, None: None},
+            'typedefNullable': None
+        })
+        self.assertLess(len(data), len(json.dumps(BinaryCodec(TEST_TYPES, 'MyStruct').decode(data), cls=JSONEncoder)) // 2)
+
+    def test_struct_minimal(self):
+        self.assert_round_trip('MyStruct', {'a': 1}, b'\x00\x02')
+
+    def test_struct_optional(self):
+        self.assert_round_trip('MyStruct', {'a': 300, 'b': 'abc'}, b'\x01\xd8\x04\x03abc')
+
+    def test_struct_empty(self):
+        self.assert_round_trip('MyEmpty', {}, b'')
+
+    def test_struct_required(self):
+        self.assert_round_trip('MyRequired', {'a': 1, 'b': ''}, b'\x02\x00')
+
+    def test_union(self):
+        self.assert_round_trip('MyUnion', {'d': '0001-01-02'}, b'\x01\x02')
+
+    def test_typedef_array(self):
+        self.assert_round_trip('MyStructs', [{'a': 1}, {'a': 2, 'child': {'a': 3}}], b'\x02\x00\x02\x80\x04\x04\x01\x00\x06')
+        self.assert_round_trip('MyStructs', [], b'\x00')
+
+    def test_typedef_nullable(self):
+        self.assert_round_trip('MyTypedefNullable', None, b'\x00')
+        self.assert_round_trip('MyTypedefNullable', {'a': 1}, b'\x01\x00\x02')
+
+    def test_ints(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyRequired')
+        for value in (0, 1, -1, 63, -64, 64, -65, 2 ** 63, -(2 ** 63), 10 ** 30):
+            with self.subTest(value=value):
+                self.assertEqual(codec.decode(codec.encode({'a': value, 'b': ''})), {'a': value, 'b': ''})
+
+    def test_datetimes(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyStruct')
+        for value, expected in (
+            (datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc), datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc)),
+            (
+                datetime(1969, 12, 31, 23, 59, 59, 999999, tzinfo=timezone.utc),
+                datetime(1969, 12, 31, 23, 59, 59, 999999, tzinfo=timezone.utc)
+            ),
+            (datetime(2020, 6, 17, 12, 30), datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc)),
+            (datetime(2020, 6, 17, 12, 30, tzinfo=timezone(timedelta(hours=5))), datetime(2020, 6, 17, 7, 30, tzinfo=timezone.utc))
+        ):
+            with self.subTest(value=value):
+                value_decoded = codec.decode(codec.encode({'a': 1, 'f': value}))['f']
+                self.assertEqual(value_decoded, expected)
+                self.assertIs(value_decoded.tzinfo, timezone.utc)
+
+    def test_uuid_formats(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyStruct')
+        uuid = UUID('ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b')
+        expected = b'\x20\x02' + uuid.bytes
+        for uuid_format in ('string', 'bytes'):
+            with self.subTest(uuid_format=uuid_format):
+                value = validate_type(TEST_TYPES, 'MyStruct', {'a': 1, 'g': str(uuid)}, uuid_format=uuid_format)
+                self.assertEqual(codec.encode(value), expected)
+                self.assertEqual(codec.decode(expected), {'a': 1, 'g': uuid})
+
+    def test_decode_memoryview(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyRequired')
+        data = codec.encode({'a': 1, 'b': 'abc'})
+        self.assertEqual(codec.decode(memoryview(data)), {'a': 1, 'b': 'abc'})
+        self.assertEqual(codec.decode(bytearray(data)), {'a': 1, 'b': 'abc'})
+        self.assertEqual(codec.decode(memoryview(array('B', data)).cast('B', (len(data),))), {'a': 1, 'b': 'abc'})
+
+    def test_decode_from(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyRequired')
+        values = [{'a': ix, 'b': 'x' * ix} for ix in range(5)]
+        data = memoryview(b''.join(codec.encode(value) for value in values))
+        values_decoded = []
+        offset = 0
+        while offset < len(data):
+            value, offset = codec.decode_from(data, offset)
+            values_decoded.append(value)
+        self.assertListEqual(values_decoded, values)
+
+    def test_decode_error(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyStruct')
+        for data, message in (
+            (b'', 'Invalid binary data at offset 0'),
+            (b'\x00', 'Invalid binary data at offset 0'),
+            (b'\x01\x02\x05abc', 'Invalid binary data at offset 0'),
+            (b'\x01\x02\x02\xff\xfe', 'Invalid binary data at offset 0'),
+            (b'\x00\x80', 'Invalid binary data at offset 0'),
+            (b'\x40\x02abc', 'Invalid binary data at offset 0'),
+            (b'\x20\x02' + b'\x00' * 15, 'Invalid binary data at offset 0'),
+            (b'\x00\x02\x00', 'Invalid binary data: extra data at offset 2')
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError) as cm_exc:
+                    codec.decode(data)
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_decode_error_length(self):
+        for type_name, data in (
+            ('MyStructs', b'\xff\xff\xff\x7f\x00'),
+            ('MyStruct', b'\x80\x08\x00\xff\xff\xff\x7f\x00\x00'),
+            ('MyStruct', b'\x80\x10\x00\xff\xff\xff\x7f\x01a\x00\x02')
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError) as cm_exc:
+                    BinaryCodec(TEST_TYPES, type_name).decode(data)
+                self.assertEqual(str(cm_exc.exception), 'Invalid binary data at offset 0')
+
+    def test_zero_width_array(self):
+        self.assert_round_trip('MyEmptyPairs', [{'a': {}, 'b': {}}] * 3, b'\x03')
+        self.assert_round_trip('MyEmptyPairs', [{'a': {}, 'b': {}}] * 65536, b'\x80\x80\x04')
+        codec = BinaryCodec(TEST_TYPES, 'MyEmptyPairs')
+        with self.assertRaises(ValueError) as cm_exc:
+            codec.decode(b'\x81\x80\x04')
+        self.assertEqual(str(cm_exc.exception), 'Invalid binary data at offset 0')
+        with self.assertRaises(ValueError) as cm_exc:
+            codec.decode(b'\xff\xff\xff\x7f')
+        self.assertEqual(str(cm_exc.exception), 'Invalid binary data at offset 0')
+
+    def test_zero_width_typedef(self):
+        self.assert_round_trip('MyEmptyTypedefs', [{}, {}], b'\x02')
+
+    def test_decode_error_recursion(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyRecursive')
+        self.assertEqual(codec.decode(b'\x01\x01\x00'), {'child': {'child': {}}})
+        with self.assertRaises(ValueError) as cm_exc:
+            codec.decode(b'\x01' * 100000 + b'\x00')
+        self.assertEqual(str(cm_exc.exception), 'Invalid binary data at offset 0')
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            BinaryCodec(TEST_TYPES, 'Unknown')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_decode_error_enum(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyStruct')
+        with self.assertRaises(ValueError) as cm_exc:
+            codec.decode(b'\x80\x02\x02\x05')
+        self.assertEqual(str(cm_exc.exception), 'Invalid binary data at offset 0')
+
+    def test_decode_error_union(self):
+        codec = BinaryCodec(TEST_TYPES, 'MyUnion')
+        with self.assertRaises(ValueError) as cm_exc:
+            codec.decode_from(b'\x00\x00\x02\x00', 2)
+        self.assertEqual(str(cm_exc.exception), 'Invalid binary data at offset 2')
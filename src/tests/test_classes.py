@@ -0,0 +1,333 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum, IntEnum
+import json
+import pickle
+import unittest
+
+from schema_markdown import JSONEncoder, SchemaStruct, StructTupleJSONEncoder, ValidationError, encode_query_string, get_enum_classes, \
+    get_struct_classes, get_struct_tuples, parse_schema_markdown, validate_json, validate_type
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyBase
+    int a
+
+struct MyBase2
+    optional string b
+
+typedef MyBase2 MyBase2Typedef
+
+struct MyStruct (MyBase, MyBase2Typedef)
+    optional MyStruct child
+    MyUnion[] unions
+
+union MyUnion
+    int c
+    string d
+
+enum MyEnum
+    A
+''')
+
+
+# Picklable struct classes and struct tuples are module attributes
+PICKLE_STRUCT_CLASSES = get_struct_classes(parse_schema_markdown('''\
+struct MyPickleStruct
+    int a
+    optional MyPickleStruct child
+'''), module=__name__)
+globals().update(PICKLE_STRUCT_CLASSES)
+PICKLE_STRUCT_TUPLES = get_struct_tuples(parse_schema_markdown('''\
+struct MyPickleTuple
+    int a
+
+struct MyPickleKeyword
+    int class
+    optional MyPickleTuple b
+'''), module=__name__)
+globals().update(PICKLE_STRUCT_TUPLES)
+
+
+# Helper to round-trip a value through a worker process
+def _round_trip_process(value):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_identity, value).result()
+
+
+def _identity(value):
+    return value
+
+
+class TestStructClasses(unittest.TestCase):
+
+    def test_get_struct_classes(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        self.assertListEqual(sorted(struct_classes.keys()), ['MyBase', 'MyBase2', 'MyStruct', 'MyUnion'])
+
+        my_base = struct_classes['MyBase']
+        self.assertEqual(my_base.__name__, 'MyBase')
+        self.assertTupleEqual(my_base.__bases__, (SchemaStruct,))
+        self.assertTupleEqual(my_base.__slots__, ('a',))
+
+        my_struct = struct_classes['MyStruct']
+        self.assertTupleEqual(my_struct.__bases__, (my_base,))
+        self.assertTupleEqual(my_struct.__slots__, ('b', 'child', 'unions'))
+        self.assertTrue(issubclass(my_struct, my_base))
+
+    def test_struct_class(self):
+        my_struct = get_struct_classes(TEST_TYPES)['MyStruct']
+        value = my_struct(a=1, unions=[])
+        self.assertFalse(hasattr(value, '__dict__'))
+        self.assertEqual(value.a, 1)
+        self.assertListEqual(value.unions, [])
+        self.assertFalse(hasattr(value, 'b'))
+        self.assertEqual(repr(value), 'MyStruct(a=1, unions=[])')
+        self.assertEqual(value, my_struct(unions=[], a=1))
+        self.assertNotEqual(value, my_struct(a=2, unions=[]))
+        self.assertNotEqual(value, {'a': 1, 'unions': []})
+
+    def test_struct_class_typedef_base(self):
+        types = parse_schema_markdown('''\
+struct MyBase
+    int a
+
+typedef MyBase MyBaseTypedef
+
+typedef MyBaseTypedef MyBaseTypedef2
+
+struct MyStruct (MyBaseTypedef2)
+    int b
+''')
+        struct_classes = get_struct_classes(types)
+        my_struct = struct_classes['MyStruct']
+        self.assertTupleEqual(my_struct.__bases__, (struct_classes['MyBase'],))
+        self.assertTupleEqual(my_struct.__slots__, ('b',))
+        self.assertEqual(repr(my_struct(a=1, b=2)), 'MyStruct(a=1, b=2)')
+
+    def test_struct_class_self_member(self):
+        types = parse_schema_markdown('struct MyStruct\n    int self\n    optional int other\n')
+        struct_classes = get_struct_classes(types)
+        my_struct = struct_classes['MyStruct']
+        self.assertEqual(validate_type(types, 'MyStruct', {'self': 1}, struct_classes=struct_classes), my_struct(self=1))
+        self.assertEqual(
+            validate_json(types, 'MyStruct', '{"self": 1, "other": 2}', struct_classes=struct_classes),
+            my_struct(self=1, other=2)
+        )
+
+    def test_struct_class_pickle(self):
+        my_struct = PICKLE_STRUCT_CLASSES['MyPickleStruct']
+        self.assertEqual(my_struct.__module__, __name__)
+        value = my_struct(a=1, child=my_struct(a=2))
+        self.assertEqual(pickle.loads(pickle.dumps(value)), value)
+        value_process = _round_trip_process(value)
+        self.assertIs(type(value_process), my_struct)
+        self.assertEqual(value_process, value)
+
+    def test_struct_class_pickle_no_module(self):
+        value = get_struct_classes(TEST_TYPES)['MyBase'](a=1)
+        with self.assertRaises(pickle.PicklingError):
+            pickle.dumps(value)
+
+    def test_struct_class_unknown_member(self):
+        my_base = get_struct_classes(TEST_TYPES)['MyBase']
+        with self.assertRaises(AttributeError):
+            my_base(a=1, b=2)
+
+    def test_validate_type(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        value = validate_type(TEST_TYPES, 'MyStruct', {
+            'a': '1',
+            'b': 'abc',
+            'child': {'a': 2, 'unions': [{'d': 'def'}]},
+            'unions': [{'c': '3'}]
+        }, struct_classes=struct_classes)
+        my_struct = struct_classes['MyStruct']
+        my_union = struct_classes['MyUnion']
+        self.assertIsInstance(value, my_struct)
+        self.assertEqual(value, my_struct(a=1, b='abc', child=my_struct(a=2, unions=[my_union(d='def')]), unions=[my_union(c=3)]))
+
+    def test_validate_type_partial(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        del struct_classes['MyUnion']
+        value = validate_type(TEST_TYPES, 'MyStruct', {'a': 1, 'unions': [{'c': 3}]}, struct_classes=struct_classes)
+        self.assertEqual(value, struct_classes['MyStruct'](a=1, unions=[{'c': 3}]))
+
+    def test_validate_type_error(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(TEST_TYPES, 'MyStruct', {'a': 1, 'unions': [{'c': 3, 'd': 'abc'}]}, struct_classes=struct_classes)
+        self.assertEqual(
+            str(cm_exc.exception),
+            "Invalid value {'c': 3, 'd': 'abc'} (type 'dict') for member 'unions.0', expected type 'MyUnion'"
+        )
+
+    def test_json_encoder(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        value = validate_type(TEST_TYPES, 'MyStruct', {
+            'a': 1,
+            'child': {'a': 2, 'unions': [{'d': 'def'}]},
+            'unions': [{'c': 3}]
+        }, struct_classes=struct_classes)
+        self.assertEqual(
+            json.dumps(value, cls=JSONEncoder),
+            '{"a": 1, "child": {"a": 2, "unions": [{"d": "def"}]}, "unions": [{"c": 3}]}'
+        )
+
+    def test_encode_query_string(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        value = validate_type(TEST_TYPES, 'MyStruct', {
+            'a': 1,
+            'b': 'x y',
+            'unions': [{'c': 3}]
+        }, struct_classes=struct_classes)
+        self.assertEqual(encode_query_string(value), 'a=1&b=x%20y&unions.0.c=3')
+
+
+class TestStructTuples(unittest.TestCase):
+
+    def test_get_struct_tuples(self):
+        struct_tuples = get_struct_tuples(TEST_TYPES)
+        self.assertListEqual(sorted(struct_tuples.keys()), ['MyBase', 'MyBase2', 'MyStruct', 'MyUnion'])
+        my_struct = struct_tuples['MyStruct']
+        self.assertTupleEqual(my_struct._fields, ('a', 'b', 'child', 'unions'))
+        self.assertTupleEqual(my_struct(a=1, unions=[]), (1, None, None, []))
+
+    def test_get_struct_tuples_unnamed(self):
+        struct_tuples = get_struct_tuples(TEST_TYPES, named=False)
+        self.assertListEqual(sorted(struct_tuples.keys()), ['MyBase', 'MyBase2', 'MyStruct', 'MyUnion'])
+        value = struct_tuples['MyStruct'](unions=[], a=1)
+        self.assertIs(type(value), tuple)
+        self.assertTupleEqual(value, (1, None, None, []))
+
+    def test_get_struct_tuples_keyword_member(self):
+        types = parse_schema_markdown('struct MyStruct\n    int class\n    optional string b\n')
+        struct_tuples = get_struct_tuples(types)
+        value = validate_type(types, 'MyStruct', {'class': 1}, struct_classes=struct_tuples)
+        self.assertIsInstance(value, struct_tuples['MyStruct'])
+        self.assertTupleEqual(value._fields, ('_0', 'b'))
+        self.assertTupleEqual(value, (1, None))
+        self.assertEqual(json.dumps(value, cls=StructTupleJSONEncoder, types=types, type_name='MyStruct'), '{"class": 1}')
+
+    def test_get_struct_tuples_pickle(self):
+        my_keyword = PICKLE_STRUCT_TUPLES['MyPickleKeyword']
+        my_tuple = PICKLE_STRUCT_TUPLES['MyPickleTuple']
+        value = my_keyword(**{'class': 1, 'b': my_tuple(a=2)})
+        self.assertEqual(my_keyword.__module__, __name__)
+        self.assertTupleEqual(pickle.loads(pickle.dumps(value)), (1, (2,)))
+        value_process = _round_trip_process(value)
+        self.assertIs(type(value_process), my_keyword)
+        self.assertIs(type(value_process.b), my_tuple)
+        self.assertTupleEqual(value_process, (1, (2,)))
+        self.assertTupleEqual(value_process._replace(_0=3), (3, (2,)))
+
+    def test_validate_type(self):
+        struct_tuples = get_struct_tuples(TEST_TYPES)
+        value = validate_type(TEST_TYPES, 'MyStruct', {
+            'a': '1',
+            'child': {'a': 2, 'unions': [{'d': 'def'}]},
+            'unions': [{'c': '3'}]
+        }, struct_classes=struct_tuples)
+        self.assertIsInstance(value, struct_tuples['MyStruct'])
+        self.assertEqual(value.child.unions[0].d, 'def')
+        self.assertTupleEqual(value, (1, None, (2, None, None, [(None, 'def')]), [(3, None)]))
+
+    def test_validate_type_unnamed(self):
+        struct_tuples = get_struct_tuples(TEST_TYPES, named=False)
+        value = validate_type(TEST_TYPES, 'MyStruct', {
+            'a': '1',
+            'child': {'a': 2, 'unions': [{'d': 'def'}]},
+            'unions': [{'c': '3'}]
+        }, struct_classes=struct_tuples)
+        self.assertTupleEqual(value, (1, None, (2, None, None, [(None, 'def')]), [(3, None)]))
+
+
+class TestEnumClasses(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+enum MyBaseEnum
+    A
+    B
+
+typedef MyBaseEnum MyBaseEnumTypedef
+
+enum MyEnum (MyBaseEnumTypedef)
+    C
+    "D E"
+
+struct MyStruct
+    MyEnum value
+    MyEnum(nullable)[] values
+    MyEnum : int {} counts
+''')
+
+    def test_get_enum_classes(self):
+        enum_classes = get_enum_classes(self.TYPES)
+        self.assertListEqual(sorted(enum_classes.keys()), ['MyBaseEnum', 'MyEnum'])
+        my_enum = enum_classes['MyEnum']
+        self.assertTrue(issubclass(my_enum, Enum))
+        self.assertFalse(issubclass(my_enum, IntEnum))
+        self.assertListEqual([(value.name, value.value) for value in my_enum], [('A', 'A'), ('B', 'B'), ('C', 'C'), ('D E', 'D E')])
+
+    def test_get_enum_classes_int_enum(self):
+        enum_classes = get_enum_classes(self.TYPES, int_enum=True)
+        self.assertListEqual(sorted(enum_classes.keys()), ['MyBaseEnum', 'MyEnum'])
+        my_enum = enum_classes['MyEnum']
+        self.assertTrue(issubclass(my_enum, IntEnum))
+        self.assertListEqual([(value.name, value.value) for value in my_enum], [('A', 1), ('B', 2), ('C', 3), ('D E', 4)])
+
+    def test_get_enum_classes_reserved(self):
+        types = parse_schema_markdown('''\
+enum MyEnum
+    "_A_"
+''')
+        with self.assertRaises(ValueError):
+            get_enum_classes(types)
+
+    def test_validate_type(self):
+        enum_classes = get_enum_classes(self.TYPES)
+        my_enum = enum_classes['MyEnum']
+        value = validate_type(self.TYPES, 'MyStruct', {
+            'value': 'D E',
+            'values': ['A', None, my_enum.C],
+            'counts': {'B': 1, 'C': 2}
+        }, enum_classes=enum_classes)
+        self.assertDictEqual(value, {
+            'value': my_enum['D E'],
+            'values': [my_enum.A, None, my_enum.C],
+            'counts': {'B': 1, 'C': 2}
+        })
+        self.assertIs(value['value'], my_enum['D E'])
+        self.assertListEqual([type(key) for key in value['counts']], [str, str])
+
+        # Encode the enum class values
+        self.assertEqual(
+            json.dumps(value, cls=JSONEncoder),
+            '{"value": "D E", "values": ["A", null, "C"], "counts": {"B": 1, "C": 2}}'
+        )
+        self.assertEqual(encode_query_string(value), 'counts.B=1&counts.C=2&value=D%20E&values.0=A&values.1=null&values.2=C')
+
+    def test_validate_type_int_enum(self):
+        enum_classes = get_enum_classes(self.TYPES, int_enum=True)
+        my_enum = enum_classes['MyEnum']
+        value = validate_type(self.TYPES, 'MyStruct', {'value': 'B', 'values': [], 'counts': {}}, enum_classes=enum_classes)
+        self.assertIs(value['value'], my_enum.B)
+        self.assertEqual(value['value'], 2)
+        self.assertEqual(encode_query_string(value), 'counts=&value=B&values=')
+        self.assertEqual(json.dumps(value, cls=JSONEncoder), '{"value": 2, "values": [], "counts": {}}')
+
+    def test_validate_type_error(self):
+        enum_classes = get_enum_classes(self.TYPES)
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(self.TYPES, 'MyStruct', {'value': 'F', 'values': [], 'counts': {}}, enum_classes=enum_classes)
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'F' (type 'str') for member 'value', expected type 'MyEnum'")
+        self.assertEqual(cm_exc.exception.member, 'value')
+
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(self.TYPES, 'MyStruct', {'value': [], 'values': [], 'counts': {}}, enum_classes=enum_classes)
+        self.assertEqual(str(cm_exc.exception), "Invalid value [] (type 'list') for member 'value', expected type 'MyEnum'")
+        self.assertEqual(cm_exc.exception.member, 'value')
@@ -0,0 +1,224 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from enum import Enum
+from io import StringIO
+import unittest
+from uuid import UUID
+
+from schema_markdown import CSVWriter, ValidationError, get_enum_classes, get_struct_classes, get_struct_tuples, \
+    parse_schema_markdown, validate_type
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyStruct (MyBase)
+    int a
+    optional string b
+    optional float c
+    optional bool d
+    optional date e
+    optional datetime f
+    optional uuid g
+    optional MyEnum h
+    optional MyChild(nullable) child
+    optional MyUnion u
+    optional int[] ints
+    optional string{} strings
+    optional object obj
+    optional MyStruct recurse
+
+struct MyBase
+    optional int base
+
+struct MyChild
+    string name
+    optional MyGrandchild grandchild
+
+struct MyGrandchild
+    int x
+
+union MyUnion
+    int n
+    string s
+
+enum MyEnum
+    A
+    B
+
+typedef MyStruct[] MyStructs
+
+typedef MyChild MyChildTypedef
+
+typedef int[] MyInts
+''')
+
+
+class TestCSVWriter(unittest.TestCase):
+
+    COLUMNS = [
+        'base', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'child.name', 'child.grandchild.x', 'u.n', 'u.s', 'ints',
+        'strings', 'obj', 'recurse'
+    ]
+
+    def test_columns(self):
+        self.assertListEqual(CSVWriter(TEST_TYPES, 'MyStruct', StringIO()).columns, self.COLUMNS)
+        self.assertListEqual(CSVWriter(TEST_TYPES, 'MyStructs', StringIO()).columns, self.COLUMNS)
+        self.assertListEqual(CSVWriter(TEST_TYPES, 'MyChildTypedef', StringIO()).columns, ['name', 'grandchild.x'])
+        self.assertListEqual(CSVWriter(TEST_TYPES, 'MyUnion', StringIO()).columns, ['n', 's'])
+
+    def test_write(self):
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyStructs', output)
+        writer.writeheader()
+        values = validate_type(TEST_TYPES, 'MyStructs', [
+            {
+                'base': 0,
+                'a': 1,
+                'b': 'hello, "world"',
+                'c': 1.5,
+                'd': True,
+                'e': '2020-06-17',
+                'f': '2020-06-17T12:30:00+00:00',
+                'g': 'ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b',
+                'h': 'B',
+                'child': {'name': 'c', 'grandchild': {'x': 2}},
+                'u': {'s': 'abc'},
+                'ints': [1, 2],
+                'strings': {'k': 'v'},
+                'obj': {'x': None},
+                'recurse': {'a': 3, 'e': '2020-06-18'}
+            },
+            {'a': 2, 'd': False, 'child': None},
+            {'a': 3, 'child': {'name': 'd'}}
+        ])
+        self.assertEqual(writer.writerows(values), 3)
+        self.assertEqual(output.getvalue(), '\r\n'.join([
+            ','.join(self.COLUMNS),
+            '0,1,"hello, ""world""",1.5,true,2020-06-17,2020-06-17T12:30:00+00:00,ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b,B,c,2,,abc,'
+            '"[1,2]","{""k"":""v""}","{""x"":null}","{""a"":3,""e"":""2020-06-18""}"',
+            ',2,,,false,,,,,,,,,,,,',
+            ',3,,,,,,,,d,,,,,,,',
+            ''
+        ]))
+
+    def test_tsv(self):
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyChild', output, delimiter='\t', lineterminator='\n')
+        writer.writeheader()
+        writer.writerow({'name': 'a\tb', 'grandchild': {'x': 1}})
+        writer.writerow({'name': 'c'})
+        self.assertEqual(output.getvalue(), 'name\tgrandchild.x\n"a\tb"\t1\nc\t\n')
+
+    def test_dict_subclass(self):
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyChild', output, lineterminator='\n')
+        writer.writerow(OrderedDict(name='c', grandchild=OrderedDict(x=1)))
+        self.assertEqual(output.getvalue(), 'c,1\n')
+
+    def test_naive_datetime(self):
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyStruct', output, lineterminator='\n')
+        writer.writerow({'a': 1, 'f': datetime(2020, 6, 17, 12, 30), 'e': date(2020, 6, 17)})
+        self.assertEqual(output.getvalue(), ',1,,,,2020-06-17,2020-06-17T12:30:00+00:00,,,,,,,,,,\n')
+
+    def test_struct_and_enum_classes(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        enum_classes = get_enum_classes(TEST_TYPES)
+        value = validate_type(
+            TEST_TYPES, 'MyStruct', {'a': 1, 'h': 'A', 'child': {'name': 'c', 'grandchild': {'x': 2}}, 'recurse': {'a': 2}},
+            struct_classes=struct_classes, enum_classes=enum_classes
+        )
+        self.assertIsInstance(value.h, Enum)
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyStruct', output, lineterminator='\n')
+        writer.writerow(value)
+        self.assertEqual(output.getvalue(), ',1,,,,,,,A,c,2,,,,,,"{""a"":2}"\n')
+
+    def test_struct_tuples(self):
+        for named in (True, False):
+            with self.subTest(named=named):
+                value = validate_type(
+                    TEST_TYPES, 'MyStruct', {'a': 1, 'child': {'name': 'c', 'grandchild': {'x': 2}}, 'u': {'s': 'x'}},
+                    struct_classes=get_struct_tuples(TEST_TYPES, named=named)
+                )
+                output = StringIO()
+                writer = CSVWriter(TEST_TYPES, 'MyStruct', output, lineterminator='\n')
+                writer.writerow(value)
+                self.assertEqual(output.getvalue(), ',1,,,,,,,,c,2,,x,,,,\n')
+
+    def test_struct_tuples_keyword_member(self):
+        types = parse_schema_markdown('struct MyStruct\n    int class\n    optional string b\n')
+        value = validate_type(types, 'MyStruct', {'class': 1}, struct_classes=get_struct_tuples(types))
+        output = StringIO()
+        writer = CSVWriter(types, 'MyStruct', output, lineterminator='\n')
+        writer.writeheader()
+        writer.writerow(value)
+        self.assertEqual(output.getvalue(), 'class,b\n1,\n')
+
+    def test_invalid_value(self):
+        writer = CSVWriter(TEST_TYPES, 'MyChild', StringIO())
+        for value, message in (
+            ('abc', "Invalid struct value 'abc' (type 'str')"),
+            ([1], "Invalid struct value [1] (type 'list')"),
+            (('c',), "Invalid struct value ('c',) (type 'tuple')"),
+            ({'name': 'c', 'grandchild': 1}, "Invalid struct value 1 (type 'int')")
+        ):
+            with self.subTest(value=value):
+                with self.assertRaises(TypeError) as cm_exc:
+                    writer.writerow(value)
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_typedef_members(self):
+        types = parse_schema_markdown('''\
+struct MyStruct
+    MyChildTypedef child
+    MyInt n
+
+struct MyChild
+    int x
+
+typedef MyChild MyChildTypedef
+
+typedef int MyInt
+''')
+        output = StringIO()
+        writer = CSVWriter(types, 'MyStruct', output, lineterminator='\n')
+        writer.writeheader()
+        writer.writerow({'child': {'x': 1}, 'n': 2})
+        self.assertEqual(output.getvalue(), 'child.x,n\n1,2\n')
+
+    def test_unvalidated_strings(self):
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyStruct', output, lineterminator='\n')
+        writer.writerow({'a': 1, 'e': '2020-06-17', 'f': '2020-06-17T12:30:00Z', 'h': 'A'})
+        self.assertEqual(output.getvalue(), ',1,,,,2020-06-17,2020-06-17T12:30:00Z,,A,,,,,,,,\n')
+
+    def test_uuid_bytes(self):
+        uuid = UUID('ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b')
+        value = validate_type(TEST_TYPES, 'MyStruct', {'a': 1, 'g': str(uuid)}, uuid_format='bytes')
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyStruct', output, lineterminator='\n')
+        writer.writerow(value)
+        self.assertEqual(output.getvalue(), f',1,,,,,,{uuid},,,,,,,,,\n')
+
+    def test_datetime_tz(self):
+        output = StringIO()
+        writer = CSVWriter(TEST_TYPES, 'MyStruct', output, lineterminator='\n')
+        writer.writerow({'a': 1, 'f': datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc)})
+        self.assertEqual(output.getvalue(), ',1,,,,,2020-06-17T12:30:00+00:00,,,,,,,,,,\n')
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            CSVWriter(TEST_TYPES, 'Unknown', StringIO())
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_invalid_type(self):
+        for type_name in ('MyEnum', 'MyInts'):
+            with self.subTest(type_name=type_name):
+                with self.assertRaises(ValidationError) as cm_exc:
+                    CSVWriter(TEST_TYPES, type_name, StringIO())
+                self.assertEqual(str(cm_exc.exception), f"Invalid CSV type '{type_name}', expected struct or struct array type")
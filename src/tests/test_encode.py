@@ -5,10 +5,13 @@
 
 from datetime import date, datetime, timezone
 from decimal import Decimal
+import json
 import unittest
 from uuid import UUID
 
-from schema_markdown import JSONEncoder, decode_query_string, encode_query_string
+from schema_markdown import JSONEncoder, QueryStringDecoder, StructTupleJSONEncoder, ValidationError, decode_query_string, \
+    decode_query_string_columns, decode_query_string_typed, encode_query_string, get_enum_classes, get_json_serializer, \
+    get_query_string_encoder, get_struct_classes, get_struct_tuples, parse_schema_markdown, validate_type
 
 
 class TestJSONEncoder(unittest.TestCase):
@@ -53,6 +56,189 @@ class TestJSONEncoder(unittest.TestCase):
             encoder.encode({'my_type': MyType()})
 
 
+class TestStructTupleJSONEncoder(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional string b
+    optional MyStruct child
+    MyUnion[] unions
+    MyTypedef{} dict
+    optional int(nullable) c
+
+union MyUnion
+    int c
+    date d
+
+typedef MyUnion MyTypedef
+''')
+
+    def test_encode(self):
+        value = validate_type(self.TYPES, 'MyStruct', {
+            'a': 1,
+            'child': {'a': 2, 'unions': [{'d': '2016-07-01'}], 'dict': {}, 'c': None},
+            'unions': [{'c': 3}],
+            'dict': {'x': {'c': 4}}
+        }, struct_classes=get_struct_tuples(self.TYPES))
+        self.assertEqual(
+            json.dumps(value, cls=StructTupleJSONEncoder, types=self.TYPES, type_name='MyStruct', sort_keys=True),
+            '{"a": 1, "c": null, "child": {"a": 2, "c": null, "dict": {}, "unions": [{"d": "2016-07-01"}]}, "dict": {"x": {"c": 4}}, '
+            '"unions": [{"c": 3}]}'
+        )
+
+    def test_encode_array(self):
+        types = {
+            'MyStructs': {'typedef': {'name': 'MyStructs', 'type': {'array': {'type': {'user': 'MyStruct'}}}}},
+            **self.TYPES
+        }
+        encoder = StructTupleJSONEncoder(types, 'MyStructs')
+        value = [(1, 'abc', None, [], {}, None), None]
+        self.assertEqual(encoder.encode(value), '[{"a": 1, "b": "abc", "unions": [], "dict": {}, "c": null}, null]')
+        self.assertEqual(''.join(encoder.iterencode(value)), '[{"a": 1, "b": "abc", "unions": [], "dict": {}, "c": null}, null]')
+
+    def test_encode_no_structs(self):
+        types = {
+            'MyDict': {'typedef': {'name': 'MyDict', 'type': {'dict': {'type': {'array': {'type': {'builtin': 'int'}}}}}}}
+        }
+        encoder = StructTupleJSONEncoder(types, 'MyDict')
+        self.assertEqual(encoder.encode({'a': [1, 2]}), '{"a": [1, 2]}')
+
+    def test_encode_enum_member(self):
+        types = parse_schema_markdown('struct MyStruct\n    MyEnum e\n\nenum MyEnum\n    A\n')
+        encoder = StructTupleJSONEncoder(types, 'MyStruct')
+        self.assertEqual(encoder.encode(('A',)), '{"e": "A"}')
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            StructTupleJSONEncoder(self.TYPES, 'Unknown')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+
+class TestJSONSerializer(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional string b
+    optional float c
+    optional bool d
+    optional date e
+    optional datetime f
+    optional uuid g
+    optional object h
+    optional any i
+    optional MyEnum j
+    optional MyStruct(nullable) child
+    optional MyUnion[] unions
+    optional MyTypedef{} dict
+    optional int(nullable)[] nullables
+    optional MyEnum(nullable) : float(nullable) {} counts
+    optional MyTypedefNullable typedef_nullable
+    string z
+
+union MyUnion
+    int c
+    date d
+
+enum MyEnum
+    A
+    "caf\u00e9"
+
+struct MyEmpty
+
+struct MyRequired
+    int a
+    string b
+
+typedef MyUnion MyTypedef
+
+typedef MyStruct(nullable) MyTypedefNullable
+
+typedef MyStruct[] MyStructs
+''')
+
+    def assert_serialize(self, type_name, value, expected=None, **options):
+        value = validate_type(self.TYPES, type_name, value, **options)
+        text = get_json_serializer(self.TYPES, type_name)(value)
+        self.assertEqual(text, json.dumps(value, cls=JSONEncoder, separators=(',', ':')))
+        if expected is not None:
+            self.assertEqual(text, expected)
+
+    def test_struct(self):
+        self.assert_serialize('MyStruct', {
+            'z': 'x',
+            'a': 1,
+            'b': 'caf\u00e9 "\\n"',
+            'c': 1,
+            'd': False,
+            'e': '2020-06-17',
+            'f': '2020-06-17T12:30:00+05:00',
+            'g': 'AE8F3B7E-6E9E-4F5D-8B7A-5C7E3F9E1A2B',
+            'h': {'x': [1, {'y': None}]},
+            'i': [datetime(2020, 6, 17, tzinfo=timezone.utc)],
+            'j': 'caf\u00e9',
+            'child': {'a': 2, 'child': None, 'z': ''},
+            'unions': [{'c': 3}, {'d': '2020-06-18'}],
+            'dict': {'x': {'c': 4}},
+            'nullables': [1, None],
+            'counts': {'A': 1.5, None: None},
+            'typedef_nullable': None
+        }, (
+            '{"a":1,"b":"caf\\u00e9 \\"\\\\n\\"","c":1.0,"d":false,"e":"2020-06-17","f":"2020-06-17T12:30:00+05:00",'
+            '"g":"ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b","h":{"x":[1,{"y":null}]},"i":["2020-06-17T00:00:00+00:00"],"j":"caf\\u00e9",'
+            '"child":{"a":2,"child":null,"z":""},"unions":[{"c":3},{"d":"2020-06-18"}],"dict":{"x":{"c":4}},'
+            '"nullables":[1,null],"counts":{"A":1.5,"null":null},"typedef_nullable":null,"z":"x"}'
+        ))
+
+    def test_struct_minimal(self):
+        self.assert_serialize('MyStruct', {'a': 1, 'z': ''}, '{"a":1,"z":""}')
+
+    def test_struct_empty(self):
+        self.assert_serialize('MyEmpty', {}, '{}')
+
+    def test_struct_required(self):
+        self.assert_serialize('MyRequired', {'b': 'x', 'a': 1}, '{"a":1,"b":"x"}')
+
+    def test_union(self):
+        self.assert_serialize('MyUnion', {'d': '2020-06-17'}, '{"d":"2020-06-17"}')
+
+    def test_typedef_array(self):
+        self.assert_serialize('MyStructs', [{'a': 1, 'z': ''}, {'a': 2, 'z': ''}])
+        self.assert_serialize('MyStructs', [], '[]')
+
+    def test_typedef_nullable(self):
+        self.assert_serialize('MyTypedefNullable', None, 'null')
+
+    def test_float_nonfinite(self):
+        self.assert_serialize('MyStruct', {'a': 1, 'c': float('inf'), 'z': ''}, '{"a":1,"c":Infinity,"z":""}')
+        self.assert_serialize('MyStruct', {'a': 1, 'c': float('-inf'), 'z': ''}, '{"a":1,"c":-Infinity,"z":""}')
+        self.assert_serialize('MyStruct', {'a': 1, 'c': float('nan'), 'z': ''}, '{"a":1,"c":NaN,"z":""}')
+        self.assert_serialize('MyStruct', {'a': 1, 'c': 1.5, 'counts': {'A': 2}, 'z': ''}, '{"a":1,"c":1.5,"counts":{"A":2.0},"z":""}')
+
+    def test_datetime_no_tz(self):
+        serialize = get_json_serializer(self.TYPES, 'MyStruct')
+        self.assertEqual(
+            serialize({'a': 1, 'f': datetime(2020, 6, 17, 12, 30), 'z': ''}),
+            '{"a":1,"f":"2020-06-17T12:30:00+00:00","z":""}'
+        )
+
+    def test_uuid_string(self):
+        self.assert_serialize(
+            'MyStruct', {'a': 1, 'g': 'AE8F3B7E-6E9E-4F5D-8B7A-5C7E3F9E1A2B', 'z': ''},
+            '{"a":1,"g":"ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b","z":""}', uuid_format='string'
+        )
+        self.assertEqual(
+            get_json_serializer(self.TYPES, 'MyStruct')({'a': 1, 'g': UUID(int=1), 'z': ''}),
+            '{"a":1,"g":"00000000-0000-0000-0000-000000000001","z":""}'
+        )
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            get_json_serializer(self.TYPES, 'Unknown')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+
 class TestDecodeQueryString(unittest.TestCase):
 
     def test_decode_query_string(self):
@@ -238,6 +424,538 @@ class TestDecodeQueryString(unittest.TestCase):
             decode_query_string('a' * 2000 + '.0=0&' + 'a' * 2000 + '.b=0')
         self.assertEqual(str(cm_exc.exception), f"Invalid array index 'b' in key '{'a' * 99}")
 
+    def test_max_pairs(self):
+        self.assertEqual(decode_query_string('a=1&b=2', max_pairs=2), {'a': '1', 'b': '2'})
+        self.assertEqual(decode_query_string('a=1&b=2&hash', max_pairs=2), {'a': '1', 'b': '2'})
+        for query_string in ('a=1&b=2&c=3', 'a=1&b=2&hash&c=3', 'a=1&b=2&' + '&'.join(['c=3'] * 100000)):
+            with self.subTest(query_string=query_string[:20]):
+                with self.assertRaises(ValueError) as cm_exc:
+                    decode_query_string(query_string, max_pairs=2)
+                self.assertEqual(str(cm_exc.exception), 'Query string exceeds the maximum of 2 key/value pairs')
+
+    def test_max_depth(self):
+        self.assertEqual(decode_query_string('a.b=1&c=2', max_depth=2), {'a': {'b': '1'}, 'c': '2'})
+        with self.assertRaises(ValueError) as cm_exc:
+            decode_query_string('a.b=1&c.d.e=2', max_depth=2)
+        self.assertEqual(str(cm_exc.exception), "Key 'c.d.e' exceeds the maximum key depth of 2")
+
+    def test_max_key_length(self):
+        self.assertEqual(decode_query_string('abc=1&a%20=2', max_key_length=4), {'abc': '1', 'a ': '2'})
+        with self.assertRaises(ValueError) as cm_exc:
+            decode_query_string('abc=1&a%20b=2', max_key_length=4)
+        self.assertEqual(str(cm_exc.exception), "Key 'a%20b' exceeds the maximum key length of 4")
+
+    def test_max_key_length_long(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            decode_query_string('a' * 2000 + '=1', max_key_length=1000)
+        self.assertEqual(str(cm_exc.exception), f"Key '{'a' * 99} exceeds the maximum key length of 1000")
+
+    def test_max_array_length(self):
+        self.assertEqual(decode_query_string('a.0=1&a.1=2&b.0=3', max_array_length=3), {'a': ['1', '2'], 'b': ['3']})
+        with self.assertRaises(ValueError) as cm_exc:
+            decode_query_string('a.0=1&a.1=2&b.0.0=3', max_array_length=3)
+        self.assertEqual(str(cm_exc.exception), "Key 'b.0.0' exceeds the maximum total array length of 3")
+
+    def test_bytes(self):
+        expected = {'a': '5', 'b': {'c': ['x y', 'caf\u00e9']}}
+        for query_string in (b'a=5&b.c.0=x%20y&b.c.1=caf%C3%A9', bytearray(b'a=5&b.c.0=x%20y&b.c.1=caf%C3%A9'),
+                             memoryview(b'a=5&b.c.0=x%20y&b.c.1=caf%C3%A9')):
+            with self.subTest(query_string=query_string):
+                self.assertEqual(decode_query_string(query_string), expected)
+
+    def test_bytes_non_ascii(self):
+        # WSGI QUERY_STRING is latin-1 decoded
+        query_string = 'a=caf\u00e9%20&b%C3%A9=1'.encode('utf-8').decode('latin-1')
+        self.assertEqual(decode_query_string(query_string.encode('latin-1')), {'a': 'caf\u00e9 ', 'b\u00e9': '1'})
+        self.assertEqual(decode_query_string(b'a=caf\xe9', encoding='latin-1'), {'a': 'caf\u00e9'})
+        self.assertEqual(decode_query_string(b'a=caf\xe9'), {'a': 'caf\ufffd'})
+
+    def test_bytes_error(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            decode_query_string(b'a=1&a=2')
+        self.assertEqual(str(cm_exc.exception), "Duplicate key 'a'")
+
+    def test_str_subclass(self):
+        self.assertEqual(decode_query_string(_StrSubclass('a=1&b.0=x')), {'a': '1', 'b': ['x']})
+
+
+class TestDecodeQueryStringTyped(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional string b
+    optional float c
+    optional bool d
+    optional date e
+    optional datetime f
+    optional uuid g
+    optional MyEnum h
+    optional MyChild child
+    optional int[len > 0] ints
+    optional MyChild[] children
+    optional string{} strings
+    optional MyEnum : int(> 0) {} counts
+    optional MyUnion u
+    optional object obj
+    optional int(nullable) nullable
+    optional MyTypedef typedef
+    optional string(len < 3) short
+    optional MyChild(nullable)[] nullables
+
+struct MyChild
+    int x
+    optional MyChild child
+
+union MyUnion
+    int n
+    string s
+
+enum MyEnum
+    A
+    B
+
+typedef int(> 0) MyTypedef
+''')
+
+    def assert_equivalent(self, query_string, **options):
+        try:
+            expected = validate_type(self.TYPES, 'MyStruct', decode_query_string(query_string), **options)
+        except (ValueError, ValidationError) as exc:
+            with self.assertRaises(type(exc)) as cm_exc:
+                decode_query_string_typed(self.TYPES, 'MyStruct', query_string, **options)
+            return cm_exc.exception
+        value = decode_query_string_typed(self.TYPES, 'MyStruct', query_string, **options)
+        self.assertEqual(value, expected)
+        self.assertEqual(
+            list(value.keys()) if isinstance(value, dict) else None,
+            list(expected.keys()) if isinstance(expected, dict) else None
+        )
+        return value
+
+    def test_decode(self):
+        self.assertEqual(
+            self.assert_equivalent(
+                'a=1&b=x%20y&c=1.5&d=true&e=2020-06-17&f=2020-06-17T12%3A30%3A00%2B00%3A00'
+                '&g=ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b&h=B&child.x=2&child.child.x=3&ints.0=1&ints.1=2&children.0.x=1&children.1.x=3'
+                '&strings.k=v&counts.A=1&u.s=abc&obj.x.0=1&nullable=null&typedef=5&short=ab&nullables.0=null&nullables.1.x=4'
+            ),
+            {
+                'a': 1,
+                'b': 'x y',
+                'c': 1.5,
+                'd': True,
+                'e': date(2020, 6, 17),
+                'f': datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc),
+                'g': UUID('ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b'),
+                'h': 'B',
+                'child': {'x': 2, 'child': {'x': 3}},
+                'ints': [1, 2],
+                'children': [{'x': 1}, {'x': 3}],
+                'strings': {'k': 'v'},
+                'counts': {'A': 1},
+                'u': {'s': 'abc'},
+                'obj': {'x': ['1']},
+                'nullable': None,
+                'typedef': 5,
+                'short': 'ab',
+                'nullables': [None, {'x': 4}]
+            }
+        )
+
+    def test_equivalent(self):
+        for query_string in (
+            '',
+            'a=1',
+            'a=1#hash',
+            'a=1&strings=',
+            'a=1&children=',
+            'a=1&obj=',
+            'a=1&obj.0=x&obj.1=y',
+            'a=1&child=',
+            'a=1&d=false',
+            'a=1&f=2020-06-17',
+            'a=1&c=1',
+            'a= 1 '
+        ):
+            with self.subTest(query_string=query_string):
+                self.assert_equivalent(query_string)
+
+    def test_errors(self):
+        for query_string, message in (
+            ('', "Required member 'a' missing"),
+            ('b=x', "Required member 'a' missing"),
+            ('a=x', "Invalid value 'x' (type 'str') for member 'a', expected type 'int'"),
+            ('a=1&c=nan', "Invalid value 'nan' (type 'str') for member 'c', expected type 'float'"),
+            ('a=1&d=yes', "Invalid value 'yes' (type 'str') for member 'd', expected type 'bool'"),
+            ('a=1&e=x', "Invalid value 'x' (type 'str') for member 'e', expected type 'date'"),
+            ('a=1&f=x', "Invalid value 'x' (type 'str') for member 'f', expected type 'datetime'"),
+            ('a=1&g=x', "Invalid value 'x' (type 'str') for member 'g', expected type 'uuid'"),
+            ('a=1&h=C', "Invalid value 'C' (type 'str') for member 'h', expected type 'MyEnum'"),
+            ('a=1&child.y=1', "Unknown member 'child.y'"),
+            ('a=1&child.x=1&child.child.y=1', "Unknown member 'child.child.y'"),
+            ('a=1&children.0.x=1&children.1.z=1', "Unknown member 'children.1.z'"),
+            ('a=1&child.child.x=1', "Required member 'child.x' missing"),
+            ('a=1&ints=', "Invalid value [] (type 'list') for member 'ints', expected type 'array' [len > 0]"),
+            ('a=1&ints.0=x', "Invalid value 'x' (type 'str') for member 'ints.0', expected type 'int'"),
+            ('a=1&counts.C=1', "Invalid value 'C' (type 'str') for member 'counts', expected type 'MyEnum'"),
+            ('a=1&counts.A=0', "Invalid value 0 (type 'int') for member 'counts.A', expected type 'int' [> 0.0]"),
+            ('a=1&u.n=1&u.s=x', "Invalid value {'n': 1, 's': 'x'} (type 'dict') for member 'u', expected type 'MyUnion'"),
+            ('a=1&nullable=x', "Invalid value 'x' (type 'str') for member 'nullable', expected type 'int'"),
+            ('a=1&typedef=0', "Invalid value 0 (type 'int') for member 'typedef', expected type 'MyTypedef' [> 0.0]"),
+            ('a=1&short=abc', "Invalid value 'abc' (type 'str') for member 'short', expected type 'string' [len < 3]"),
+            ('a=1&a.b=1', "Duplicate key 'a.b'"),
+            ('a.b=1&a=1', "Unknown member 'a.b'"),
+            ('a=1&h.x=1', "Unknown member 'h.x'"),
+            ('a=1&a=2', "Duplicate key 'a'"),
+            ('a=1&ints.0=1&ints.0=2', "Duplicate key 'ints.0'"),
+            ('a=1&strings=&strings.k=v', "Duplicate key 'strings.k'"),
+            ('a=1&ints.1=1', "Invalid array index 1 in key 'ints.1'"),
+            ('a=1&ints.x=1', "Invalid array index 'x' in key 'ints.x'"),
+            ('b&a=1', "Invalid key/value pair 'b'")
+        ):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises((ValueError, ValidationError)) as cm_exc:
+                    decode_query_string_typed(self.TYPES, 'MyStruct', query_string)
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_unknown_key_first(self):
+        # Unknown keys are rejected before later key/value pairs are decoded
+        with self.assertRaises(ValidationError) as cm_exc:
+            decode_query_string_typed(self.TYPES, 'MyStruct', 'z=1&a=x')
+        self.assertEqual(str(cm_exc.exception), "Unknown member 'z'")
+        self.assertEqual(cm_exc.exception.member, None)
+
+    def test_error_member(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            decode_query_string_typed(self.TYPES, 'MyStruct', 'a=1&children.0.x=y')
+        self.assertEqual(cm_exc.exception.member, 'children.0.x')
+
+    def test_options(self):
+        struct_classes = get_struct_classes(self.TYPES)
+        enum_classes = get_enum_classes(self.TYPES)
+        query_string = 'a=1&h=B&child.x=2&children.0.x=3&g=AE8F3B7E-6E9E-4F5D-8B7A-5C7E3F9E1A2B&ints.0=1'
+        for options in (
+            {'struct_classes': struct_classes},
+            {'enum_classes': enum_classes},
+            {'uuid_format': 'string'},
+            {'uuid_format': 'bytes'},
+            {'intern_strings': True}
+        ):
+            with self.subTest(options=options):
+                self.assert_equivalent(query_string, **options)
+        value = decode_query_string_typed(self.TYPES, 'MyStruct', query_string, struct_classes=struct_classes)
+        self.assertIsInstance(value, struct_classes['MyStruct'])
+        self.assertIsInstance(value.child, struct_classes['MyChild'])
+        self.assertIsInstance(value.children[0], struct_classes['MyChild'])
+
+    def test_typedef_array(self):
+        types = parse_schema_markdown('''\
+typedef MyStruct[len < 2] MyStructs
+
+struct MyStruct
+    int a
+''')
+        self.assertEqual(decode_query_string_typed(types, 'MyStructs', '0.a=1'), [{'a': 1}])
+        with self.assertRaises(ValidationError) as cm_exc:
+            decode_query_string_typed(types, 'MyStructs', '0.a=1&1.a=2')
+        self.assertEqual(str(cm_exc.exception), "Invalid value [{'a': 1}, {'a': 2}] (type 'list'), expected type 'MyStructs' [len < 2]")
+
+    def test_limits(self):
+        self.assertEqual(
+            decode_query_string_typed(
+                self.TYPES, 'MyStruct', 'a=1&ints.0=1&child.x=2', max_pairs=3, max_depth=2, max_key_length=7, max_array_length=1
+            ),
+            {'a': 1, 'ints': [1], 'child': {'x': 2}}
+        )
+        for query_string, limits, message in (
+            ('a=1&b=x&c=1', {'max_pairs': 2}, 'Query string exceeds the maximum of 2 key/value pairs'),
+            ('a=1&child.child.x=1', {'max_depth': 2}, "Key 'child.child.x' exceeds the maximum key depth of 2"),
+            ('a=1&children.0.x=1', {'max_key_length': 11}, "Key 'children.0.x' exceeds the maximum key length of 11"),
+            ('a=1&ints.0=1&ints.1=2', {'max_array_length': 1}, "Key 'ints.1' exceeds the maximum total array length of 1")
+        ):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(ValueError) as cm_exc:
+                    decode_query_string_typed(self.TYPES, 'MyStruct', query_string, **limits)
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_bytes(self):
+        self.assertEqual(
+            decode_query_string_typed(self.TYPES, 'MyStruct', b'a=1&ints.0=2&child.x=3'),
+            {'a': 1, 'ints': [2], 'child': {'x': 3}}
+        )
+
+    def test_str_subclass(self):
+        self.assertEqual(decode_query_string_typed(self.TYPES, 'MyStruct', _StrSubclass('a=1&ints.0=2')), {'a': 1, 'ints': [2]})
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            decode_query_string_typed(self.TYPES, 'Unknown', 'a=1')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+
+class TestDecodeQueryStringColumns(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+struct MyStruct (MyBase)
+    int a
+    optional float(> 0) b
+    optional MyEnum c
+    optional MyChild(nullable) child
+    optional MyNullableChild child2
+    optional MyUnion u
+    optional int(nullable)[] ints
+    optional object obj
+    optional MyStruct recurse
+
+struct MyBase
+    optional date base
+
+struct MyChild
+    string name
+    optional MyGrandchild grandchild
+
+struct MyGrandchild
+    bool x
+
+union MyUnion
+    int n
+    string s
+
+enum MyEnum
+    A
+    B
+
+typedef MyChild(nullable) MyNullableChild
+''')
+
+    def assert_columns(self, query_strings, expected, **kwargs):
+        columns = decode_query_string_columns(self.TYPES, 'MyStruct', query_strings, **kwargs)
+        self.assertDictEqual(columns, expected)
+
+        # The columns are the same as the validated query string objects' values
+        for column_name, values in columns.items():
+            for query_string, value in zip(query_strings, values):
+                expected_value = validate_type(self.TYPES, 'MyStruct', decode_query_string(query_string), **kwargs)
+                for key in column_name.split('.'):
+                    expected_value = expected_value.get(key) if expected_value is not None else None
+                self.assertEqual(value, expected_value)
+
+    def test_columns(self):
+        self.assert_columns(
+            [
+                'a=1&b=1.5&c=B&base=2020-06-17&child.name=x%20y&child.grandchild.x=true&u.s=abc&ints.0=1&ints.1=null&obj.x=1'
+                '&recurse.a=2',
+                'a=2&child=null&child2=null&ints=&obj=',
+                'a=3&child.name=z&child2.name=w',
+                'a=4&#hash'
+            ],
+            {
+                'base': [date(2020, 6, 17), None, None, None],
+                'a': [1, 2, 3, 4],
+                'b': [1.5, None, None, None],
+                'c': ['B', None, None, None],
+                'child.name': ['x y', None, 'z', None],
+                'child.grandchild.x': [True, None, None, None],
+                'child2.name': [None, None, 'w', None],
+                'child2.grandchild.x': [None, None, None, None],
+                'u': [{'s': 'abc'}, None, None, None],
+                'ints': [[1, None], [], None, None],
+                'obj': [{'x': '1'}, '', None, None],
+                'recurse': [{'a': 2}, None, None, None]
+            }
+        )
+
+    def test_empty(self):
+        columns = decode_query_string_columns(self.TYPES, 'MyStruct', [])
+        self.assertListEqual(list(columns), [
+            'base', 'a', 'b', 'c', 'child.name', 'child.grandchild.x', 'child2.name', 'child2.grandchild.x', 'u', 'ints', 'obj',
+            'recurse'
+        ])
+        self.assertTrue(all(values == [] for values in columns.values()))
+
+    def test_options(self):
+        enum_classes = get_enum_classes(self.TYPES)
+        struct_classes = get_struct_classes(self.TYPES)
+        columns = decode_query_string_columns(
+            self.TYPES, 'MyStruct', ['a=1&c=A&recurse.a=2'], enum_classes=enum_classes, struct_classes=struct_classes
+        )
+        self.assertEqual(columns['c'], [enum_classes['MyEnum'].A])
+        self.assertEqual(columns['recurse'], [struct_classes['MyStruct'](a=2)])
+
+    def test_errors(self):
+        for query_string, exception_class, message in (
+            ('a=x', ValidationError, "Invalid value 'x' (type 'str') for member 'a', expected type 'int'"),
+            ('a=1&b=0', ValidationError, "Invalid value 0.0 (type 'float') for member 'b', expected type 'float' [> 0.0]"),
+            ('a=1&c=C', ValidationError, "Invalid value 'C' (type 'str') for member 'c', expected type 'MyEnum'"),
+            ('b=1', ValidationError, "Required member 'a' missing"),
+            ('a=1&child.grandchild.x=true', ValidationError, "Required member 'child.name' missing"),
+            ('a=1&child=', ValidationError, "Required member 'child.name' missing"),
+            ('a=1&child=x', ValidationError, "Invalid value 'x' (type 'str') for member 'child', expected type 'MyChild'"),
+            ('a=1&u.n=1&u.s=x', ValidationError,
+             "Invalid value {'n': '1', 's': 'x'} (type 'dict') for member 'u', expected type 'MyUnion'"),
+            ('a=1&ints.0=x', ValidationError, "Invalid value 'x' (type 'str') for member 'ints.0', expected type 'int'"),
+            ('a=1&d=1', ValidationError, "Unknown member 'd'"),
+            ('a=1&child.d=1', ValidationError, "Unknown member 'child.d'"),
+            ('a=1&a.b=1', ValidationError, "Unknown member 'a.b'"),
+            ('a=1&a=2', ValueError, "Duplicate key 'a'"),
+            ('a=1&child=null&child.name=x', ValueError, "Duplicate key 'child.name'"),
+            ('a=1&ints=&ints.0=1', ValueError, "Duplicate key 'ints.0'"),
+            ('a=1&ints.0=&ints.0.x=1', ValueError, "Duplicate key 'ints.0'"),
+            ('a=1&obj.x=&obj.x.y=1', ValueError, "Duplicate key 'obj.x'"),
+            ('b&a=1', ValueError, "Invalid key/value pair 'b'")
+        ):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(exception_class) as cm_exc:
+                    decode_query_string_columns(self.TYPES, 'MyStruct', ['a=1', query_string])
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_limits(self):
+        for query_string, kwargs, message in (
+            ('a=1&b=2', {'max_pairs': 1}, 'Query string exceeds the maximum of 1 key/value pairs'),
+            ('a=1&child.grandchild.x=true', {'max_depth': 2}, "Key 'child.grandchild.x' exceeds the maximum key depth of 2"),
+            ('a=1&child.name=x', {'max_key_length': 5}, "Key 'child.name' exceeds the maximum key length of 5"),
+            ('a=1&ints.0=1&ints.1=2', {'max_array_length': 1}, "Key 'ints.1' exceeds the maximum total array length of 1")
+        ):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(ValueError) as cm_exc:
+                    decode_query_string_columns(self.TYPES, 'MyStruct', [query_string], **kwargs)
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_bytes(self):
+        columns = decode_query_string_columns(self.TYPES, 'MyStruct', [b'a=1&child.name=x%20y', memoryview(b'a=2&ints.0=3'), 'a=4'])
+        self.assertEqual(columns['a'], [1, 2, 4])
+        self.assertEqual(columns['child.name'], ['x y', None, None])
+        self.assertEqual(columns['ints'], [None, [3], None])
+
+    def test_str_subclass(self):
+        columns = decode_query_string_columns(self.TYPES, 'MyStruct', [_StrSubclass('a=1&child.name=x')])
+        self.assertEqual(columns['a'], [1])
+        self.assertEqual(columns['child.name'], ['x'])
+
+    REQUIRED_TYPES = parse_schema_markdown('''\
+struct MyRequired
+    MyChild child
+    optional int(nullable) n
+    optional int[len > 0] ints
+    optional int{} counts
+
+struct MyChild
+    bool x
+''')
+
+    def test_required_struct(self):
+        columns = decode_query_string_columns(
+            self.REQUIRED_TYPES, 'MyRequired', ['child.x=true&n=null&ints.0=1', '%63hild.x=false&n=1&counts.k%20x=2']
+        )
+        self.assertDictEqual(columns, {
+            'child.x': [True, False],
+            'n': [None, 1],
+            'ints': [[1], None],
+            'counts': [None, {'k x': 2}]
+        })
+
+    def test_required_struct_errors(self):
+        for query_string, exception_class, message in (
+            ('n=1', ValidationError, "Required member 'child' missing"),
+            ('child=', ValidationError, "Required member 'child.x' missing"),
+            ('child=&child=', ValueError, "Duplicate key 'child'"),
+            ('child.x=true&ints=', ValidationError, "Invalid value [] (type 'list') for member 'ints', expected type 'array' [len > 0]")
+        ):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(exception_class) as cm_exc:
+                    decode_query_string_columns(self.REQUIRED_TYPES, 'MyRequired', [query_string])
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_key_cache_full(self):
+        # The key resolution cache is cleared when full
+        counts = {f'k{ix}': ix for ix in range(1100)}
+        query_string = 'child.x=true&' + '&'.join(f'counts.{key}={value}' for key, value in counts.items())
+        columns = decode_query_string_columns(self.REQUIRED_TYPES, 'MyRequired', [query_string])
+        self.assertEqual(columns['counts'], [counts])
+
+    def test_invalid_type(self):
+        for type_name, message in (
+            ('Unknown', "Unknown type 'Unknown'"),
+            ('MyUnion', "Invalid columns type 'MyUnion', expected struct type"),
+            ('MyEnum', "Invalid columns type 'MyEnum', expected struct type")
+        ):
+            with self.subTest(type_name=type_name):
+                with self.assertRaises(ValidationError) as cm_exc:
+                    decode_query_string_columns(self.TYPES, type_name, [])
+                self.assertEqual(str(cm_exc.exception), message)
+
+
+class TestQueryStringDecoder(unittest.TestCase):
+
+    def test_decode(self):
+        decoder = QueryStringDecoder()
+        for _ in range(2):
+            self.assertEqual(
+                decoder.decode('a=5&b%2Ec=3&c.d=foo&c.e.0=1&c.e.1=2'),
+                {'a': '5', 'b.c': '3', 'c': {'d': 'foo', 'e': ['1', '2']}}
+            )
+        self.assertDictEqual(decoder.key_cache, {'a': ('a',), 'b%2Ec': ('b.c',), 'c.d': ('c', 'd'), 'c.e.0': ('c', 'e', '0'),
+                                                 'c.e.1': ('c', 'e', '1')})
+        self.assertEqual(decoder.decode(''), {})
+
+    def test_typed(self):
+        types = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional bool[] b
+    optional string{} c
+''')
+        decoder = QueryStringDecoder(types, 'MyStruct')
+        for _ in range(2):
+            self.assertEqual(decoder.decode('a=5&b.0=true&b.1=false&c.x%20y=z'), {'a': 5, 'b': [True, False], 'c': {'x y': 'z'}})
+        self.assertEqual(len(decoder.key_cache), 4)
+        with self.assertRaises(ValidationError) as cm_exc:
+            decoder.decode('a=5&d=1')
+        self.assertEqual(str(cm_exc.exception), "Unknown member 'd'")
+
+    def test_encoding(self):
+        decoder = QueryStringDecoder(encoding='latin-1')
+        self.assertEqual(decoder.decode('a%E9=%E9'), {'a\u00e9': '\u00e9'})
+
+    def test_bytes(self):
+        decoder = QueryStringDecoder()
+        for _ in range(2):
+            self.assertEqual(decoder.decode(b'a=5&c.d=caf%C3%A9'), {'a': '5', 'c': {'d': 'caf\u00e9'}})
+        self.assertDictEqual(decoder.key_cache, {'a': ('a',), 'c.d': ('c', 'd')})
+
+    def test_max_cache_size(self):
+        decoder = QueryStringDecoder(max_cache_size=2)
+        self.assertEqual(decoder.decode('a=1&b=2'), {'a': '1', 'b': '2'})
+        self.assertDictEqual(decoder.key_cache, {'a': ('a',), 'b': ('b',)})
+        self.assertEqual(decoder.decode('c=3'), {'c': '3'})
+        self.assertDictEqual(decoder.key_cache, {'c': ('c',)})
+
+        decoder = QueryStringDecoder(max_cache_size=0)
+        self.assertEqual(decoder.decode('a=1&b=2'), {'a': '1', 'b': '2'})
+        self.assertDictEqual(decoder.key_cache, {})
+
+    def test_limits(self):
+        decoder = QueryStringDecoder(max_pairs=2, max_depth=2, max_key_length=5, max_array_length=1)
+        self.assertEqual(decoder.decode('a.0=1&b=2'), {'a': ['1'], 'b': '2'})
+        for query_string, message in (
+            ('a=1&b=2&c=3', 'Query string exceeds the maximum of 2 key/value pairs'),
+            ('a.b.c=1', "Key 'a.b.c' exceeds the maximum key depth of 2"),
+            ('abcdef=1', "Key 'abcdef' exceeds the maximum key length of 5"),
+            ('a.0=1&a.1=2', "Key 'a.1' exceeds the maximum total array length of 1")
+        ):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(ValueError) as cm_exc:
+                    decoder.decode(query_string)
+                self.assertEqual(str(cm_exc.exception), message)
+        self.assertNotIn('a.b.c', decoder.key_cache)
+        self.assertNotIn('abcdef', decoder.key_cache)
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            QueryStringDecoder({}, 'Unknown')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
 
 class TestEncodeQueryString(unittest.TestCase):
 
@@ -350,3 +1068,112 @@ class TestEncodeQueryString(unittest.TestCase):
             encode_query_string({'a': UUID('7da81f83-a656-42f1-aeb3-ab207809fb0e')}),
             'a=7da81f83-a656-42f1-aeb3-ab207809fb0e'
         )
+
+
+class TestQueryStringEncoder(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+struct MyStruct (MyBase)
+    int a
+    optional string b
+    optional float c
+    optional bool d
+    optional date e
+    optional datetime f
+    optional uuid g
+    optional MyEnum h
+    optional MyStruct(nullable) child
+    optional MyUnion u
+    optional int(nullable)[] ints
+    optional string{} strings
+    optional object obj
+    optional any any_
+    optional object[] objs
+    optional MyInts typedef_ints
+    optional MyStruct[] children
+    optional MyEnum{len > 0} enums
+
+struct MyBase
+    optional int base
+
+union MyUnion
+    int n
+    string s
+
+enum MyEnum
+    A
+    "B c"
+
+typedef int[] MyInts
+
+typedef MyStruct(nullable) MyNullableStruct
+''')
+
+    def assert_encode(self, type_name, value, expected):
+        value = validate_type(self.TYPES, type_name, value)
+        self.assertEqual(get_query_string_encoder(self.TYPES, type_name)(value), expected)
+        self.assertEqual(encode_query_string(value), expected)
+
+    def test_struct(self):
+        self.assert_encode('MyStruct', {'a': 1}, 'a=1')
+        self.assert_encode(
+            'MyStruct',
+            {
+                'h': 'B c',
+                'g': '7da81f83-a656-42f1-aeb3-ab207809fb0e',
+                'f': '2013-07-18T12:31:00+01:00',
+                'e': '2013-07-18',
+                'd': True,
+                'c': 1.5,
+                'b': 'x y&z=\u00e9',
+                'a': 1,
+                'base': 0
+            },
+            'a=1&b=x%20y%26z%3D%C3%A9&base=0&c=1.5&d=true&e=2013-07-18&f=2013-07-18T12%3A31%3A00%2B01%3A00'
+            '&g=7da81f83-a656-42f1-aeb3-ab207809fb0e&h=B%20c'
+        )
+
+    def test_containers(self):
+        self.assert_encode(
+            'MyStruct',
+            {'a': 1, 'child': {'a': 2, 'strings': {'k.k': 'v'}}, 'ints': [1, None], 'u': {'s': 'x'}, 'enums': {'k': 'A'}},
+            'a=1&child.a=2&child.strings.k.k=v&enums.k=A&ints.0=1&ints.1=null&u.s=x'
+        )
+        self.assert_encode(
+            'MyStruct',
+            {'a': 1, 'children': [{'a': 2, 'children': []}], 'strings': {}, 'typedef_ints': [], 'child': None},
+            'a=1&child=null&children.0.a=2&children.0.children=&strings=&typedef_ints='
+        )
+
+    def test_any(self):
+        self.assert_encode(
+            'MyStruct',
+            {'a': 1, 'obj': {'y': None, 'x': [1, {}]}, 'any_': 'abc'},
+            'a=1&any_=abc&obj.x.0=1&obj.x.1=&obj.y=null'
+        )
+        self.assert_encode('MyStruct', {'a': 1, 'obj': {}, 'any_': []}, 'a=1&any_=&obj=')
+        self.assert_encode('MyStruct', {'a': 1, 'objs': [{'x': 1}, 'y', {}]}, 'a=1&objs.0.x=1&objs.1=y&objs.2=')
+
+    def test_root_types(self):
+        self.assert_encode('MyNullableStruct', None, 'null')
+        self.assert_encode('MyNullableStruct', {'a': 1}, 'a=1')
+        self.assert_encode('MyInts', [], '')
+        self.assert_encode('MyInts', [1, 2], '0=1&1=2')
+        self.assert_encode('MyUnion', {'n': 1}, 'n=1')
+        self.assert_encode('MyEnum', 'B c', 'B%20c')
+
+    def test_datetime_naive(self):
+        self.assert_encode('MyStruct', {'a': 1, 'f': datetime(2013, 7, 18, 12, 31)}, 'a=1&f=2013-07-18T12%3A31%3A00%2B00%3A00')
+
+    def test_encoding(self):
+        value = {'a': 1, 'b': '\u00e9', 'h': 'A'}
+        self.assertEqual(get_query_string_encoder(self.TYPES, 'MyStruct', encoding='latin-1')(value), 'a=1&b=%E9&h=A')
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            get_query_string_encoder(self.TYPES, 'Unknown')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+
+class _StrSubclass(str):
+    __slots__ = ()
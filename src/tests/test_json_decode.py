@@ -0,0 +1,559 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+import asyncio
+from datetime import date, datetime, timezone
+import io
+import json
+import unittest
+from uuid import UUID
+
+from schema_markdown import ValidationError, get_enum_classes, get_struct_classes, parse_schema_markdown, validate_json, \
+    validate_json_array, validate_json_array_async, validate_type
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional float b
+    optional MyStruct(nullable) child
+    optional MyUnion[len > 0] unions
+    optional date(nullable){} dates
+    optional MyEnum : datetime {} datetimes
+    optional MyEnum(nullable) : int(nullable) {} counts
+    optional uuid id
+    optional any extra
+    optional MyTypedef typedef
+    optional MyTypedefNullable typedefNullable
+    optional string(len < 5)[] strings
+
+union MyUnion
+    int c
+    string d
+
+enum MyEnum
+    A
+    B
+
+typedef int(>= 0) MyTypedef
+
+typedef MyStruct(nullable) MyTypedefNullable
+
+typedef MyStruct[] MyStructs
+''')
+
+
+class TestValidateJSON(unittest.TestCase):
+
+    def assert_validate_json(self, type_name, text, expected):
+        value = validate_json(TEST_TYPES, type_name, text)
+        self.assertEqual(value, expected)
+        self.assertEqual(value, validate_type(TEST_TYPES, type_name, json.loads(text)))
+
+    def assert_validate_json_error(self, type_name, text, expected_message, expected_member=None):
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_json(TEST_TYPES, type_name, text)
+        self.assertEqual(str(cm_exc.exception), expected_message)
+        self.assertEqual(cm_exc.exception.member, expected_member)
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(TEST_TYPES, type_name, json.loads(text))
+        self.assertEqual(str(cm_exc.exception), expected_message)
+        self.assertEqual(cm_exc.exception.member, expected_member)
+
+    def test_struct(self):
+        self.assert_validate_json(
+            'MyStruct',
+            '''\
+{
+    "a": "5",
+    "b": 1,
+    "child": {"a": 6, "child": null},
+    "unions": [{"c": "7"}, {"d": "abc"}],
+    "dates": {"x": "2020-06-17", "y": null, "z": "null"},
+    "datetimes": {"A": "2020-06-17T13:11:00Z"},
+    "counts": {"B": 1, "null": null},
+    "id": "AED91C7B-DCFD-49B3-A483-DBC9EA2031A3",
+    "extra": {"x": [1, 2, {"y": null}]},
+    "typedef": 0,
+    "typedefNullable": "null",
+    "strings": []
+}
+''',
+            {
+                'a': 5,
+                'b': 1.,
+                'child': {'a': 6, 'child': None},
+                'unions': [{'c': 7}, {'d': 'abc'}],
+                'dates': {'x': date(2020, 6, 17), 'y': None, 'z': None},
+                'datetimes': {'A': datetime(2020, 6, 17, 13, 11, tzinfo=timezone.utc)},
+                'counts': {'B': 1, None: None},
+                'id': UUID('aed91c7b-dcfd-49b3-a483-dbc9ea2031a3'),
+                'extra': {'x': [1, 2, {'y': None}]},
+                'typedef': 0,
+                'typedefNullable': None,
+                'strings': []
+            }
+        )
+
+    def test_struct_member_order(self):
+        text = '{"unions": [{"d": "x"}], "child": {"b": 2, "a": 1}, "a": 1}'
+        self.assert_validate_json('MyStruct', text, {'a': 1, 'child': {'a': 1, 'b': 2.}, 'unions': [{'d': 'x'}]})
+        value = validate_json(TEST_TYPES, 'MyStruct', text)
+        self.assertListEqual(list(value), ['a', 'child', 'unions'])
+        self.assertListEqual(list(value['child']), ['a', 'b'])
+
+    def test_struct_escaped_key(self):
+        self.assert_validate_json('MyStruct', '{"\\u0061": 1, "chil\\u0064": {"\\u0061": 2}}', {'a': 1, 'child': {'a': 2}})
+
+    def test_typedef_array(self):
+        self.assert_validate_json('MyStructs', ' [ {"a": 1} , {"a": 2, "child": {"a": 3}} ] ', [{'a': 1}, {'a': 2, 'child': {'a': 3}}])
+        self.assert_validate_json('MyStructs', '[]', [])
+        self.assert_validate_json('MyStructs', '""', [])
+
+    def test_typedef_nullable(self):
+        self.assert_validate_json('MyTypedefNullable', 'null', None)
+        self.assert_validate_json('MyTypedefNullable', '{"a": 1}', {'a': 1})
+
+    def test_empty_string_containers(self):
+        self.assert_validate_json('MyStruct', '{"a": 1, "dates": "", "strings": ""}', {'a': 1, 'dates': {}, 'strings': []})
+
+    def test_bytes(self):
+        self.assertEqual(validate_json(TEST_TYPES, 'MyStruct', b'{"a": 1}'), {'a': 1})
+        self.assertEqual(validate_json(TEST_TYPES, 'MyStruct', '{"a": 1}'.encode('utf-16')), {'a': 1})
+
+    def test_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        enum_classes = get_enum_classes(TEST_TYPES)
+        value = validate_json(
+            TEST_TYPES, 'MyStruct', '{"a": 1, "child": {"a": 2}, "counts": {"A": 1}, "id": "AED91C7B-DCFD-49B3-A483-DBC9EA2031A3"}',
+            struct_classes=struct_classes, enum_classes=enum_classes, uuid_format='string', intern_strings=True
+        )
+        my_struct = struct_classes['MyStruct']
+        self.assertEqual(value, my_struct(a=1, child=my_struct(a=2), counts={'A': 1}, id='aed91c7b-dcfd-49b3-a483-dbc9ea2031a3'))
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_json(TEST_TYPES, 'Unknown', '{}')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_error_member(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "child": {"a": "abc"}}',
+            "Invalid value 'abc' (type 'str') for member 'child.a', expected type 'int'", 'child.a'
+        )
+
+    def test_error_array(self):
+        self.assert_validate_json_error(
+            'MyStructs', '[{"a": 1}, {"a": 2, "unions": [{"c": 1}, {"c": "x"}]}]',
+            "Invalid value 'x' (type 'str') for member '1.unions.1.c', expected type 'int'", '1.unions.1.c'
+        )
+
+    def test_error_array_attr(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "strings": ["abc", "abcdef"]}',
+            "Invalid value 'abcdef' (type 'str') for member 'strings.1', expected type 'string' [len < 5]", 'strings.1'
+        )
+
+    def test_error_member_attr(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "unions": []}',
+            "Invalid value [] (type 'list') for member 'unions', expected type 'array' [len > 0]", 'unions'
+        )
+
+    def test_error_typedef_attr(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "typedef": -1}',
+            "Invalid value -1 (type 'int') for member 'typedef', expected type 'MyTypedef' [>= 0.0]", 'typedef'
+        )
+
+    def test_error_dict_key(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "counts": {"C": 1}}',
+            "Invalid value 'C' (type 'str') for member 'counts', expected type 'MyEnum'", 'counts'
+        )
+
+    def test_error_dict_value(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "dates": {"x": "abc"}}',
+            "Invalid value 'abc' (type 'str') for member 'dates.x', expected type 'date'", 'dates.x'
+        )
+
+    def test_error_container_type(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "unions": {"c": 1}}',
+            "Invalid value {'c': 1} (type 'dict') for member 'unions', expected type 'array'", 'unions'
+        )
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "dates": [1]}',
+            "Invalid value [1] (type 'list') for member 'dates', expected type 'dict'", 'dates'
+        )
+        self.assert_validate_json_error(
+            'MyStruct', '[{"a": 1}]',
+            "Invalid value [{'a': 1}] (type 'list'), expected type 'MyStruct'"
+        )
+
+    def test_error_not_nullable(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": null}',
+            "Invalid value None (type 'NoneType') for member 'a', expected type 'int'", 'a'
+        )
+
+    def test_error_unknown_member(self):
+        self.assert_validate_json_error('MyStruct', '{"a": 1, "child": {"a": 1, "z": 2}}', "Unknown member 'child.z'")
+
+    def test_error_required_member(self):
+        self.assert_validate_json_error('MyStruct', '{"child": {"a": 1}}', "Required member 'a' missing")
+        self.assert_validate_json_error('MyStruct', '{"a": 1, "child": {}}', "Required member 'child.a' missing")
+
+    def test_error_union(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "unions": [{}]}',
+            "Invalid value {} (type 'dict') for member 'unions.0', expected type 'MyUnion'", 'unions.0'
+        )
+
+    def test_error_union_members(self):
+        self.assert_validate_json_error(
+            'MyStruct', '{"a": 1, "unions": [{"c": 1, "d": "x"}]}',
+            "Invalid value {'c': 1, 'd': 'x'} (type 'dict') for member 'unions.0', expected type 'MyUnion'", 'unions.0'
+        )
+
+    def test_error_json(self):
+        for text, message in (
+            ('', 'Expecting value: line 1 column 1 (char 0)'),
+            ('{"a": 1} x', 'Extra data: line 1 column 10 (char 9)'),
+            ('{"a": 1', "Expecting ',' delimiter: line 1 column 8 (char 7)"),
+            ('{"a" 1}', "Expecting ':' delimiter: line 1 column 6 (char 5)"),
+            ('{a: 1}', 'Expecting property name enclosed in double quotes: line 1 column 2 (char 1)'),
+            ('{"a": 1,}', 'Expecting property name enclosed in double quotes: line 1 column 9 (char 8)'),
+            ('{"a": 1, "unions": [{"c": 1},]}', 'Expecting value: line 1 column 30 (char 29)'),
+            ('{"a": 1, "unions": [{"c": 1}}', "Expecting ',' delimiter: line 1 column 29 (char 28)"),
+            ('{"a": 1, "dates": {"x": null x}}', "Expecting ',' delimiter: line 1 column 30 (char 29)"),
+            ('{"a": 1, "child": nul}', 'Expecting value: line 1 column 19 (char 18)')
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                    validate_json(TEST_TYPES, 'MyStruct', text)
+                self.assertEqual(str(cm_exc.exception), message)
+
+
+class TestValidateJSONMembers(unittest.TestCase):
+
+    TYPES = parse_schema_markdown('''\
+struct MyLeaf
+    int a
+    optional string(len < 3) s
+    optional int(nullable) n
+    optional float(> 0) f
+
+struct MyNode
+    int a
+    optional string(len < 3) s
+    optional int(nullable) n
+    optional float(> 0) f
+    optional int[] ints
+    optional int{} counts
+    optional MyInts[] matrix
+    optional MyLeaf leaf
+    optional MyLeaf(nullable)[] leaves
+    optional MyNode{} nodes
+    optional MyNullableString ns
+
+union MyUnion
+    int[] c
+    string d
+
+typedef string(nullable) MyNullableString
+
+typedef int[] MyInts
+''')
+
+    def assert_validate_json(self, type_name, text, expected):
+        value = validate_json(self.TYPES, type_name, text)
+        self.assertEqual(value, expected)
+        self.assertEqual(value, validate_type(self.TYPES, type_name, json.loads(text)))
+        self.assertListEqual(list(value) if isinstance(value, dict) else None, list(expected) if isinstance(expected, dict) else None)
+
+    def assert_validate_json_error(self, type_name, text, expected_message):
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_json(self.TYPES, type_name, text)
+        self.assertEqual(str(cm_exc.exception), expected_message)
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(self.TYPES, type_name, json.loads(text))
+        self.assertEqual(str(cm_exc.exception), expected_message)
+
+    def test_leaf(self):
+        self.assert_validate_json('MyLeaf', '{"f": 1, "n": null, "s": "ab", "a": 1}', {'a': 1, 's': 'ab', 'n': None, 'f': 1.})
+        self.assert_validate_json('MyLeaf', '{"a": "1", "n": "null", "f": 1.5}', {'a': 1, 'n': None, 'f': 1.5})
+
+    def test_node(self):
+        self.assert_validate_json(
+            'MyNode',
+            '''\
+{
+    "f": 1, "n": null, "s": "ab", "a": 1,
+    "ints": [1, 2], "counts": {"x": 1}, "matrix": [[1], ["2"]],
+    "leaf": {"a": 2, "n": 3},
+    "leaves": [{"a": 3}, null, "null"],
+    "nodes": {"x": {"a": 4}, "y": {"a": 5, "nodes": {}} },
+    "ns": "abc"
+}
+''',
+            {
+                'a': 1, 's': 'ab', 'n': None, 'f': 1., 'ints': [1, 2], 'counts': {'x': 1}, 'matrix': [[1], [2]],
+                'leaf': {'a': 2, 'n': 3}, 'leaves': [{'a': 3}, None, None],
+                'nodes': {'x': {'a': 4}, 'y': {'a': 5, 'nodes': {}}}, 'ns': 'abc'
+            }
+        )
+        self.assert_validate_json('MyNode', '{"a": 1, "ns": null, "nodes": {}}', {'a': 1, 'nodes': {}, 'ns': None})
+
+    def test_union(self):
+        self.assert_validate_json('MyUnion', '{"c": [1]}', {'c': [1]})
+        self.assert_validate_json_error(
+            'MyUnion', '{"c": [1], "d": "x"}', "Invalid value {'c': [1], 'd': 'x'} (type 'dict'), expected type 'MyUnion'"
+        )
+
+    def test_error_member(self):
+        for type_name in ('MyLeaf', 'MyNode'):
+            for text, message in (
+                ('{"a": 1, "x": 1}', "Unknown member 'x'"),
+                ('{"a": 1, "s": "abc"}', "Invalid value 'abc' (type 'str') for member 's', expected type 'string' [len < 3]"),
+                ('{"a": 1, "f": 0}', "Invalid value 0.0 (type 'float') for member 'f', expected type 'float' [> 0.0]"),
+                ('{"a": 1, "n": "x"}', "Invalid value 'x' (type 'str') for member 'n', expected type 'int'")
+            ):
+                with self.subTest(type_name=type_name, text=text):
+                    self.assert_validate_json_error(type_name, text, message)
+        self.assert_validate_json_error('MyNode', '{"a": 1, "leaf": {"a": 1, "x": 1}}', "Unknown member 'leaf.x'")
+        self.assert_validate_json_error(
+            'MyNode', '{"a": 1, "ns": 1}', "Invalid value 1 (type 'int') for member 'ns', expected type 'string'"
+        )
+
+    def test_error_json(self):
+        for text, message in (
+            ('{"a": }', 'Expecting value: line 1 column 7 (char 6)'),
+            ('{"a": 1 ]', "Expecting ',' delimiter: line 1 column 9 (char 8)"),
+            ('{"a": 1, "nodes": {"x": {"a": 1} ]}', "Expecting ',' delimiter: line 1 column 34 (char 33)"),
+            ('{"a": 1, "\\u006e": null x}', "Expecting ',' delimiter: line 1 column 25 (char 24)")
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                    validate_json(self.TYPES, 'MyNode', text)
+                self.assertEqual(str(cm_exc.exception), message)
+
+
+class TestValidateJSONArray(unittest.TestCase):
+
+    TEXT = '''\
+ [
+    {"a": 12345, "b": 1.25e2, "child": {"a": "6"}},
+    {"a": -1, "unions": [{"d": "caf\u00e9 \u2603"}], "extra": [true, false, null]},
+    {"a": 0, "dates": {"x": "2020-06-17"}}
+]
+'''
+
+    EXPECTED = [
+        {'a': 12345, 'b': 125., 'child': {'a': 6}},
+        {'a': -1, 'unions': [{'d': 'caf\u00e9 \u2603'}], 'extra': [True, False, None]},
+        {'a': 0, 'dates': {'x': date(2020, 6, 17)}}
+    ]
+
+    def test_chunk_sizes(self):
+        for chunk_size in (1, 2, 3, 7, 64, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                values = list(validate_json_array(TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), chunk_size=chunk_size))
+                self.assertListEqual(values, self.EXPECTED)
+
+    def test_bytes(self):
+        text = self.TEXT.replace('\\u00e9', '\u00e9').replace('\\u2603', '\u2603')
+        for chunk_size in (1, 2, 3, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                values = list(validate_json_array(TEST_TYPES, 'MyStruct', io.BytesIO(text.encode('utf-8')), chunk_size=chunk_size))
+                self.assertListEqual(values, self.EXPECTED)
+
+    def test_scalars(self):
+        types = {'MyInt': {'typedef': {'name': 'MyInt', 'type': {'builtin': 'int'}}}}
+        for chunk_size in (1, 2, 3, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                values = list(validate_json_array(types, 'MyInt', io.StringIO('[1,22,333,"4444",5e2]'), chunk_size=chunk_size))
+                self.assertListEqual(values, [1, 22, 333, 4444, 500])
+
+    def test_empty(self):
+        for text in ('[]', ' [ ] '):
+            with self.subTest(text=text):
+                self.assertListEqual(list(validate_json_array(TEST_TYPES, 'MyStruct', io.StringIO(text), chunk_size=1)), [])
+
+    def test_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        values = list(validate_json_array(
+            TEST_TYPES, 'MyStruct', io.StringIO('[{"a": 1}, {"a": 2}]'), struct_classes=struct_classes
+        ))
+        my_struct = struct_classes['MyStruct']
+        self.assertListEqual(values, [my_struct(a=1), my_struct(a=2)])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            list(validate_json_array(TEST_TYPES, 'Unknown', io.StringIO('[]')))
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_error_validation(self):
+        values = validate_json_array(TEST_TYPES, 'MyStruct', io.StringIO('[{"a": 1}, {"a": 2, "child": {"a": "x"}}, {"a": 3}]'))
+        self.assertEqual(next(values), {'a': 1})
+        with self.assertRaises(ValidationError) as cm_exc:
+            next(values)
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'x' (type 'str') for member '1.child.a', expected type 'int'")
+        self.assertEqual(cm_exc.exception.member, '1.child.a')
+
+    def test_error_json(self):
+        types = {'MyInt': {'typedef': {'name': 'MyInt', 'type': {'builtin': 'int'}}}}
+        for text in (
+            '',
+            '[',
+            '[1',
+            '[1,',
+            '[1,]',
+            '[1 2]',
+            '[1] x',
+            '[12.]',
+            '[\n  1,\n  2 x]',
+            '[\n  1,\n  "abc'
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                    json.loads(text)
+                message = str(cm_exc.exception)
+                for chunk_size in (1, 3, 65536):
+                    with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                        list(validate_json_array(types, 'MyInt', io.StringIO(text), chunk_size=chunk_size))
+                    self.assertEqual(str(cm_exc.exception), message)
+
+    def test_large_value(self):
+        strings = [f'{ix:04d}' for ix in range(1000)]
+        text = json.dumps([{'a': 1, 'strings': strings}, {'a': 2}])
+        types = parse_schema_markdown('struct MyStruct\n    int a\n    optional string[] strings\n')
+        for chunk_size in (1, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                values = list(validate_json_array(types, 'MyStruct', io.BytesIO(text.encode('utf-8')), chunk_size=chunk_size))
+                self.assertListEqual(values, [{'a': 1, 'strings': strings}, {'a': 2}])
+
+    def test_error_json_incomplete(self):
+        types = {'MyInt': {'typedef': {'name': 'MyInt', 'type': {'builtin': 'int'}}}}
+        for text in ('[1, tr', '[1, "ab', '[1, "\\u12', '[1, -', '[1, 1e', '[1, 2E+'):
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                    json.loads(text + ']')
+                message = str(cm_exc.exception)
+                with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                    list(validate_json_array(types, 'MyInt', _ChunkReader([text, ']'])))
+                self.assertEqual(str(cm_exc.exception), message)
+
+    def test_error_json_early(self):
+        # A syntax error is raised without reading the rest of the document
+        for text in ('[{"a": 1}, x', '[{"a": 1}, {"a": x', '[{"a": 1}, {"a": 1 2, ', '[{"a": 1}, "\x01'):
+            with self.subTest(text=text):
+                reader = _ChunkReader([text], ' ' * 1000)
+                with self.assertRaises(json.JSONDecodeError):
+                    list(validate_json_array(TEST_TYPES, 'MyStruct', reader))
+                self.assertEqual(reader.reads, 1)
+
+    def test_error_json_not_array(self):
+        with self.assertRaises(json.JSONDecodeError) as cm_exc:
+            list(validate_json_array(TEST_TYPES, 'MyStruct', io.StringIO('\n {}')))
+        self.assertEqual(str(cm_exc.exception), 'Expecting array: line 2 column 2 (char 2)')
+
+
+class TestValidateJSONArrayAsync(unittest.TestCase):
+
+    TEXT = TestValidateJSONArray.TEXT
+    EXPECTED = TestValidateJSONArray.EXPECTED
+
+    @staticmethod
+    def validate(types, type_name, chunks, **kwargs):
+        async def chunk_iterator():
+            for chunk in chunks:
+                await asyncio.sleep(0)
+                yield chunk
+
+        async def validate_values():
+            return [value async for value in validate_json_array_async(types, type_name, chunk_iterator(), **kwargs)]
+
+        return asyncio.run(validate_values())
+
+    def test_stream_reader(self):
+        async def validate_values():
+            reader = asyncio.StreamReader()
+            reader.feed_data(self.TEXT.encode('utf-8'))
+            reader.feed_eof()
+            return [value async for value in validate_json_array_async(TEST_TYPES, 'MyStruct', reader, chunk_size=5)]
+
+        self.assertListEqual(asyncio.run(validate_values()), self.EXPECTED)
+
+    def test_stream_reader_backpressure(self):
+        async def validate_values():
+            reader = asyncio.StreamReader()
+            values = validate_json_array_async(TEST_TYPES, 'MyStruct', reader)
+            reader.feed_data(b'[{"a": 1}, {"a"')
+            first = await values.__anext__()
+            reader.feed_data(b': 2}]')
+            reader.feed_eof()
+            return [first] + [value async for value in values]
+
+        self.assertListEqual(asyncio.run(validate_values()), [{'a': 1}, {'a': 2}])
+
+    def test_async_iterable(self):
+        text = self.TEXT.replace('\\u00e9', '\u00e9').replace('\\u2603', '\u2603').encode('utf-8')
+        for chunk_size in (1, 3, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = [b''] + [text[ix:ix + chunk_size] for ix in range(0, len(text), chunk_size)]
+                self.assertListEqual(self.validate(TEST_TYPES, 'MyStruct', chunks), self.EXPECTED)
+
+    def test_str_chunks(self):
+        self.assertListEqual(self.validate(TEST_TYPES, 'MyStruct', ['[{"a"', ': 1}', ']']), [{'a': 1}])
+
+    def test_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        values = self.validate(TEST_TYPES, 'MyStruct', [b'[{"a": 1}]'], struct_classes=struct_classes)
+        self.assertListEqual(values, [struct_classes['MyStruct'](a=1)])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            self.validate(TEST_TYPES, 'Unknown', [b'[]'])
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_error_validation(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            self.validate(TEST_TYPES, 'MyStruct', [b'[{"a": 1}, {"a": "x"}]'])
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'x' (type 'str') for member '1.a', expected type 'int'")
+
+    def test_error_json(self):
+        with self.assertRaises(json.JSONDecodeError) as cm_exc:
+            self.validate(TEST_TYPES, 'MyStruct', [b'[{"a": 1}', b' {"a": 2}]'])
+        self.assertEqual(str(cm_exc.exception), "Expecting ',' delimiter: line 1 column 11 (char 10)")
+
+    def test_error_json_early(self):
+        async def validate_values():
+            reader = asyncio.StreamReader()
+            values = validate_json_array_async(TEST_TYPES, 'MyStruct', reader)
+            reader.feed_data(b'[{"a": 1}, x')
+            first = await values.__anext__()
+            with self.assertRaises(json.JSONDecodeError) as cm_exc:
+                await values.__anext__()
+            return first, str(cm_exc.exception)
+
+        self.assertTupleEqual(asyncio.run(validate_values()), ({'a': 1}, 'Expecting value: line 1 column 12 (char 11)'))
+
+
+# File-like object that reads a list of chunks, then an optional chunk forever
+class _ChunkReader:
+    __slots__ = ('chunks', 'chunk_forever', 'reads')
+
+    def __init__(self, chunks, chunk_forever=None):
+        self.chunks = list(chunks)
+        self.chunk_forever = chunk_forever
+        self.reads = 0
+
+    def read(self, _size):
+        self.reads += 1
+        if self.chunks:
+            return self.chunks.pop(0)
+        return self.chunk_forever or ''
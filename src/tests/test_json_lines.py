@@ -0,0 +1,563 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+import io
+import json
+import mmap
+import os
+import pickle
+import tempfile
+import unittest
+
+from schema_markdown import JSONEncoder, JSONLinesIndex, JSONLinesWriter, StructTupleJSONEncoder, ValidationError, \
+    get_json_serializer, get_struct_classes, get_struct_tuples, parse_schema_markdown, validate_jsonl, validate_jsonl_async
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional date b
+    optional string(len < 5) c
+''')
+
+
+class TestValidateJSONL(unittest.TestCase):
+
+    TEXT = '''\
+{"a": 1, "b": "2020-06-17"}
+{"a": "2", "c": "café"}
+
+{"a": "x"}
+{"a": 4
+  \t
+{"a": 5, "c": "abcde"}
+{"a": 6}'''
+
+    EXPECTED_VALUES = [
+        (1, {'a': 1, 'b': date(2020, 6, 17)}),
+        (2, {'a': 2, 'c': 'café'}),
+        (8, {'a': 6})
+    ]
+
+    EXPECTED_ERRORS = [
+        (4, ValidationError, "Invalid value 'x' (type 'str') for member 'a', expected type 'int'"),
+        (5, json.JSONDecodeError, "Expecting ',' delimiter: line 1 column 8 (char 7)"),
+        (7, ValidationError, "Invalid value 'abcde' (type 'str') for member 'c', expected type 'string' [len < 5]")
+    ]
+
+    def assert_results(self, results, expected_values, expected_errors):
+        values = [(line_number, value) for line_number, value in results if not isinstance(value, Exception)]
+        errors = [(line_number, type(value), str(value)) for line_number, value in results if isinstance(value, Exception)]
+        self.assertListEqual(values, expected_values)
+        self.assertListEqual(errors, expected_errors)
+
+    def test_collect(self):
+        results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT)))
+        self.assertListEqual([line_number for line_number, _ in results], [1, 2, 4, 5, 7, 8])
+        self.assert_results(results, self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_skip(self):
+        results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), errors='skip'))
+        self.assertListEqual(results, self.EXPECTED_VALUES)
+
+    def test_stop(self):
+        results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), errors='stop'))
+        self.assert_results(results, self.EXPECTED_VALUES[:2], self.EXPECTED_ERRORS[:1])
+
+    def test_chunk_sizes(self):
+        for chunk_size in (1, 2, 3, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), chunk_size=chunk_size))
+                self.assert_results(results, self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_bytes(self):
+        for chunk_size in (1, 2, 3, 1048576):
+            with self.subTest(chunk_size=chunk_size):
+                fileobj = io.BytesIO(self.TEXT.encode('utf-8'))
+                results = list(validate_jsonl(TEST_TYPES, 'MyStruct', fileobj, chunk_size=chunk_size))
+                self.assert_results(results, self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_crlf(self):
+        fileobj = io.BytesIO(self.TEXT.replace('\n', '\r\n').encode('utf-8'))
+        results = list(validate_jsonl(TEST_TYPES, 'MyStruct', fileobj, errors='skip', chunk_size=3))
+        self.assertListEqual(results, self.EXPECTED_VALUES)
+
+    def test_bytes_invalid_utf8(self):
+        results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.BytesIO(b'{"a": 1}\n"\xff"\n')))
+        self.assertEqual(results[0], (1, {'a': 1}))
+        self.assertEqual(results[1][0], 2)
+        self.assertIsInstance(results[1][1], UnicodeDecodeError)
+
+    def test_empty(self):
+        for text in ('', '\n', ' \n\n'):
+            with self.subTest(text=text):
+                self.assertListEqual(list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(text))), [])
+
+    def test_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO('{"a": 1}\n{"a": 2}\n'), struct_classes=struct_classes))
+        my_struct = struct_classes['MyStruct']
+        self.assertListEqual(results, [(1, my_struct(a=1)), (2, my_struct(a=2))])
+
+    def test_executor(self):
+        for batch_size in (1, 2, 1000):
+            with self.subTest(batch_size=batch_size):
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    results = list(validate_jsonl(
+                        TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), executor=executor, batch_size=batch_size
+                    ))
+                self.assert_results(results, self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_executor_max_pending(self):
+        for max_pending in (1, 2):
+            with self.subTest(max_pending=max_pending):
+                executor = _SerialExecutor()
+                results = validate_jsonl(
+                    TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), executor=executor, batch_size=1, max_pending=max_pending
+                )
+                first = next(results)
+                self.assertEqual(executor.submits, max_pending)
+                self.assert_results([first, *results], self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_executor_stop(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(self.TEXT), errors='stop', executor=executor, batch_size=1))
+        self.assert_results(results, self.EXPECTED_VALUES[:2], self.EXPECTED_ERRORS[:1])
+
+    def test_executor_process(self):
+        text = '\n'.join(f'{{"a": {ix}}}' for ix in range(100)) + '\n{"a": "x"}\n'
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(text), executor=executor, batch_size=30))
+        self.assertListEqual(results[:100], [(ix + 1, {'a': ix}) for ix in range(100)])
+        self.assertEqual(results[100][0], 101)
+        self.assertIsInstance(results[100][1], ValidationError)
+        self.assertEqual(results[100][1].member, 'a')
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            list(validate_jsonl(TEST_TYPES, 'Unknown', io.StringIO('')))
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_invalid_errors(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            list(validate_jsonl(TEST_TYPES, 'MyStruct', io.StringIO(''), errors='ignore'))
+        self.assertEqual(str(cm_exc.exception), "Invalid errors value 'ignore'")
+
+
+class TestValidateJSONLAsync(unittest.TestCase):
+
+    TEXT = TestValidateJSONL.TEXT
+    EXPECTED_VALUES = TestValidateJSONL.EXPECTED_VALUES
+    EXPECTED_ERRORS = TestValidateJSONL.EXPECTED_ERRORS
+
+    def assert_results(self, results, expected_values, expected_errors):
+        values = [(line_number, value) for line_number, value in results if not isinstance(value, Exception)]
+        errors = [(line_number, type(value), str(value)) for line_number, value in results if isinstance(value, Exception)]
+        self.assertListEqual(values, expected_values)
+        self.assertListEqual(errors, expected_errors)
+
+    @staticmethod
+    def validate(chunks, **kwargs):
+        async def chunk_iterator():
+            for chunk in chunks:
+                await asyncio.sleep(0)
+                yield chunk
+
+        async def validate_lines():
+            return [result async for result in validate_jsonl_async(TEST_TYPES, 'MyStruct', chunk_iterator(), **kwargs)]
+
+        return asyncio.run(validate_lines())
+
+    @classmethod
+    def get_chunks(cls, chunk_size):
+        text = cls.TEXT.encode('utf-8')
+        return [text[ix:ix + chunk_size] for ix in range(0, len(text), chunk_size)]
+
+    def test_stream_reader(self):
+        async def validate_lines():
+            reader = asyncio.StreamReader()
+            reader.feed_data(self.TEXT.encode('utf-8'))
+            reader.feed_eof()
+            return [result async for result in validate_jsonl_async(TEST_TYPES, 'MyStruct', reader, chunk_size=5)]
+
+        self.assert_results(asyncio.run(validate_lines()), self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_stream_reader_backpressure(self):
+        async def validate_lines():
+            reader = asyncio.StreamReader()
+            results = validate_jsonl_async(TEST_TYPES, 'MyStruct', reader)
+            reader.feed_data(b'{"a": 1}\n{"a"')
+            first = await results.__anext__()
+            reader.feed_data(b': 2}\n')
+            reader.feed_eof()
+            return [first] + [result async for result in results]
+
+        self.assertListEqual(asyncio.run(validate_lines()), [(1, {'a': 1}), (2, {'a': 2})])
+
+    def test_collect(self):
+        for chunk_size in (1, 2, 3, 7, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                results = self.validate(self.get_chunks(chunk_size))
+                self.assert_results(results, self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_skip(self):
+        for chunk_size in (1, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertListEqual(self.validate(self.get_chunks(chunk_size), errors='skip'), self.EXPECTED_VALUES)
+
+    def test_stop(self):
+        for chunk_size in (1, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                results = self.validate(self.get_chunks(chunk_size), errors='stop')
+                self.assert_results(results, self.EXPECTED_VALUES[:2], self.EXPECTED_ERRORS[:1])
+
+    def test_stop_last_line(self):
+        results = self.validate([b'{"a": 1}\n{"a": "x"}'], errors='stop')
+        self.assertEqual(results[0], (1, {'a': 1}))
+        self.assertEqual(results[1][0], 2)
+        self.assertIsInstance(results[1][1], ValidationError)
+        self.assertEqual(len(results), 2)
+
+    def test_str_chunks(self):
+        self.assertListEqual(self.validate(['{"a": 1}\n{"a"', ': 2}']), [(1, {'a': 1}), (2, {'a': 2})])
+
+    def test_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        results = self.validate([b'{"a": 1}\n'], struct_classes=struct_classes)
+        self.assertListEqual(results, [(1, struct_classes['MyStruct'](a=1))])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_jsonl_async(TEST_TYPES, 'Unknown', None)
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_invalid_errors(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            validate_jsonl_async(TEST_TYPES, 'MyStruct', None, errors='ignore')
+        self.assertEqual(str(cm_exc.exception), "Invalid errors value 'ignore'")
+
+
+class TestJSONLinesIndex(unittest.TestCase):
+
+    TEXT = TestValidateJSONL.TEXT
+    EXPECTED_VALUES = TestValidateJSONL.EXPECTED_VALUES
+    EXPECTED_ERRORS = TestValidateJSONL.EXPECTED_ERRORS
+
+    def assert_results(self, results, expected_values, expected_errors):
+        values = [(line_number, value) for line_number, value in results if not isinstance(value, Exception)]
+        errors = [(line_number, type(value), str(value)) for line_number, value in results if isinstance(value, Exception)]
+        self.assertListEqual(values, expected_values)
+        self.assertListEqual(errors, expected_errors)
+
+    def test_offsets(self):
+        data = self.TEXT.encode('utf-8')
+        index = JSONLinesIndex(data)
+        self.assertEqual(index.offsets.typecode, 'q')
+        self.assertListEqual(list(index.offsets), [0, 28, 53, 54, 65, 73, 77, 100, 108])
+        self.assertEqual(len(index), 8)
+        self.assertEqual(index.offsets[-1], len(data))
+
+    def test_offsets_trailing_newline(self):
+        index = JSONLinesIndex(b'{"a": 1}\n\n')
+        self.assertListEqual(list(index.offsets), [0, 9, 10])
+        self.assertEqual(len(index), 2)
+
+    def test_offsets_empty(self):
+        index = JSONLinesIndex(b'')
+        self.assertListEqual(list(index.offsets), [0])
+        self.assertEqual(len(index), 0)
+        self.assertListEqual(list(index.validate(TEST_TYPES, 'MyStruct')), [])
+        self.assertListEqual(index.split(4), [])
+
+    def test_validate(self):
+        index = JSONLinesIndex(self.TEXT.encode('utf-8'))
+        self.assert_results(list(index.validate(TEST_TYPES, 'MyStruct')), self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+        self.assertListEqual(list(index.validate(TEST_TYPES, 'MyStruct', errors='skip')), self.EXPECTED_VALUES)
+        self.assert_results(
+            list(index.validate(TEST_TYPES, 'MyStruct', errors='stop')), self.EXPECTED_VALUES[:2], self.EXPECTED_ERRORS[:1]
+        )
+
+    def test_validate_mmap(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'test.jsonl')
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write(self.TEXT)
+            with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                index = JSONLinesIndex(data)
+                results = list(index.validate(TEST_TYPES, 'MyStruct'))
+        self.assert_results(results, self.EXPECTED_VALUES, self.EXPECTED_ERRORS)
+
+    def test_validate_line_numbers(self):
+        index = JSONLinesIndex(self.TEXT.encode('utf-8'))
+        results = list(index.validate(TEST_TYPES, 'MyStruct', line_numbers=[8, 3, 5, 1]))
+        self.assert_results(results, [(8, {'a': 6}), self.EXPECTED_VALUES[0]], self.EXPECTED_ERRORS[1:2])
+        self.assertListEqual([line_number for line_number, _ in results], [8, 5, 1])
+
+    def test_validate_line_numbers_invalid(self):
+        index = JSONLinesIndex(self.TEXT.encode('utf-8'))
+        for line_number in (0, 9):
+            with self.subTest(line_number=line_number):
+                with self.assertRaises(IndexError) as cm_exc:
+                    list(index.validate(TEST_TYPES, 'MyStruct', line_numbers=[line_number]))
+                self.assertEqual(str(cm_exc.exception), f'Line number {line_number} out of range')
+
+    def test_validate_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        index = JSONLinesIndex(b'{"a": 1}\n{"a": 2}\n')
+        my_struct = struct_classes['MyStruct']
+        results = list(index.validate(TEST_TYPES, 'MyStruct', struct_classes=struct_classes))
+        self.assertListEqual(results, [(1, my_struct(a=1)), (2, my_struct(a=2))])
+
+    def test_validate_errors(self):
+        index = JSONLinesIndex(b'')
+        with self.assertRaises(ValidationError) as cm_exc:
+            index.validate(TEST_TYPES, 'Unknown')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+        with self.assertRaises(ValueError) as cm_exc:
+            index.validate(TEST_TYPES, 'MyStruct', errors='ignore')
+        self.assertEqual(str(cm_exc.exception), "Invalid errors value 'ignore'")
+
+    def test_resume(self):
+        index = JSONLinesIndex(self.TEXT.encode('utf-8'))
+        checkpoint = index.get_offset(4)
+        self.assertEqual(checkpoint, 54)
+        self.assertEqual(index.get_line_number(checkpoint), 4)
+        self.assertEqual(index.get_line_number(checkpoint + 1), 5)
+        self.assertEqual(index.get_line_number(0), 1)
+        self.assertEqual(index.get_line_number(108), 9)
+        self.assertEqual(index.get_offset(9), 108)
+        line_numbers = index.get_line_numbers(checkpoint)
+        self.assertEqual(line_numbers, range(4, 9))
+        self.assert_results(
+            list(index.validate(TEST_TYPES, 'MyStruct', line_numbers=line_numbers)), self.EXPECTED_VALUES[2:], self.EXPECTED_ERRORS
+        )
+
+    def test_get_line_numbers(self):
+        index = JSONLinesIndex(self.TEXT.encode('utf-8'))
+        self.assertEqual(index.get_line_numbers(), range(1, 9))
+        self.assertEqual(index.get_line_numbers(0, 54), range(1, 4))
+        self.assertEqual(index.get_line_numbers(54, 55), range(4, 5))
+        self.assertEqual(index.get_line_numbers(55, 60), range(5, 5))
+        self.assertEqual(index.get_line_numbers(55), range(5, 9))
+
+    def test_split(self):
+        index = JSONLinesIndex(self.TEXT.encode('utf-8'))
+        self.assertListEqual(index.split(1), [range(1, 9)])
+        self.assertListEqual(index.split(2), [range(1, 4), range(4, 9)])
+        self.assertListEqual(index.split(3), [range(1, 3), range(3, 6), range(6, 9)])
+        for count in range(1, 20):
+            with self.subTest(count=count):
+                ranges = index.split(count)
+                self.assertLessEqual(len(ranges), count)
+                self.assertListEqual([line_number for line_numbers in ranges for line_number in line_numbers], list(range(1, 9)))
+
+    def test_split_process(self):
+        data = ('\n'.join(f'{{"a": {ix}}}' for ix in range(100)) + '\n{"a": "x"}\n').encode('utf-8')
+        index = JSONLinesIndex(data)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(_validate_line_numbers, data, index.offsets, line_numbers)
+                for line_numbers in index.split(3)
+            ]
+            results = [result for future in futures for result in future.result()]
+        self.assertListEqual(results[:100], [(ix + 1, {'a': ix}) for ix in range(100)])
+        self.assertEqual(results[100][0], 101)
+        self.assertEqual(results[100][1].member, 'a')
+
+
+class WriteCounter(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.write_count = 0
+
+    def write(self, s):
+        self.write_count += 1
+        return super().write(s)
+
+
+class TestJSONLinesWriter(unittest.TestCase):
+
+    VALUES = [
+        {'a': 1, 'b': date(2020, 6, 17)},
+        {'a': 2, 'c': 'caf\u00e9', 'd': datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc)},
+        [1, 'two', None],
+        'three',
+        4.5
+    ]
+
+    EXPECTED = '''\
+{"a":1,"b":"2020-06-17"}
+{"a":2,"c":"caf\\u00e9","d":"2020-06-17T12:30:00+00:00"}
+[1,"two",null]
+"three"
+4.5
+'''
+
+    def test_write(self):
+        fileobj = WriteCounter()
+        with JSONLinesWriter(fileobj) as writer:
+            for value in self.VALUES:
+                writer.write(value)
+            self.assertEqual(fileobj.getvalue(), '')
+        self.assertEqual(fileobj.getvalue(), self.EXPECTED)
+        self.assertEqual(fileobj.write_count, 1)
+
+    def test_writelines(self):
+        fileobj = io.StringIO()
+        with JSONLinesWriter(fileobj) as writer:
+            writer.writelines(self.VALUES)
+        self.assertEqual(fileobj.getvalue(), self.EXPECTED)
+
+    def test_buffer_size(self):
+        fileobj = WriteCounter()
+        with JSONLinesWriter(fileobj, buffer_size=40) as writer:
+            writer.writelines(self.VALUES)
+            self.assertEqual(fileobj.write_count, 1)
+            self.assertEqual(fileobj.getvalue(), '{"a":1,"b":"2020-06-17"}\n{"a":2,"c":"caf\\u00e9","d":"2020-06-17T12:30:00+00:00"}\n')
+        self.assertEqual(fileobj.getvalue(), self.EXPECTED)
+        self.assertEqual(fileobj.write_count, 2)
+
+    def test_flush(self):
+        fileobj = io.StringIO()
+        writer = JSONLinesWriter(fileobj)
+        writer.write({'a': 1})
+        self.assertEqual(fileobj.getvalue(), '')
+        writer.flush()
+        self.assertEqual(fileobj.getvalue(), '{"a":1}\n')
+        writer.write({'a': 2})
+        writer.close()
+        self.assertEqual(fileobj.getvalue(), '{"a":1}\n{"a":2}\n')
+
+    def test_flush_no_flush(self):
+        # File-like objects without a flush method are written
+        fileobj = _WriteOnly()
+        writer = JSONLinesWriter(fileobj)
+        writer.write({'a': 1})
+        writer.flush()
+        self.assertEqual(fileobj.chunks, ['{"a":1}\n'])
+
+    def test_encoding(self):
+        fileobj = io.BytesIO()
+        with JSONLinesWriter(fileobj, encoder=JSONEncoder(ensure_ascii=False, separators=(',', ':')), encoding='utf-8') as writer:
+            writer.writelines(self.VALUES)
+        self.assertEqual(fileobj.getvalue(), self.EXPECTED.replace('\\u00e9', '\u00e9').encode('utf-8'))
+
+    def test_encoder(self):
+        fileobj = io.StringIO()
+        with JSONLinesWriter(fileobj, encoder=JSONEncoder(sort_keys=True)) as writer:
+            writer.write({'b': 1, 'a': date(2020, 6, 17)})
+        self.assertEqual(fileobj.getvalue(), '{"a": "2020-06-17", "b": 1}\n')
+
+    def test_encoder_subclass(self):
+        struct_tuples = get_struct_tuples(TEST_TYPES)
+        fileobj = io.StringIO()
+        with JSONLinesWriter(fileobj, encoder=StructTupleJSONEncoder(TEST_TYPES, 'MyStruct', separators=(',', ':'))) as writer:
+            writer.write(struct_tuples['MyStruct'](a=1, c='x'))
+        self.assertEqual(fileobj.getvalue(), '{"a":1,"c":"x"}\n')
+
+    def test_encoder_function(self):
+        fileobj = io.StringIO()
+        with JSONLinesWriter(fileobj, encoder=get_json_serializer(TEST_TYPES, 'MyStruct')) as writer:
+            writer.write({'a': 1, 'b': date(2020, 6, 17)})
+        self.assertEqual(fileobj.getvalue(), '{"a":1,"b":"2020-06-17"}\n')
+
+    def test_encoder_indent(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            JSONLinesWriter(io.StringIO(), encoder=JSONEncoder(indent=2))
+        self.assertEqual(str(cm_exc.exception), 'JSON Lines encoder must not indent')
+
+    def test_encoder_error(self):
+        fileobj = io.StringIO()
+        value = [[1, 2], object()]
+        with JSONLinesWriter(fileobj) as writer:
+            with self.assertRaises(TypeError):
+                writer.write(value)
+
+            # The failed value's circular reference markers are discarded
+            value[1] = 3
+            writer.write(value)
+        self.assertEqual(fileobj.getvalue(), '[[1,2],3]\n')
+
+    def test_executor(self):
+        values = [{'a': ix, 'b': date(2020, 6, 1 + ix % 30)} for ix in range(100)]
+        expected = ''.join(f'{{"a":{ix},"b":"2020-06-{1 + ix % 30:02d}"}}\n' for ix in range(100))
+        for batch_size in (1, 7, 1000):
+            with self.subTest(batch_size=batch_size):
+                fileobj = io.StringIO()
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    with JSONLinesWriter(fileobj, executor=executor, batch_size=batch_size) as writer:
+                        writer.writelines(values)
+                self.assertEqual(fileobj.getvalue(), expected)
+
+    def test_executor_max_pending(self):
+        for max_pending in (1, 2):
+            with self.subTest(max_pending=max_pending):
+                fileobj = io.StringIO()
+                executor = _SerialExecutor()
+                with JSONLinesWriter(fileobj, buffer_size=0, executor=executor, batch_size=1, max_pending=max_pending) as writer:
+                    writer.writelines([1, 2, 3])
+                    self.assertEqual(executor.submits, 3)
+                    self.assertEqual(fileobj.getvalue(), '1\n2\n3\n' if max_pending == 1 else '1\n2\n')
+                self.assertEqual(fileobj.getvalue(), '1\n2\n3\n')
+
+    def test_executor_process(self):
+        values = [{'a': ix, 'b': date(2020, 6, 1 + ix % 30)} for ix in range(100)]
+        fileobj = io.StringIO()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            with JSONLinesWriter(fileobj, executor=executor, batch_size=10) as writer:
+                writer.writelines(values)
+        self.assertEqual(fileobj.getvalue(), ''.join(f'{{"a":{ix},"b":"2020-06-{1 + ix % 30:02d}"}}\n' for ix in range(100)))
+
+    def test_executor_pickle(self):
+        # The submitted batch encoder is unpickled and used, the same as in a worker process
+        fileobj = io.StringIO()
+        executor = _PicklingExecutor()
+        with JSONLinesWriter(fileobj, executor=executor, batch_size=2) as writer:
+            writer.writelines([{'a': 1}, {'a': 2}, {'b': date(2020, 6, 17)}])
+        self.assertEqual(fileobj.getvalue(), '{"a":1}\n{"a":2}\n{"b":"2020-06-17"}\n')
+
+
+# Executor that runs pickled copies of submitted functions immediately, the same as a process pool executor
+class _PicklingExecutor:
+    __slots__ = ()
+
+    def submit(self, fn, *args):
+        fn, args = pickle.loads(pickle.dumps((fn, args)))
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+# File-like object with only a write method
+class _WriteOnly:
+    __slots__ = ('chunks',)
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, text):
+        self.chunks.append(text)
+
+
+# Executor that runs submitted functions immediately and counts the submits
+class _SerialExecutor:
+    __slots__ = ('submits',)
+
+    def __init__(self):
+        self.submits = 0
+
+    def submit(self, fn, *args):
+        self.submits += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def _validate_line_numbers(data, offsets, line_numbers):
+    return list(JSONLinesIndex(data, offsets).validate(TEST_TYPES, 'MyStruct', line_numbers=line_numbers))
@@ -0,0 +1,243 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+import json
+import unittest
+from uuid import UUID
+
+from schema_markdown import JSONEncoder, ValidationError, decode_msgpack, encode_msgpack, get_struct_classes, \
+    parse_schema_markdown, validate_msgpack, validate_type
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional string b
+    optional float c
+    optional date d
+    optional datetime e
+    optional uuid f
+    optional MyEnum g
+    optional MyStruct[] children
+    optional int{} counts
+
+enum MyEnum
+    A
+    B
+''')
+
+
+class MyEnum(Enum):
+    A = 1
+
+
+class TestEncodeMsgpack(unittest.TestCase):
+
+    def test_values(self):
+        for value, expected in (
+            (None, b'\xc0'),
+            (False, b'\xc2'),
+            (True, b'\xc3'),
+            (0, b'\x00'),
+            (127, b'\x7f'),
+            (128, b'\xcc\x80'),
+            (256, b'\xcd\x01\x00'),
+            (65536, b'\xce\x00\x01\x00\x00'),
+            (2 ** 32, b'\xcf\x00\x00\x00\x01\x00\x00\x00\x00'),
+            (-1, b'\xff'),
+            (-32, b'\xe0'),
+            (-33, b'\xd0\xdf'),
+            (-129, b'\xd1\xff\x7f'),
+            (-32769, b'\xd2\xff\xff\x7f\xff'),
+            (-(2 ** 31) - 1, b'\xd3\xff\xff\xff\xff\x7f\xff\xff\xff'),
+            (1.5, b'\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00'),
+            ('', b'\xa0'),
+            ('abc', b'\xa3abc'),
+            ('é', b'\xa2\xc3\xa9'),
+            ('x' * 32, b'\xd9\x20' + b'x' * 32),
+            ('x' * 256, b'\xda\x01\x00' + b'x' * 256),
+            ('x' * 65536, b'\xdb\x00\x01\x00\x00' + b'x' * 65536),
+            (b'ab', b'\xc4\x02ab'),
+            (bytearray(b'ab'), b'\xc4\x02ab'),
+            ([], b'\x90'),
+            ([1, 'a'], b'\x92\x01\xa1a'),
+            ((1, 2), b'\x92\x01\x02'),
+            (list(range(16)), b'\xdc\x00\x10' + bytes(range(16))),
+            ([0] * 65536, b'\xdd\x00\x01\x00\x00' + bytes(65536)),
+            ({}, b'\x80'),
+            ({'a': 1}, b'\x81\xa1a\x01'),
+            ({str(ix): ix for ix in range(16)}, b'\xde\x00\x10' + b''.join(b'\xa1' + str(ix).encode() + bytes([ix]) for ix in range(10)) +
+             b''.join(b'\xa2' + str(ix).encode() + bytes([ix]) for ix in range(10, 16)))
+        ):
+            with self.subTest(value=value):
+                data = encode_msgpack(value)
+                self.assertEqual(data, expected)
+                self.assertEqual(decode_msgpack(data), list(value) if isinstance(value, tuple) else value)
+
+    def test_json_encoder_values(self):
+        # Non-native values are encoded the same as JSONEncoder
+        value = {
+            'datetime': datetime(2020, 6, 17, 12, 30),
+            'datetime_tz': datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc),
+            'date': date(2020, 6, 17),
+            'decimal': Decimal('1.5'),
+            'uuid': UUID('ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b'),
+            'enum': MyEnum.A
+        }
+        self.assertEqual(decode_msgpack(encode_msgpack(value)), json.loads(json.dumps(value, cls=JSONEncoder)))
+
+    def test_struct_class(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        value = validate_type(TEST_TYPES, 'MyStruct', {'a': 1, 'children': [{'a': 2}]}, struct_classes=struct_classes)
+        self.assertEqual(decode_msgpack(encode_msgpack(value)), {'a': 1, 'children': [{'a': 2}]})
+
+    def test_subclasses(self):
+        class MyStr(str):
+            pass
+
+        class MyInt(int):
+            pass
+
+        class MyFloat(float):
+            pass
+
+        class MyDict(dict):
+            pass
+
+        class MyList(list):
+            pass
+
+        self.assertEqual(
+            encode_msgpack([MyStr('a'), MyInt(1), MyFloat(1.5), MyDict(a=1), MyList([1])]),
+            b'\x95\xa1a\x01\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00\x81\xa1a\x01\x91\x01'
+        )
+
+    def test_int_overflow(self):
+        for value in (2 ** 64, -(2 ** 63) - 1):
+            with self.subTest(value=value):
+                with self.assertRaises(OverflowError):
+                    encode_msgpack(value)
+
+    def test_length_overflow(self):
+        # The zero-filled bytes are not touched before the length check
+        with self.assertRaises(OverflowError) as cm_exc:
+            encode_msgpack(bytes(2 ** 32))
+        self.assertEqual(str(cm_exc.exception), 'MessagePack length out of range')
+
+    def test_unserializable(self):
+        with self.assertRaises(TypeError):
+            encode_msgpack(object())
+
+
+class TestDecodeMsgpack(unittest.TestCase):
+
+    def test_other_types(self):
+        for data, expected in (
+            (b'\xca\x3f\xc0\x00\x00', 1.5),
+            (b'\xd9\x03abc', 'abc'),
+            (b'\xdb\x00\x00\x00\x03abc', 'abc'),
+            (b'\xc5\x00\x02ab', b'ab'),
+            (b'\xc6\x00\x00\x00\x02ab', b'ab'),
+            (b'\xdd\x00\x00\x00\x01\x01', [1]),
+            (b'\xdf\x00\x00\x00\x01\x01\x02', {1: 2}),
+            (b'\xd0\x01', 1),
+            (b'\xcf\xff\xff\xff\xff\xff\xff\xff\xff', 2 ** 64 - 1)
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(decode_msgpack(data), expected)
+
+    def test_timestamps(self):
+        for data, expected in (
+            (b'\xd6\xff\x5e\xea\x0c\xc8', datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc)),
+            (b'\xd7\xff' + ((500000000 << 34) | 0x5eea0cc8).to_bytes(8, 'big'),
+             datetime(2020, 6, 17, 12, 30, 0, 500000, tzinfo=timezone.utc)),
+            (b'\xc7\x0c\xff' + (1000).to_bytes(4, 'big') + (-1).to_bytes(8, 'big', signed=True),
+             datetime(1969, 12, 31, 23, 59, 59, 1, tzinfo=timezone.utc))
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(decode_msgpack(data), expected)
+
+    def test_memoryview(self):
+        self.assertEqual(decode_msgpack(memoryview(b'\x92\x01\xa1a')), [1, 'a'])
+        self.assertEqual(decode_msgpack(bytearray(b'\x92\x01\xa1a')), [1, 'a'])
+
+    def test_error(self):
+        for data, message in (
+            (b'', 'Invalid MessagePack data'),
+            (b'\x92\x01', 'Invalid MessagePack data'),
+            (b'\xa3ab', 'Invalid MessagePack data'),
+            (b'\xa2\xff\xfe', 'Invalid MessagePack data'),
+            (b'\xcd\x01', 'Invalid MessagePack data'),
+            (b'\x81\x01', 'Invalid MessagePack data'),
+            (b'\x01\x02', 'Invalid MessagePack data: extra data at offset 1'),
+            (b'\x91\xc1', 'Invalid MessagePack type byte 0xc1 at offset 1'),
+            (b'\x81\x90\x00', 'Invalid MessagePack map key at offset 1'),
+            (b'\x82\x01\x02\x81\x00\x00\x00', 'Invalid MessagePack map key at offset 3'),
+            (b'\xd4\x01\x00', 'Unsupported MessagePack extension type 1 at offset 2'),
+            (b'\xd5\xff\x00\x00', 'Unsupported MessagePack extension type -1 at offset 2'),
+            (b'\xc8\x00\x01\x01\x00', 'Unsupported MessagePack extension type 1 at offset 4'),
+            (b'\xc9\x00\x00\x00\x01\x01\x00', 'Unsupported MessagePack extension type 1 at offset 6'),
+            (b'\xc8\x00\x04', 'Invalid MessagePack data'),
+            (b'\x91' * 100000, 'Invalid MessagePack data')
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError) as cm_exc:
+                    decode_msgpack(data)
+                self.assertEqual(str(cm_exc.exception), message)
+
+
+class TestValidateMsgpack(unittest.TestCase):
+
+    def test_round_trip(self):
+        value = validate_type(TEST_TYPES, 'MyStruct', {
+            'a': 1,
+            'b': 'abc',
+            'c': 1.5,
+            'd': '2020-06-17',
+            'e': '2020-06-17T12:30:00+00:00',
+            'f': 'ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b',
+            'g': 'B',
+            'children': [{'a': 2}],
+            'counts': {'x': 1}
+        })
+        self.assertEqual(validate_msgpack(TEST_TYPES, 'MyStruct', encode_msgpack(value)), value)
+
+    def test_timestamp(self):
+        self.assertEqual(
+            validate_msgpack(TEST_TYPES, 'MyStruct', b'\x82\xa1a\x01\xa1e\xd6\xff\x5e\xea\x0c\xc8'),
+            {'a': 1, 'e': datetime(2020, 6, 17, 12, 30, tzinfo=timezone.utc)}
+        )
+
+    def test_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        data = encode_msgpack({'a': 1, 'f': 'ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b'})
+        self.assertEqual(
+            validate_msgpack(TEST_TYPES, 'MyStruct', data, struct_classes=struct_classes, uuid_format='bytes'),
+            struct_classes['MyStruct'](a=1, f=UUID('ae8f3b7e-6e9e-4f5d-8b7a-5c7e3f9e1a2b').bytes)
+        )
+
+    def test_validation_error(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_msgpack(TEST_TYPES, 'MyStruct', encode_msgpack({'a': 1, 'children': [{'a': 'x'}]}))
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'x' (type 'str') for member 'children.0.a', expected type 'int'")
+        self.assertEqual(cm_exc.exception.member, 'children.0.a')
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_msgpack(TEST_TYPES, 'Unknown', b'\xc0')
+        self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            validate_msgpack(TEST_TYPES, 'MyStruct', b'\x81')
+        self.assertEqual(str(cm_exc.exception), 'Invalid MessagePack data')
+
+    def test_invalid_data_nested(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            validate_msgpack(TEST_TYPES, 'MyStruct', b'\x91' * 100000)
+        self.assertEqual(str(cm_exc.exception), 'Invalid MessagePack data')
@@ -3,9 +3,17 @@
 
 # pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
 
+# The parse_schema_markdown_files tests clear and inspect the in-process parse cache
+# pylint: disable=protected-access
+
+import hashlib
+import marshal
+import os
+import tempfile
 import unittest
 
-from schema_markdown import SchemaMarkdownParserError, parse_schema_markdown, validate_type_model
+import schema_markdown.parser
+from schema_markdown import SchemaMarkdownParserError, parse_schema_markdown, parse_schema_markdown_files, validate_type_model
 
 
 class TestParseSchemaMarkdown(unittest.TestCase):
@@ -257,6 +265,57 @@ action MyAction4 \\
             }
         })
 
+    def test_iterator(self):
+        types = {}
+
+        # The text parts are parsed as they are read
+        def text_parts():
+            yield 'struct MyStruct\n    int a\n'
+            yield '    int\\\n'
+            self.assertEqual(len(types['MyStruct']['struct']['members']), 1)
+            yield '(> 0) b\n'
+            self.assertEqual(len(types['MyStruct']['struct']['members']), 2)
+            yield 'typedef MyStruct[] MyStructs\n'
+
+        self.assertIs(parse_schema_markdown(text_parts(), types=types), types)
+        self.assertDictEqual(types, {
+            'MyStruct': {
+                'struct': {
+                    'name': 'MyStruct',
+                    'members': [
+                        {'name': 'a', 'type': {'builtin': 'int'}},
+                        {'name': 'b', 'type': {'builtin': 'int'}, 'attr': {'gt': 0.0}}
+                    ]
+                }
+            },
+            'MyStructs': {
+                'typedef': {
+                    'name': 'MyStructs',
+                    'type': {'array': {'type': {'user': 'MyStruct'}}}
+                }
+            }
+        })
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'test.smd')
+            with open(path, 'w', encoding='utf-8') as smd_file:
+                smd_file.write('# My struct\nstruct MyStruct\n    int a \\\n\n    optional string b\n')
+            with open(path, encoding='utf-8') as smd_file:
+                types = parse_schema_markdown(smd_file, filename=path)
+        self.assertDictEqual(types, {
+            'MyStruct': {
+                'struct': {
+                    'name': 'MyStruct',
+                    'doc': ['My struct'],
+                    'members': [
+                        {'name': 'a', 'type': {'builtin': 'int'}},
+                        {'name': 'b', 'type': {'builtin': 'string'}, 'optional': True}
+                    ]
+                }
+            }
+        })
+
     def test_action_urls(self):
         types = parse_schema_markdown('''\
 action MyAction
@@ -308,6 +367,64 @@ action MyAction
         self.assertEqual(str(cm_exc.exception), '\n'.join(errors))
         self.assertListEqual(cm_exc.exception.errors, errors)
 
+    def test_keyword_names(self):
+        types = parse_schema_markdown('''\
+action MyAction
+    input
+        int query
+        optional string urls
+    urls
+        query /q
+        GET
+
+struct MyStruct
+\tint path
+\f  optional bool errors
+
+enum MyEnum
+    urls
+    "query x"
+''')
+        self.assertDictEqual(types, {
+            'MyAction': {
+                'action': {
+                    'name': 'MyAction',
+                    'input': 'MyAction_input',
+                    'urls': [
+                        {'method': 'query', 'path': '/q'},
+                        {'method': 'GET'}
+                    ]
+                }
+            },
+            'MyAction_input': {
+                'struct': {
+                    'name': 'MyAction_input',
+                    'members': [
+                        {'name': 'query', 'type': {'builtin': 'int'}},
+                        {'name': 'urls', 'type': {'builtin': 'string'}, 'optional': True}
+                    ]
+                }
+            },
+            'MyStruct': {
+                'struct': {
+                    'name': 'MyStruct',
+                    'members': [
+                        {'name': 'path', 'type': {'builtin': 'int'}},
+                        {'name': 'errors', 'type': {'builtin': 'bool'}, 'optional': True}
+                    ]
+                }
+            },
+            'MyEnum': {
+                'enum': {
+                    'name': 'MyEnum',
+                    'values': [
+                        {'name': 'urls'},
+                        {'name': 'query x'}
+                    ]
+                }
+            }
+        })
+
     def test_action_url_typed(self):
         errors = [
             ':2: error: Syntax error',
@@ -2232,3 +2349,178 @@ action BonkAction
 ''')
         self.assertEqual(str(cm_exc.exception), '\n'.join(errors))
         self.assertListEqual(cm_exc.exception.errors, errors)
+
+
+class TestParseSchemaMarkdownFiles(unittest.TestCase):
+
+    @staticmethod
+    def _write_files(temp_dir, texts):
+        paths = []
+        for ix_text, text in enumerate(texts):
+            path = os.path.join(temp_dir, f'test{ix_text}.smd')
+            with open(path, 'w', encoding='utf-8') as smd_file:
+                smd_file.write(text)
+            paths.append(path)
+        return paths
+
+    def setUp(self):
+        schema_markdown.parser._PARSE_CACHE.clear()
+
+    def test_simple(self):
+        texts = [
+            '# My struct\nstruct MyStruct\n    MyEnum a\n    optional string b\n',
+            'enum MyEnum\n    A\n    B\n\naction MyAction\n    input\n        MyStruct s\n'
+        ]
+        expected_types = {}
+        for text in texts:
+            parse_schema_markdown(text, types=expected_types, validate=False)
+        validate_type_model(expected_types)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+            types = parse_schema_markdown_files(paths)
+            self.assertDictEqual(types, expected_types)
+
+            # In-process cache hits return new objects
+            types2 = parse_schema_markdown_files(paths)
+            self.assertDictEqual(types2, expected_types)
+            self.assertIsNot(types2['MyStruct'], types['MyStruct'])
+
+    def test_types(self):
+        types = parse_schema_markdown('struct MyStruct\n    int a\n')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, ['typedef MyStruct[] MyStructs\n'])
+            self.assertIs(parse_schema_markdown_files(paths, types=types), types)
+        self.assertDictEqual(types, {
+            'MyStruct': {'struct': {'name': 'MyStruct', 'members': [{'name': 'a', 'type': {'builtin': 'int'}}]}},
+            'MyStructs': {'typedef': {'name': 'MyStructs', 'type': {'array': {'type': {'user': 'MyStruct'}}}}}
+        })
+
+    def test_cache_dir(self):
+        texts = ['struct MyStruct\n    int a\n']
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+            cache_dir = os.path.join(temp_dir, 'cache')
+            types = parse_schema_markdown_files(paths, cache_dir=cache_dir)
+            self.assertDictEqual(types, parse_schema_markdown(texts[0]))
+            cache_files = os.listdir(cache_dir)
+            self.assertEqual(len(cache_files), 1)
+            self.assertTrue(cache_files[0].endswith('.marshal'))
+
+            # Replace the cache file to verify that it is used when the in-process cache is empty
+            cache_path = os.path.join(cache_dir, cache_files[0])
+            cached_types = parse_schema_markdown('struct MyStruct\n    string a\n')
+            with open(cache_path, 'wb') as cache_file:
+                cache_file.write(marshal.dumps((cached_types, {'MyStruct': 1}, {})))
+            schema_markdown.parser._PARSE_CACHE.clear()
+            self.assertDictEqual(parse_schema_markdown_files(paths, cache_dir=cache_dir), cached_types)
+
+            # A corrupt cache file is ignored and the file is parsed
+            with open(cache_path, 'wb') as cache_file:
+                cache_file.write(b'\xff')
+            schema_markdown.parser._PARSE_CACHE.clear()
+            self.assertDictEqual(parse_schema_markdown_files(paths, cache_dir=cache_dir), types)
+
+            # Cache data of the wrong shape is ignored and the file is parsed
+            for cache_value in ([1], (1, 2), (1, 2, 3), ({}, {}, [])):
+                with self.subTest(cache_value=cache_value):
+                    with open(cache_path, 'wb') as cache_file:
+                        cache_file.write(marshal.dumps(cache_value))
+                    schema_markdown.parser._PARSE_CACHE.clear()
+                    self.assertDictEqual(parse_schema_markdown_files(paths, cache_dir=cache_dir), types)
+
+    def test_cache_dir_unwritable(self):
+        texts = ['struct MyStruct\n    int a\n']
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+
+            # The cache directory is a file
+            cache_dir = os.path.join(temp_dir, 'cache')
+            with open(cache_dir, 'wb'):
+                pass
+            self.assertDictEqual(parse_schema_markdown_files(paths, cache_dir=cache_dir), parse_schema_markdown(texts[0]))
+            self.assertEqual(len(schema_markdown.parser._PARSE_CACHE), 1)
+
+    def test_cache_file_unwritable(self):
+        texts = ['struct MyStruct\n    int a\n']
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+            cache_dir = os.path.join(temp_dir, 'cache')
+            parse_schema_markdown_files(paths, cache_dir=cache_dir)
+            cache_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+
+            # The cache file path is a directory, so the temporary file can't be moved - the temporary file is removed
+            os.unlink(cache_path)
+            os.mkdir(cache_path)
+            schema_markdown.parser._PARSE_CACHE.clear()
+            self.assertDictEqual(parse_schema_markdown_files(paths, cache_dir=cache_dir), parse_schema_markdown(texts[0]))
+            self.assertEqual(os.listdir(cache_dir), [os.path.basename(cache_path)])
+            self.assertEqual(os.listdir(cache_path), [])
+
+    def test_cache_prefix(self):
+        library_name, version, _ = schema_markdown.parser._get_parse_cache_prefix().decode().split(' ', 2)
+        self.assertEqual(library_name, 'schema-markdown')
+        self.assertNotEqual(version, '')
+
+    def test_cache_version_not_installed(self):
+        # The library version is the parser source's hash if the library is not installed
+        with open(schema_markdown.parser.__file__, 'rb') as parser_file:
+            parser_hash = hashlib.sha256(parser_file.read()).hexdigest()
+        self.assertEqual(schema_markdown.parser._get_parse_cache_version('schema-markdown-not-installed'), parser_hash)
+
+    def test_cache_dir_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, ['struct MyStruct\n    int a\n    foo\n'])
+            cache_dir = os.path.join(temp_dir, 'cache')
+            with self.assertRaises(SchemaMarkdownParserError):
+                parse_schema_markdown_files(paths, cache_dir=cache_dir)
+            self.assertFalse(os.path.exists(cache_dir))
+            self.assertDictEqual(schema_markdown.parser._PARSE_CACHE, {})
+
+    def test_errors(self):
+        texts = [
+            'struct A\n    int a\n\naction MyAction\n',
+            '# B\nstruct B\n    A a\n    C c\n\nenum A\n    X\n\naction MyAction\n'
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+            with self.assertRaises(SchemaMarkdownParserError) as cm_exc:
+                parse_schema_markdown_files(paths)
+        errors = [
+            f"{paths[1]}:4: error: Unknown type 'C' from 'B' member 'c'",
+            f"{paths[1]}:6: error: Redefinition of type 'A'",
+            f"{paths[1]}:9: error: Redefinition of action 'MyAction'"
+        ]
+        self.assertEqual(str(cm_exc.exception), '\n'.join(errors))
+        self.assertListEqual(cm_exc.exception.errors, errors)
+
+    def test_no_validate(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, ['struct B\n    C c\n'])
+            types = parse_schema_markdown_files(paths, validate=False)
+        self.assertDictEqual(types, {
+            'B': {'struct': {'name': 'B', 'members': [{'name': 'c', 'type': {'user': 'C'}}]}}
+        })
+
+    def test_errors_action_sections(self):
+        # An action's section types are not reported as type redefinitions
+        texts = [
+            'action MyAction\n    query\n        int a\n',
+            'action MyAction\n    query\n        int a\n'
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+            with self.assertRaises(SchemaMarkdownParserError) as cm_exc:
+                parse_schema_markdown_files(paths)
+        errors = [
+            f"{paths[1]}:1: error: Redefinition of action 'MyAction'"
+        ]
+        self.assertListEqual(cm_exc.exception.errors, errors)
+
+    def test_cache_full(self):
+        # The in-process cache is cleared when full
+        texts = [f'struct MyStruct{ix}\n    int a\n' for ix in range(schema_markdown.parser._PARSE_CACHE_SIZE + 1)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = self._write_files(temp_dir, texts)
+            types = parse_schema_markdown_files(paths)
+        self.assertEqual(len(types), len(texts))
+        self.assertEqual(len(schema_markdown.parser._PARSE_CACHE), 1)
@@ -0,0 +1,154 @@
+# Licensed under the MIT License
+# https://github.com/craigahobbs/schema-markdown/blob/main/LICENSE
+
+# pylint: disable=missing-class-docstring, missing-function-docstring, missing-module-docstring
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import time
+import unittest
+
+from schema_markdown import Pipeline, PipelineStage, ValidationError, get_struct_classes, parse_schema_markdown
+
+
+TEST_TYPES = parse_schema_markdown('''\
+struct MyStruct
+    int a
+    optional date b
+''')
+
+
+def _increment(value):
+    return {**value, 'a': value['a'] + 1}
+
+
+class TestPipeline(unittest.TestCase):
+
+    SOURCE = [f'{{"a": {ix}, "b": "2020-06-{ix + 1:02d}"}}\n' for ix in range(25)]
+
+    EXPECTED = [f'{{"a": {ix + 1}, "b": "2020-06-{ix + 1:02d}"}}' for ix in range(25)]
+
+    def get_pipeline(self, mode=None, **kwargs):
+        return Pipeline(self.SOURCE, **kwargs).decode(mode=mode).validate(TEST_TYPES, 'MyStruct', mode=mode). \
+            transform(_increment, mode=mode).encode(mode=mode)
+
+    def assert_counters(self, pipeline, count):
+        self.assertListEqual([stage.name for stage in pipeline.stages], ['decode', 'validate', 'transform', 'encode'])
+        for stage in pipeline.stages:
+            self.assertEqual(stage.count, count)
+            self.assertGreaterEqual(stage.seconds, 0.)
+            self.assertGreaterEqual(stage.throughput, 0.)
+
+    def test_pipeline(self):
+        pipeline = self.get_pipeline()
+        self.assertListEqual(list(pipeline), self.EXPECTED)
+        self.assert_counters(pipeline, 25)
+
+        # Counters are reset each run
+        self.assertListEqual(list(pipeline), self.EXPECTED)
+        self.assert_counters(pipeline, 25)
+
+    def test_run(self):
+        pipeline = self.get_pipeline()
+        output = []
+        self.assertEqual(pipeline.run(output.append), 25)
+        self.assertListEqual(output, self.EXPECTED)
+        self.assertEqual(pipeline.run(), 25)
+
+    def test_validate_options(self):
+        struct_classes = get_struct_classes(TEST_TYPES)
+        pipeline = Pipeline(['{"a": 1}']).decode().validate(TEST_TYPES, 'MyStruct', struct_classes=struct_classes)
+        self.assertListEqual(list(pipeline), [struct_classes['MyStruct'](a=1)])
+
+    def test_query_string(self):
+        pipeline = Pipeline(['a=1&b=2020-06-17']).decode(query_string=True).validate(TEST_TYPES, 'MyStruct'). \
+            encode(query_string=True)
+        self.assertListEqual(list(pipeline), ['a=1&b=2020-06-17'])
+        pipeline = Pipeline(['a=1&b=2020-06-17']).decode(query_string=True).validate(TEST_TYPES, 'MyStruct')
+        self.assertListEqual(list(pipeline), [{'a': 1, 'b': date(2020, 6, 17)}])
+
+    def test_thread(self):
+        pipeline = self.get_pipeline('thread', queue_size=2)
+        self.assertListEqual(list(pipeline), self.EXPECTED)
+        self.assert_counters(pipeline, 25)
+
+    def test_thread_backpressure(self):
+        produced = []
+
+        def source():
+            for ix in range(100):
+                produced.append(ix)
+                yield ix
+
+        items = iter(Pipeline(source(), queue_size=2).stage('identity', int, mode='thread'))
+        self.assertEqual(next(items), 0)
+
+        # The producer thread blocks on the full queue
+        time.sleep(0.2)
+        self.assertLessEqual(len(produced), 5)
+        self.assertListEqual(list(items), list(range(1, 100)))
+
+    def test_thread_early_exit(self):
+        items = iter(Pipeline(range(1000), queue_size=2).stage('identity', int, mode='thread'))
+        self.assertEqual(next(items), 0)
+        items.close()
+
+    def test_thread_error(self):
+        pipeline = Pipeline(['{"a": 1}', '{"a": "x"}', '{"a": 3}']).decode().validate(TEST_TYPES, 'MyStruct', mode='thread')
+        items = iter(pipeline)
+        self.assertEqual(next(items), {'a': 1})
+        with self.assertRaises(ValidationError) as cm_exc:
+            next(items)
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'x' (type 'str') for member 'a', expected type 'int'")
+
+    def test_process(self):
+        pipeline = self.get_pipeline('process', queue_size=10, batch_size=3)
+        self.assertListEqual(list(pipeline), self.EXPECTED)
+        self.assert_counters(pipeline, 25)
+
+    def test_process_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pipeline = Pipeline(self.SOURCE, queue_size=4, batch_size=2).decode(mode='process', executor=executor). \
+                validate(TEST_TYPES, 'MyStruct', mode='process', executor=executor). \
+                transform(_increment, mode='process', executor=executor).encode(mode='process', executor=executor)
+            self.assertListEqual(list(pipeline), self.EXPECTED)
+        self.assert_counters(pipeline, 25)
+
+    def test_process_full_batches(self):
+        # The item count is a multiple of the batch size, so there is no partial batch
+        for source, expected in ((self.SOURCE, self.EXPECTED), ([], [])):
+            with self.subTest(count=len(source)):
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    pipeline = Pipeline(source, queue_size=10, batch_size=5).decode(). \
+                        validate(TEST_TYPES, 'MyStruct', mode='process', executor=executor).transform(_increment).encode()
+                    self.assertListEqual(list(pipeline), expected)
+
+    def test_process_error(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pipeline = Pipeline(['{"a": 1}', '{"a": "x"}']).decode().validate(TEST_TYPES, 'MyStruct', mode='process', executor=executor)
+            with self.assertRaises(ValidationError) as cm_exc:
+                list(pipeline)
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'x' (type 'str') for member 'a', expected type 'int'")
+
+    def test_mixed(self):
+        pipeline = Pipeline(self.SOURCE, queue_size=4, batch_size=4).decode(mode='thread'). \
+            validate(TEST_TYPES, 'MyStruct', mode='process').transform(_increment).encode(mode='thread')
+        self.assertListEqual(list(pipeline), self.EXPECTED)
+        self.assert_counters(pipeline, 25)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError) as cm_exc:
+            Pipeline([]).stage('identity', int, mode='fiber')
+        self.assertEqual(str(cm_exc.exception), "Invalid pipeline stage mode 'fiber'")
+
+    def test_stage(self):
+        stage = PipelineStage('identity', int)
+        self.assertEqual(stage.name, 'identity')
+        self.assertIsNone(stage.mode)
+        self.assertIsNone(stage.executor)
+        self.assertEqual(stage.count, 0)
+        self.assertEqual(stage.seconds, 0.)
+        self.assertEqual(stage.throughput, 0.)
+        stage.count = 10
+        stage.seconds = 2.
+        self.assertEqual(stage.throughput, 5.)
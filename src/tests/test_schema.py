@@ -5,10 +5,12 @@
 
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
+import pickle
 import unittest
 from uuid import UUID
 
-from schema_markdown import TYPE_MODEL, ValidationError, get_referenced_types, validate_type, validate_type_model
+from schema_markdown import TYPE_MODEL, ValidationError, get_referenced_types, parse_schema_markdown, validate_type, \
+    validate_type_model
 
 
 class TestReferencedTypes(unittest.TestCase):
@@ -257,6 +259,15 @@ class TestValidateType(unittest.TestCase):
         self.assertEqual(str(cm_exc.exception), "Unknown type 'Unknown'")
         self.assertIsNone(cm_exc.exception.member)
 
+    def test_error_pickle(self):
+        types = parse_schema_markdown('struct MyStruct\n    int a\n')
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(types, 'MyStruct', {'a': 'x'})
+        error = pickle.loads(pickle.dumps(cm_exc.exception))
+        self.assertIsInstance(error, ValidationError)
+        self.assertEqual(str(error), "Invalid value 'x' (type 'str') for member 'a', expected type 'int'")
+        self.assertEqual(error.member, 'a')
+
     def test_string(self):
         obj = 'abc'
         self.assertEqual(self._validate_type({'builtin': 'string'}, obj), obj)
@@ -488,6 +499,63 @@ class TestValidateType(unittest.TestCase):
         self.assertEqual(str(cm_exc.exception), "Invalid value 'abc' (type 'str'), expected type 'uuid'")
         self.assertIsNone(cm_exc.exception.member)
 
+    def test_uuid_format_string(self):
+        types = {'MyTypedef': {'typedef': {'name': 'MyTypedef', 'type': {'builtin': 'uuid'}}}}
+        for obj in (
+            'AED91C7B-DCFD-49B3-A483-DBC9EA2031A3',
+            'aed91c7b-dcfd-49b3-a483-dbc9ea2031a3',
+            '{aed91c7b-dcfd-49b3-a483-dbc9ea2031a3}',
+            'aed91c7bdcfd49b3a483dbc9ea2031a3',
+            UUID('aed91c7b-dcfd-49b3-a483-dbc9ea2031a3')
+        ):
+            self.assertEqual(validate_type(types, 'MyTypedef', obj, uuid_format='string'), 'aed91c7b-dcfd-49b3-a483-dbc9ea2031a3')
+
+    def test_uuid_format_bytes(self):
+        types = {'MyTypedef': {'typedef': {'name': 'MyTypedef', 'type': {'builtin': 'uuid'}}}}
+        expected = UUID('aed91c7b-dcfd-49b3-a483-dbc9ea2031a3').bytes
+        for obj in (
+            'AED91C7B-DCFD-49B3-A483-DBC9EA2031A3',
+            'aed91c7b-dcfd-49b3-a483-dbc9ea2031a3',
+            'aed91c7bdcfd49b3a483dbc9ea2031a3',
+            UUID('aed91c7b-dcfd-49b3-a483-dbc9ea2031a3')
+        ):
+            self.assertEqual(validate_type(types, 'MyTypedef', obj, uuid_format='bytes'), expected)
+
+    def test_uuid_format_error(self):
+        types = {'MyTypedef': {'typedef': {'name': 'MyTypedef', 'type': {'builtin': 'uuid'}}}}
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(types, 'MyTypedef', 'aed91c7b-dcfd-49b3-a483-dbc9ea2031aX', uuid_format='string')
+        self.assertEqual(
+            str(cm_exc.exception),
+            "Invalid value 'aed91c7b-dcfd-49b3-a483-dbc9ea2031aX' (type 'str'), expected type 'uuid'"
+        )
+        self.assertIsNone(cm_exc.exception.member)
+
+        with self.assertRaises(ValueError) as cm_exc:
+            validate_type(types, 'MyTypedef', 'aed91c7b-dcfd-49b3-a483-dbc9ea2031a3', uuid_format='UUID')
+        self.assertEqual(str(cm_exc.exception), "Invalid UUID format 'UUID'")
+
+    def test_uuid_format_array(self):
+        types = {'MyTypedef': {'typedef': {'name': 'MyTypedef', 'type': {'array': {'type': {'builtin': 'uuid'}}}}}}
+        uuid1 = UUID('aed91c7b-dcfd-49b3-a483-dbc9ea2031a3')
+        uuid2 = UUID('127ff2eb-3e1e-42a6-ab8a-f03b6eeb33e7')
+        obj = ['AED91C7B-DCFD-49B3-A483-DBC9EA2031A3', '127ff2eb-3e1e-42a6-ab8a-f03b6eeb33e7']
+        self.assertListEqual(validate_type(types, 'MyTypedef', obj, uuid_format='string'), [f'{uuid1}', f'{uuid2}'])
+        self.assertListEqual(validate_type(types, 'MyTypedef', obj, uuid_format='bytes'), [uuid1.bytes, uuid2.bytes])
+        self.assertListEqual(validate_type(types, 'MyTypedef', [], uuid_format='string'), [])
+
+        # Non-canonical array values
+        obj = ['AED91C7B-DCFD-49B3-A483-DBC9EA2031A3', uuid2]
+        self.assertListEqual(validate_type(types, 'MyTypedef', obj, uuid_format='string'), [f'{uuid1}', f'{uuid2}'])
+        obj = ['AED91C7BDCFD49B3A483DBC9EA2031A3', f'{uuid2}']
+        self.assertListEqual(validate_type(types, 'MyTypedef', obj, uuid_format='bytes'), [uuid1.bytes, uuid2.bytes])
+
+        # Embedded array value separator
+        obj = [f'{uuid1}\n{uuid2}']
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(types, 'MyTypedef', obj, uuid_format='string')
+        self.assertEqual(cm_exc.exception.member, '0')
+
     def test_any(self):
         obj = object()
         self.assertIs(self._validate_type({'builtin': 'any'}, obj), obj)
@@ -613,6 +681,27 @@ class TestValidateType(unittest.TestCase):
         )
         self.assertDictEqual(self._validate_type({'dict': {'type': {'builtin': 'int'}}}, obj), obj)
 
+    def test_dict_intern_strings(self):
+        types = parse_schema_markdown('''\
+struct MyStruct
+    int{} values
+''')
+        member_values = types['MyStruct']['struct']['members'][0]['name']
+
+        obj1 = {''.join(['val', 'ues']): {''.join(['ab', 'c']): 1}}
+        obj2 = {''.join(['val', 'ues']): {''.join(['ab', 'c']): 2}}
+        value1 = validate_type(types, 'MyStruct', obj1, intern_strings=True)
+        value2 = validate_type(types, 'MyStruct', obj2, intern_strings=True)
+        self.assertDictEqual(value1, {'values': {'abc': 1}})
+        self.assertDictEqual(value2, {'values': {'abc': 2}})
+        self.assertIs(next(iter(value1)), member_values)
+        self.assertIs(next(iter(value2)), member_values)
+        self.assertIs(next(iter(value1['values'])), next(iter(value2['values'])))
+
+        value3 = validate_type(types, 'MyStruct', obj2)
+        self.assertIs(next(iter(value3)), member_values)
+        self.assertIs(next(iter(value3['values'])), next(iter(obj2[member_values])))
+
     def test_dict_empty_string(self):
         obj = {}
         self.assertDictEqual(self._validate_type({'dict': {'type': {'builtin': 'int'}}}, ''), obj)
@@ -718,6 +807,25 @@ class TestValidateType(unittest.TestCase):
         self.assertEqual(str(cm_exc.exception), "Invalid value 'c' (type 'str'), expected type 'enum'")
         self.assertIsNone(cm_exc.exception.member)
 
+    def test_enum_intern_strings(self):
+        types = parse_schema_markdown('''\
+enum MyEnum
+    Alpha
+    Beta
+''')
+        enum_value_beta = types['MyEnum']['enum']['values'][1]['name']
+
+        obj = ''.join(['Be', 'ta'])
+        self.assertIsNot(obj, enum_value_beta)
+        self.assertIs(validate_type(types, 'MyEnum', obj), obj)
+        self.assertIs(validate_type(types, 'MyEnum', obj, intern_strings=True), enum_value_beta)
+
+        obj = 'Gamma'
+        with self.assertRaises(ValidationError) as cm_exc:
+            validate_type(types, 'MyEnum', obj, intern_strings=True)
+        self.assertEqual(str(cm_exc.exception), "Invalid value 'Gamma' (type 'str'), expected type 'MyEnum'")
+        self.assertIsNone(cm_exc.exception.member)
+
     def test_enum_empty(self):
         types = {
             'MyEnum': {